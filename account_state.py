@@ -0,0 +1,152 @@
+import time
+import threading
+from typing import Dict, Any, Optional, Callable, List
+
+
+class AccountStore:
+    """
+    Futures kullanıcı veri akışından (ACCOUNT_UPDATE / ORDER_TRADE_UPDATE) beslenen, bellekte
+    tutulan bakiye, pozisyon ve emir durumu. Periyodik REST anlık görüntüleri `apply_*`
+    metotlarıyla uzlaştırılır; her kayıt için daha eski zamanlı güncellemeler yok sayılır.
+    Ağ bağlantısı içermez, sahte mesajlarla doğrudan sınanabilir.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.balances: Dict[str, Dict[str, float]] = {}
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.synced = False
+        self.last_event_time = 0
+        self.last_reconcile = 0.0
+        self._order_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def on_order_update(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Her ORDER_TRADE_UPDATE sonrasında emir kaydıyla çağrılacak dinleyici ekler."""
+        self._order_listeners.append(listener)
+
+    # --- Akış olayları ---
+
+    def handle_event(self, msg: Dict[str, Any]) -> None:
+        event_type = msg.get('e')
+        if event_type == 'ACCOUNT_UPDATE':
+            self._apply_account_update(msg)
+        elif event_type == 'ORDER_TRADE_UPDATE':
+            self._apply_order_update(msg)
+
+    def _apply_account_update(self, msg: Dict[str, Any]) -> None:
+        event_time = int(msg.get('E', 0))
+        data = msg.get('a', {})
+        with self._lock:
+            self.last_event_time = max(self.last_event_time, event_time)
+            for balance in data.get('B', []):
+                self._set_balance(balance['a'], float(balance['wb']), float(balance.get('cw', balance['wb'])),
+                                  event_time)
+            for position in data.get('P', []):
+                self._set_position(position['s'], position.get('ps', 'BOTH'), float(position['pa']),
+                                   float(position['ep']), float(position.get('up', 0)), event_time)
+
+    def _apply_order_update(self, msg: Dict[str, Any]) -> None:
+        o = msg['o']
+        order = {
+            'symbol': o['s'],
+            'orderId': int(o['i']),
+            'clientOrderId': o.get('c'),
+            'side': o['S'],
+            'type': o.get('ot', o.get('o')),
+            'status': o['X'],
+            'execution': o.get('x'),
+            'origQty': float(o.get('q', 0)),
+            'executedQty': float(o.get('z', 0)),
+            'avgPrice': float(o.get('ap', 0)),
+            'stopPrice': float(o.get('sp', 0)),
+            'reduceOnly': bool(o.get('R', False)),
+            'realizedPnl': float(o.get('rp', 0)),
+            'updateTime': int(o.get('T', msg.get('E', 0))),
+        }
+        with self._lock:
+            self.last_event_time = max(self.last_event_time, int(msg.get('E', 0)))
+            if order['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                self.orders[order['orderId']] = order
+            else:
+                self.orders.pop(order['orderId'], None)
+        for listener in self._order_listeners:
+            listener(order)
+
+    # --- REST uzlaştırması ---
+
+    def apply_account_snapshot(self, account_info: Dict[str, Any]) -> None:
+        """`futures_account()` yanıtını uygular."""
+        with self._lock:
+            for asset in account_info.get('assets', []):
+                self._set_balance(asset['asset'], float(asset['walletBalance']),
+                                  float(asset.get('crossWalletBalance', asset['walletBalance'])),
+                                  int(asset.get('updateTime') or self.last_event_time))
+
+    def apply_position_snapshot(self, positions: List[Dict[str, Any]]) -> None:
+        """
+        `futures_position_information()` yanıtını uygular. Binance düz pozisyonlarda `updateTime`
+        değerini 0 döndürebilir; bu kayıtlar yerel saatle değil, görülen son sunucu olay zamanıyla
+        damgalanır. Böylece görüntü eski akış kayıtlarını düzeltir ama saat farkı olsa bile hemen
+        ardından gelen gerçek bir ACCOUNT_UPDATE'i engellemez.
+        """
+        with self._lock:
+            for position in positions:
+                self._set_position(position['symbol'], position.get('positionSide', 'BOTH'),
+                                   float(position['positionAmt']), float(position['entryPrice']),
+                                   float(position.get('unRealizedProfit', position.get('unrealizedProfit', 0))),
+                                   int(position.get('updateTime') or self.last_event_time))
+            self.synced = True
+            self.last_reconcile = time.time()
+
+    def apply_open_orders_snapshot(self, orders: List[Dict[str, Any]]) -> None:
+        """`futures_get_open_orders()` yanıtıyla açık emir listesini değiştirir."""
+        with self._lock:
+            self.orders = {
+                int(o['orderId']): {
+                    'symbol': o['symbol'], 'orderId': int(o['orderId']), 'clientOrderId': o.get('clientOrderId'),
+                    'side': o['side'], 'type': o.get('origType', o.get('type')), 'status': o['status'],
+                    'origQty': float(o['origQty']), 'executedQty': float(o.get('executedQty', 0)),
+                    'stopPrice': float(o.get('stopPrice', 0)), 'reduceOnly': bool(o.get('reduceOnly', False)),
+                    'updateTime': int(o.get('updateTime', 0)),
+                }
+                for o in orders
+            }
+
+    # --- Okuma ---
+
+    def get_balance(self, asset: str = 'USDT') -> Optional[float]:
+        with self._lock:
+            balance = self.balances.get(asset)
+            return balance['wallet'] if balance else None
+
+    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Sembolün açık (miktarı sıfırdan farklı) pozisyonunu döndürür."""
+        with self._lock:
+            for (position_symbol, _), position in self.positions.items():
+                if position_symbol == symbol and position['amount'] != 0:
+                    return dict(position)
+        return None
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(o) for o in self.orders.values() if symbol is None or o['symbol'] == symbol]
+
+    # --- Yardımcılar (kilit altında çağrılır) ---
+
+    def _set_balance(self, asset: str, wallet: float, cross: float, update_time: int) -> None:
+        current = self.balances.get(asset)
+        if current and current['update_time'] > update_time:
+            return
+        self.balances[asset] = {'wallet': wallet, 'cross': cross, 'update_time': update_time}
+
+    def _set_position(self, symbol: str, position_side: str, amount: float, entry_price: float,
+                      unrealized_pnl: float, update_time: int) -> None:
+        key = (symbol, position_side)
+        current = self.positions.get(key)
+        if current and current['update_time'] > update_time:
+            return
+        self.positions[key] = {
+            'symbol': symbol, 'position_side': position_side, 'amount': amount,
+            'entry_price': entry_price, 'unrealized_pnl': unrealized_pnl, 'update_time': update_time,
+        }
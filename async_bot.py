@@ -0,0 +1,526 @@
+import time
+import asyncio
+from typing import Any, Callable, Dict, Optional, Set
+
+from binance import AsyncClient, BinanceSocketManager
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
+
+import metrics
+import screener
+from events import AsyncEventDispatcher, CANDLE_CLOSED
+from kline_buffer import KlineBuffer
+from kline_store import seed_buffer_async
+from recorder import MULTIPLEX_PREFIX
+from rest_gateway import AsyncRestGateway, SyncClientAdapter
+from runner import AsyncMultiSymbolRunner
+from trading_bot import TradingBot, _position_from_rest
+
+# Akış türü → (BinanceSocketManager metodu, ThreadedWebsocketManager uyumlu yönetici metodu)
+STREAM_METHODS = {
+    'kline': ('kline_futures_socket', 'start_kline_futures_socket'),
+    'mark': ('symbol_mark_price_socket', 'start_symbol_mark_price_socket'),
+    'user': ('futures_user_socket', 'start_futures_user_socket'),
+    'multiplex': ('futures_multiplex_socket', 'start_futures_multiplex_socket'),
+}
+# Kapanışta süren emir ve değerlendirme görevlerinin bitmesi için beklenen en uzun süre (sn)
+SHUTDOWN_GRACE = 5.0
+
+
+class AsyncTradingBot(TradingBot):
+    """
+    `TradingBot`'un asyncio çekirdeği. REST çağrıları `AsyncClient` üzerinden `AsyncRestGateway`
+    ile, akışlar `BinanceSocketManager` görevleriyle tek olay döngüsünde (örn. uvicorn'unki)
+    çalışır; strateji, hesap uzlaştırma ve akış döngüleri için iş parçacığı açılmaz. Tampon,
+    sinyal motoru ve hesap durumu mantığı `TradingBot` ile aynıdır; ağ bekleyen metotlar
+    (`open_position`, `manual_trade`, `close_current_position`, `set_leverage`, `update_symbol`,
+    `reconcile_account`, `check_and_update_pnl`, `stop_all`) eş yordamdır.
+
+    Nesne olay döngüsü dışında oluşturulabilir; bağlantılar `await start()` ile açılır.
+    `client` olarak `AsyncClient` dışında senkron bir bellek içi istemci (örn. simüle borsa),
+    `socket_manager` olarak `ThreadedWebsocketManager` uyumlu bir yönetici verilebilir; o
+    yöneticinin iş parçacığından gelen mesajlar olay döngüsüne aktarılır.
+    """
+
+    runner_class = AsyncMultiSymbolRunner
+
+    def __init__(self, ui_update_callback: Optional[Callable] = None, client=None, socket_manager=None) -> None:
+        self._load_config_from_env()
+        self.ui_update_callback = ui_update_callback
+        if client is None and self.trading_mode == 'paper':
+            client, socket_manager = self._create_paper_exchange()
+        self._client_source = client
+        self._init_state()
+
+        self.dispatcher = AsyncEventDispatcher(on_error=self._log)
+        self.dispatcher.subscribe(CANDLE_CLOSED, self._on_candle_closed)
+        self.recorder = self._create_recorder()
+
+        self.client: Optional[AsyncRestGateway] = None
+        self.socket_manager = socket_manager
+        self.bsm: Optional[BinanceSocketManager] = None
+        self.runner = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._streams: Dict[str, asyncio.Task] = {}
+        self._stream_seq = 0
+        # Tek seferlik işler (emir, değerlendirme, tohumlama) ve sürekli döngüler ayrı tutulur:
+        # kapanışta ilkinin bitmesi beklenir, ikincisi hemen iptal edilir
+        self._tasks: Set[asyncio.Task] = set()
+        self._services: Set[asyncio.Task] = set()
+        self._stopping: Optional[asyncio.Future] = None
+        self._log("Bot objesi oluşturuldu (asyncio).")
+
+    async def start(self) -> None:
+        """İstemciyi ve akışları olay döngüsünde açar."""
+        self._loop = asyncio.get_running_loop()
+        client = self._client_source
+        if client is None:
+            client = await AsyncClient.create(self.api_key, self.api_secret, testnet=self.is_testnet)
+        elif not isinstance(client, AsyncClient):
+            client = SyncClientAdapter(client)
+        self.client = AsyncRestGateway(client, weight_limit=self.rest_weight_limit, log=self._log)
+        if self.socket_manager is None:
+            self.bsm = BinanceSocketManager(client)
+        else:
+            self.socket_manager.start()
+        self.dispatcher.start()
+        self.runner = self._create_runner()
+        self._register_gauges()
+        self._start_kline_socket(self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+        self._start_mark_price_socket(self.active_symbol)
+        self.spawn(self.start_user_data_stream(), service=True)
+        self._log("Bot asyncio çekirdeğiyle başlatıldı.")
+
+    # --- Görevler ---
+
+    def spawn(self, coro, service: bool = False) -> asyncio.Task:
+        """Eş yordamı bot görevi olarak başlatır; kapanışta `stop_all` tarafından toplanır."""
+        task = self._loop.create_task(coro)
+        tasks = self._services if service else self._tasks
+        tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._services.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._log(f"Arka plan görevinde hata: {task.exception()}")
+
+    # --- Akışlar ---
+
+    def _open_stream(self, kind: str, callback: Callable[[dict], None], **params) -> str:
+        """Akışa abone olur ve kapatmak için kullanılacak adı döndürür."""
+        if kind == 'kline':
+            name = f"{params['symbol'].lower()}@kline_{params['interval']}"
+        elif kind == 'mark':
+            name = f"{params['symbol'].lower()}@markPrice"
+        else:
+            name = kind
+        bsm_method, manager_method = STREAM_METHODS[kind]
+        if self.socket_manager is not None:
+            loop, deliver = self._loop, self._deliver
+
+            def threadsafe(msg):
+                loop.call_soon_threadsafe(deliver, name, callback, msg)
+            return getattr(self.socket_manager, manager_method)(callback=threadsafe, **params)
+        self._stream_seq += 1
+        handle = f"{name}#{self._stream_seq}"
+        self._streams[handle] = self._loop.create_task(self._run_stream(name, bsm_method, params, callback))
+        return handle
+
+    def _close_stream(self, handle: str) -> None:
+        if self.socket_manager is not None:
+            self.socket_manager.stop_socket(handle)
+            return
+        task = self._streams.pop(handle, None)
+        if task is not None:
+            task.cancel()
+
+    def _deliver(self, name: str, callback: Callable[[dict], None], msg: dict) -> None:
+        if self.recorder is not None:
+            if name == 'multiplex':
+                self.recorder.record(MULTIPLEX_PREFIX + msg.get('stream', ''), msg.get('data'))
+            else:
+                self.recorder.record(name, msg)
+        try:
+            callback(msg)
+        except Exception as e:
+            self._log(f"{name} mesajı işlenirken hata: {e}")
+
+    async def _run_stream(self, name: str, method: str, params: Dict[str, Any],
+                          callback: Callable[[dict], None]) -> None:
+        """Akışı okur; bağlantı koparsa artan beklemelerle yeniden açar."""
+        backoff = 1.0
+        while self.running:
+            try:
+                async with getattr(self.bsm, method)(**params) as stream:
+                    backoff = 1.0
+                    while self.running:
+                        msg = await stream.recv()
+                        if isinstance(msg, dict) and msg.get('e') == 'error':
+                            self._log(f"{name} akışı hatası: {msg.get('m')}")
+                            break
+                        self._deliver(name, callback, msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._log(f"{name} akışı koptu: {e}")
+            if self.running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def _start_kline_socket(self, symbol: str, interval: str):
+        key = (symbol, interval)
+        if key in self.kline_buffers:
+            return
+        buffer = KlineBuffer(symbol, interval, capacity=self.kline_buffer_size)
+        self.kline_buffers[key] = buffer
+        self.spawn(self._open_kline_stream(buffer))
+
+    async def _open_kline_stream(self, buffer: KlineBuffer) -> None:
+        # Tampon dolana kadar `_get_signal_engine` motor oluşturmaz (len < 3)
+        try:
+            await seed_buffer_async(buffer, self.client)
+        except Exception as e:
+            self._log(f"{buffer.symbol} {buffer.interval} geçmiş mum verisi alınamadı: {e}")
+        self._record_seed(buffer)
+        key = (buffer.symbol, buffer.interval)
+        if self.kline_buffers.get(key) is not buffer:
+            # Tohumlama sürerken sembol/strateji değişti ve tampon bırakıldı
+            return
+        self._kline_sockets[key] = self._open_stream('kline', self._make_kline_handler(buffer),
+                                                     symbol=buffer.symbol, interval=buffer.interval)
+
+    def _start_mark_price_socket(self, symbol: str) -> None:
+        if symbol in self._mark_sockets:
+            return
+        self._mark_sockets[symbol] = self._open_stream('mark', self._handle_mark_price, symbol=symbol)
+
+    def _open_user_socket(self) -> None:
+        if self._user_socket:
+            self._close_stream(self._user_socket)
+        self._user_socket = self._open_stream('user', self._handle_user_message)
+
+    def _handle_user_message(self, msg: dict) -> None:
+        if msg.get('e') == 'listenKeyExpired':
+            self._log("Kullanıcı veri akışı anahtarının süresi doldu, akış yeniden açılıyor.")
+            self._open_user_socket()
+            self.spawn(self.reconcile_account())
+            return
+        super()._handle_user_message(msg)
+
+    async def start_user_data_stream(self):
+        """Emir kurallarını yükleyip hesabı uzlaştırır, kullanıcı akışını açar ve periyodik uzlaştırmaya geçer."""
+        # Görüntüden önce akışa abone olunur; arada gelen olaylar kaybolmaz
+        self._open_user_socket()
+        await asyncio.gather(self.refresh_symbol_filters(), self.reconcile_account())
+        while self.running:
+            await asyncio.sleep(self.reconcile_interval)
+            if self.symbol_filters.stale:
+                await self.refresh_symbol_filters()
+            await self.reconcile_account()
+
+    async def refresh_symbol_filters(self) -> bool:
+        try:
+            info = await self.client.futures_exchange_info()
+            self._record('rest:exchange_info', info)
+            count = self.symbol_filters.load(info)
+            self._log(f"{count} sembolün emir kuralları yüklendi.")
+            return True
+        except Exception as e:
+            self._log(f"Sembol emir kuralları alınırken hata: {e}")
+            return False
+
+    async def reconcile_account(self) -> bool:
+        """Bakiye, açık emir ve pozisyonları eşzamanlı okuyup yerel durumu düzeltir."""
+        try:
+            account_info, open_orders, positions = await asyncio.gather(
+                self.client.futures_account(),
+                self.client.futures_get_open_orders(),
+                self.client.futures_position_information(),
+            )
+            self._record('rest:reconcile', {'account': account_info, 'open_orders': open_orders,
+                                            'positions': positions})
+            self.account.apply_account_snapshot(account_info)
+            self.account.apply_open_orders_snapshot(open_orders)
+            self.account.apply_position_snapshot(positions)
+            return True
+        except Exception as e:
+            self._log(f"Hesap durumu uzlaştırılırken hata: {e}")
+            return False
+
+    # --- Emirler ---
+
+    async def get_usdt_balance(self) -> float:
+        if self.account.synced:
+            return self.account.get_balance('USDT') or 0.0
+        try:
+            account_info = await self.client.futures_account()
+            for asset in account_info['assets']:
+                if asset['asset'] == 'USDT':
+                    return float(asset['walletBalance'])
+        except Exception as e:
+            self._log(f"Bakiye alınırken hata: {e}")
+        return 0.0
+
+    async def check_and_update_pnl(self, symbol: str) -> None:
+        if self.account.synced:
+            pos = self.account.get_position(symbol)
+        else:
+            try:
+                pos = _position_from_rest(await self.client.futures_position_information(symbol=symbol))
+            except Exception as e:
+                self._log(f"Pozisyon bilgisi alınırken hata: {e}")
+                return
+        self._report_pnl(symbol, pos)
+
+    async def open_position(self, signal: str, atr: float, quantity: float, manual: bool = False) -> None:
+        try:
+            side = SIDE_BUY if signal == "LONG" else SIDE_SELL
+            # Borsaya giden emir, bekleyen görev iptal edilse de tamamlanır ve günlüğe yazılır
+            order = await asyncio.shield(self.client.futures_create_order(
+                symbol=self.active_symbol,
+                side=side,
+                type=ORDER_TYPE_MARKET,
+                quantity=quantity
+            ))
+            self.position_open = True
+            self.current_position = order
+            self._log(f"{signal} pozisyonu açıldı. Miktar: {quantity}")
+            self.trade_journal.submit({
+                'symbol': self.active_symbol,
+                'id': order['orderId'],
+                'side': signal,
+                'realizedPnl': 0,
+                'time': int(time.time() * 1000),
+                'strategy': None if manual else self.active_strategy_name
+            })
+        except Exception as e:
+            self._log(f"Pozisyon açılırken hata: {e}")
+            return
+        await self.place_bracket(self.active_symbol, signal, order, quantity, atr,
+                                 self.strategy_configs[self.active_strategy_name],
+                                 on_close=self._make_bracket_close(self.active_symbol))
+
+    # --- Koruma emirleri (SL/TP) ---
+
+    async def place_bracket(self, symbol: str, signal: str, entry_order: dict, quantity: float, atr: float,
+                            config: Dict[str, Any], on_close: Optional[Callable[[], None]] = None) -> None:
+        orders = self._prepare_bracket(symbol, signal, entry_order, quantity, atr, config)
+        if not orders:
+            return
+        try:
+            # Pozisyon açıldıysa korumalar görev iptal edilse de borsaya ulaşmalı
+            response = await asyncio.shield(self.client.futures_place_batch_order(batchOrders=orders))
+        except Exception as e:
+            self._log(f"[{symbol}] Koruma emirleri gönderilirken hata: {e}")
+            return
+        self._register_bracket(symbol, orders, response, on_close)
+
+    def _in_background(self, func: Callable, *args) -> None:
+        # İşlerin kendisi beklemez (örn. `_cancel_orders` görev başlatır); eş yordam dönerse görev olur
+        result = func(*args)
+        if asyncio.iscoroutine(result):
+            self.spawn(result)
+
+    def _cancel_orders(self, symbol: str, order_ids: list) -> None:
+        # Kullanıcı akışı işleyicisinden çağrılır; iptaller olay döngüsünü bekletmeden görev olarak yapılır
+        self.spawn(self._cancel_orders_async(symbol, order_ids))
+
+    async def _cancel_orders_async(self, symbol: str, order_ids: list) -> None:
+        results = await asyncio.gather(
+            *(self.client.futures_cancel_order(symbol=symbol, orderId=order_id) for order_id in order_ids),
+            return_exceptions=True)
+        for order_id, result in zip(order_ids, results):
+            if isinstance(result, Exception):
+                self._log(f"[{symbol}] {order_id} numaralı koruma emri iptal edilemedi: {result}")
+
+    async def cancel_brackets(self, symbol: str) -> None:
+        for bracket in self.brackets.pop_symbol(symbol):
+            await self._cancel_orders_async(symbol, bracket.order_ids)
+
+    async def check_positions(self) -> None:
+        """Aktif sembol ve tüm çalıştırıcı yuvalarının pozisyonlarını eşzamanlı denetler."""
+        if self.position_open:
+            await self.check_and_update_pnl(self.active_symbol)
+        if self.runner:
+            await self.runner.check_positions()
+
+    async def close_current_position(self, from_emergency_button=False) -> None:
+        self._record('control', {'method': 'close_current_position', 'args': [from_emergency_button]})
+        if not self.position_open:
+            self._log("Kapatılacak açık pozisyon yok.")
+            return
+        try:
+            pos = self.account.get_position(self.active_symbol) if self.account.synced else None
+            if pos is not None:
+                side = SIDE_SELL if pos['amount'] > 0 else SIDE_BUY
+                quantity = abs(pos['amount'])
+            else:
+                side = SIDE_SELL if self.current_position['side'] == SIDE_BUY else SIDE_BUY
+                quantity = float(self.current_position['origQty'])
+            await asyncio.shield(self.client.futures_create_order(
+                symbol=self.active_symbol,
+                side=side,
+                type=ORDER_TYPE_MARKET,
+                quantity=quantity,
+                reduceOnly=True
+            ))
+            self.position_open = False
+            self.current_position = None
+            self._log("Pozisyon piyasa emriyle kapatıldı.")
+        except Exception as e:
+            self._log(f"Pozisyon kapatılırken hata: {e}")
+            return
+        await self.cancel_brackets(self.active_symbol)
+
+    async def set_leverage(self, leverage: int, symbol: str):
+        self._record('control', {'method': 'set_leverage', 'args': [leverage, symbol]})
+        try:
+            await self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
+            self.leverage = leverage
+            self._log(f"Kaldıraç {leverage}x olarak ayarlandı.")
+        except Exception as e:
+            self._log(f"Kaldıraç ayarlanırken hata: {e}")
+
+    async def manual_trade(self, side: str):
+        self._record('control', {'method': 'manual_trade', 'args': [side]})
+        engine = self._get_signal_engine(self.active_symbol, self.active_strategy_name)
+        if engine is None:
+            self._log("Manuel işlem için piyasa verisi alınamadı.")
+            return
+
+        atr_value = engine.atr.value or 0
+        quantity = self.calculate_quantity(await self.get_usdt_balance(), self.active_symbol)
+        if quantity:
+            await self.open_position(side, atr_value, quantity, manual=True)
+
+    async def update_symbol(self, mode: str, manual_symbol: str = ""):
+        if mode != "screener":
+            return super().update_symbol(mode, manual_symbol)
+        self._record('control', {'method': 'update_symbol', 'args': [mode, manual_symbol]})
+        # Tarayıcı senkron istemciyle çalışır; olay döngüsünü bekletmemesi için ayrı iş parçacığında
+        # çalıştırılır. Kağıt modunda simüle borsa, canlıda anahtarsız bir istemci kullanılır.
+        source = None if isinstance(self._client_source, AsyncClient) else self._client_source
+        screened_symbol = await asyncio.to_thread(screener.get_best_symbol, source)
+        if screened_symbol and not self._can_activate(screened_symbol):
+            return
+        if screened_symbol:
+            self.active_symbol = screened_symbol
+            self._start_kline_socket(self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+            self._start_mark_price_socket(self.active_symbol)
+            self._release_streams()
+            self._log(f"Screener tarafından {self.active_symbol} seçildi.")
+        else:
+            self._log("Screener sembol seçemedi.")
+
+    # --- Strateji ---
+
+    async def _evaluate_strategy(self) -> bool:
+        result = self.get_active_strategy_signal()
+        if result is None:
+            return False
+
+        signal, atr = result
+
+        if signal != 'WAIT' and not self.position_open:
+            quantity = self.calculate_quantity(await self.get_usdt_balance(), self.active_symbol)
+            if quantity:
+                await self.open_position(signal, atr, quantity)
+
+        if self.position_open:
+            await self.check_and_update_pnl(self.active_symbol)
+        return True
+
+    async def _on_candle_closed(self, event: dict) -> None:
+        if not self.strategy_active or self.eval_mode != 'event':
+            return
+        if event['symbol'] != self.active_symbol or \
+                event['interval'] != self.strategy_configs[self.active_strategy_name]['timeframe']:
+            return
+        key = (self.active_symbol, self.active_strategy_name)
+        if self._last_evaluated.get(key) == event['close_time']:
+            return
+        self._last_evaluated[key] = event['close_time']
+
+        had_position = self.position_open
+        await self._evaluate_strategy()
+        if self.position_open and not had_position:
+            now = time.time()
+            metrics.histogram('decision_latency').observe(now - event['received_at'])
+            metrics.histogram('kline_close_to_order').observe(now - event['close_time'] / 1000)
+
+    async def run_strategy(self):
+        self._log("Strateji döngüsü başladı.")
+        while self.strategy_active and self.running:
+            try:
+                if not await self._evaluate_strategy():
+                    self._log("Piyasa verisi alınamadı, bekleniyor...")
+                await self.check_positions()
+            except Exception as e:
+                self._log(f"Hata oluştu: {e}")
+            await asyncio.sleep(3)
+        self._log("Strateji döngüsü durduruldu.")
+
+    def start_strategy_loop(self):
+        self._record('control', {'method': 'start_strategy_loop', 'args': []})
+        if self.strategy_active:
+            return
+        self.strategy_active = True
+        if self.eval_mode == 'poll':
+            self.spawn(self.run_strategy(), service=True)
+        else:
+            self._get_signal_engine(self.active_symbol, self.active_strategy_name)
+            self._log("Strateji mum kapanışı olaylarıyla çalışıyor.")
+        if self.runner:
+            self.spawn(self.runner.start())
+
+    def get_metrics(self) -> dict:
+        result = super().get_metrics()
+        result["asyncio"] = {"tasks": len(self._tasks), "services": len(self._services),
+                             "streams": len(self._streams)}
+        return result
+
+    # --- Kapanış ---
+
+    async def stop_all(self):
+        """
+        Botu durdurur. Yeni iş kabul edilmez, akışlar kapanır; süren emir ve değerlendirmelerin
+        bitmesi `SHUTDOWN_GRACE` saniyeye kadar beklenir, kalanlar iptal edilir. Kapanış,
+        çağıran görev iptal edilse de tamamlanır; tekrar çağrılırsa aynı kapanışı bekler.
+        """
+        if self._stopping is None:
+            self._stopping = asyncio.ensure_future(self._shutdown())
+        await asyncio.shield(self._stopping)
+
+    async def _shutdown(self) -> None:
+        self.running = False
+        self.strategy_active = False
+        if self.runner:
+            self.runner.shutdown()
+        if self._user_socket:
+            self._close_stream(self._user_socket)
+            self._user_socket = None
+        for socket_name in self._mark_sockets.values():
+            self._close_stream(socket_name)
+        self._mark_sockets = {}
+        for handle in list(self._streams):
+            self._close_stream(handle)
+        if self.socket_manager is not None:
+            self.socket_manager.stop()
+
+        for task in list(self._services):
+            task.cancel()
+        if self._tasks:
+            _, pending = await asyncio.wait(list(self._tasks), timeout=SHUTDOWN_GRACE)
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*self._tasks, *self._services, return_exceptions=True)
+        await self.dispatcher.stop()
+
+        await asyncio.to_thread(self.trade_journal.stop)
+        if self.recorder:
+            await asyncio.to_thread(self.recorder.stop)
+        if self.client is not None:
+            await self.client.shutdown()
+        self._log("Bot durduruldu.")
@@ -0,0 +1,169 @@
+import argparse
+import time
+from typing import Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+import strategy as strategy_kadir_v2
+import strategy_scalper
+from config import load_strategy_configs
+from kline_buffer import COLUMNS
+from risk import exit_prices
+
+STRATEGIES = {'KadirV2': strategy_kadir_v2, 'Scalper': strategy_scalper}
+
+# Bir işlemin çıkışı aranırken ilk taranan mum sayısı (bulunamazsa ikiye katlanır)
+_SEARCH_CHUNK = 256
+
+
+def load_klines(path: str) -> pd.DataFrame:
+    """
+    CSV ya da Parquet dosyasından mum verisi yükler. Başlıksız Binance kline dökümleri
+    (open_time, open, high, low, close, volume, close_time, ...) de desteklenir.
+    """
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+        if 'open_time' not in df.columns:
+            df = pd.read_csv(path, header=None)
+            df = df.iloc[:, :len(COLUMNS)]
+            df.columns = COLUMNS
+    df = df[COLUMNS].astype(np.float64)
+    return df.sort_values('open_time').reset_index(drop=True)
+
+
+def simulate(df: pd.DataFrame, signals: np.ndarray, atr: np.ndarray, config: Dict[str, Any],
+             risk_mode: str = 'atr', fixed_roi_tp: float = 0.02, leverage: int = 10,
+             quantity_usd: float = 20.0, fee_rate: float = 0.0004) -> pd.DataFrame:
+    """
+    Sinyalleri tek pozisyon kuralıyla işler: i. mumda oluşan sinyal (i+1). mumun açılışında girer,
+    çıkış ilk SL/TP temasıdır (aynı mumda ikisi birden değerse SL varsayılır). Döngü mumlar
+    üzerinde değil işlemler üzerindedir; çıkış aramaları NumPy ile yapılır.
+    """
+    open_ = df['open'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    open_time = df['open_time'].to_numpy(dtype=np.int64)
+    n = len(df)
+
+    signal_idx = np.flatnonzero(signals[:n - 1] != 0)
+    notional = quantity_usd * leverage
+    trades = []
+    pos = 0
+    while pos < len(signal_idx):
+        i = signal_idx[pos]
+        entry_bar = i + 1
+        direction = int(signals[i])
+        entry = open_[entry_bar]
+        stop_loss, take_profit = exit_prices(direction, entry, atr[i], config, risk_mode, fixed_roi_tp, leverage)
+
+        exit_bar, exit_price, reason = n - 1, close[n - 1], 'end'
+        start, chunk = entry_bar, _SEARCH_CHUNK
+        while start < n:
+            end = min(n, start + chunk)
+            if direction == 1:
+                hit_sl = low[start:end] <= stop_loss
+                hit_tp = high[start:end] >= take_profit
+            else:
+                hit_sl = high[start:end] >= stop_loss
+                hit_tp = low[start:end] <= take_profit
+            hits = np.flatnonzero(hit_sl | hit_tp)
+            if len(hits):
+                k = hits[0]
+                exit_bar = start + k
+                # Boşluklu açılışlarda çıkış seviyeden değil açılış fiyatından gerçekleşir
+                gap_open = open_[exit_bar] if exit_bar > entry_bar else None
+                if hit_sl[k]:
+                    reason, exit_price = 'sl', stop_loss
+                    if gap_open is not None and direction * (gap_open - stop_loss) < 0:
+                        exit_price = gap_open
+                else:
+                    reason, exit_price = 'tp', take_profit
+                    if gap_open is not None and direction * (gap_open - take_profit) > 0:
+                        exit_price = gap_open
+                break
+            start, chunk = end, chunk * 2
+
+        pnl = notional * direction * (exit_price - entry) / entry - 2 * notional * fee_rate
+        trades.append((open_time[entry_bar], open_time[exit_bar], 'LONG' if direction == 1 else 'SHORT',
+                       entry, exit_price, stop_loss, take_profit, pnl, reason))
+        # Çıkış mumunun kapanışında oluşan sinyal bir sonraki işlem olabilir
+        pos = np.searchsorted(signal_idx, exit_bar)
+
+    return pd.DataFrame(trades, columns=['entry_time', 'exit_time', 'side', 'entry_price', 'exit_price',
+                                         'stop_loss', 'take_profit', 'pnl', 'reason'])
+
+
+def summarize(trades: pd.DataFrame) -> Dict[str, Any]:
+    """`database.calculate_stats` ile aynı anahtarlar, ek olarak düşüş ve kâr faktörü."""
+    if trades.empty:
+        return {"total_pnl": 0, "win_rate": 0, "total_trades": 0, "wins": 0, "losses": 0,
+                "max_drawdown": 0, "profit_factor": 0}
+    pnl = trades['pnl'].to_numpy()
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    wins = int((pnl > 0).sum())
+    gross_loss = -pnl[pnl < 0].sum()
+    return {
+        "total_pnl": float(equity[-1]),
+        "win_rate": wins / len(pnl) * 100,
+        "total_trades": len(pnl),
+        "wins": wins,
+        "losses": len(pnl) - wins,
+        "max_drawdown": float(drawdown.max()),
+        "profit_factor": float(pnl[pnl > 0].sum() / gross_loss) if gross_loss > 0 else float('inf'),
+    }
+
+
+def run_backtest(df: pd.DataFrame, strategy_name: str, config: Dict[str, Any],
+                 **sim_kwargs) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    signals, atr = STRATEGIES[strategy_name].get_signals(df, config)
+    trades = simulate(df, signals, atr, config, **sim_kwargs)
+    return summarize(trades), trades
+
+
+def verify_against_live(df: pd.DataFrame, strategy_name: str, config: Dict[str, Any]) -> np.ndarray:
+    """
+    Vektörel sinyalleri, canlı botun kullandığı `StreamingSignal` ile mum mum karşılaştırır.
+    Kararın ya da sinyal veren mumdaki ATR'nin farklı olduğu mum indekslerini döndürür.
+    """
+    module = STRATEGIES[strategy_name]
+    signals, atr = module.get_signals(df, config)
+    engine = module.StreamingSignal(config)
+    codes = {'LONG': 1, 'SHORT': -1, 'WAIT': 0}
+    mismatches = []
+    for i, row in enumerate(df[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False, name=None)):
+        signal, live_atr = engine.update(*row)
+        if codes[signal] != signals[i] or (signals[i] != 0 and live_atr != atr[i]):
+            mismatches.append(i)
+    return np.array(mismatches, dtype=np.int64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KadirV2 / Scalper geçmiş veri testi")
+    parser.add_argument("path", help="Kline CSV ya da Parquet dosyası")
+    parser.add_argument("--strategy", default="KadirV2", choices=list(STRATEGIES))
+    parser.add_argument("--risk-mode", default="atr")
+    parser.add_argument("--roi", type=float, default=2.0, help="Sabit ROI hedefi (%%)")
+    parser.add_argument("--leverage", type=int, default=10)
+    parser.add_argument("--quantity", type=float, default=20.0)
+    parser.add_argument("--fee", type=float, default=0.0004)
+    parser.add_argument("--verify", action="store_true", help="Canlı sinyal motoruyla mum mum karşılaştır")
+    args = parser.parse_args()
+
+    klines = load_klines(args.path)
+    strategy_config = load_strategy_configs()[args.strategy]
+    started = time.perf_counter()
+    stats, trade_log = run_backtest(klines, args.strategy, strategy_config, risk_mode=args.risk_mode,
+                                    fixed_roi_tp=args.roi / 100, leverage=args.leverage,
+                                    quantity_usd=args.quantity, fee_rate=args.fee)
+    elapsed = time.perf_counter() - started
+    print(f"{len(klines)} mum {elapsed:.2f} sn'de işlendi.")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    if args.verify:
+        mismatched = verify_against_live(klines, args.strategy, strategy_config)
+        print(f"Canlı motorla uyumsuz mum sayısı: {len(mismatched)}")
@@ -0,0 +1,102 @@
+import time
+from typing import Dict, Any, List, Callable, Iterator, Optional
+
+import numpy as np
+
+from sim_exchange import START_MS, synthetic_klines  # noqa: F401 (benchmarklar buradan kullanır)
+
+
+def rest_klines(rows: np.ndarray) -> List[List[Any]]:
+    """Diziyi REST `futures_klines` yanıt biçimine çevirir."""
+    return [[int(r[0]), str(r[1]), str(r[2]), str(r[3]), str(r[4]), str(r[5]), int(r[6])] for r in rows]
+
+
+def kline_messages(rows: np.ndarray, symbol: str = 'BTCUSDT', interval: str = '1m',
+                   ticks_per_candle: int = 10, seed: int = 7) -> Iterator[Dict[str, Any]]:
+    """
+    Her mum için `ticks_per_candle` adet websocket kline mesajı üretir; sonuncusu kapanıştır.
+    Ara mesajlarda kapanış fiyatı açılıştan kapanışa doğru ilerler.
+    """
+    rng = np.random.default_rng(seed)
+    for r in rows:
+        open_time, open_, high, low, close, volume, close_time = r
+        path = np.linspace(open_, close, ticks_per_candle) + rng.normal(0, 1e-6, ticks_per_candle)
+        for i in range(ticks_per_candle):
+            last = i == ticks_per_candle - 1
+            price = close if last else path[i]
+            yield {
+                'e': 'kline', 'E': int(close_time) if last else int(open_time) + i, 's': symbol,
+                'k': {
+                    't': int(open_time), 'T': int(close_time), 's': symbol, 'i': interval,
+                    'o': str(open_), 'h': str(high if last else max(open_, price)),
+                    'l': str(low if last else min(open_, price)), 'c': str(price),
+                    'v': str(volume * (i + 1) / ticks_per_candle), 'x': last,
+                },
+            }
+
+
+class FakeClient:
+    """Ağ kullanmayan, sabit yanıtlar dönen REST istemcisi."""
+
+    def __init__(self, klines: Optional[np.ndarray] = None, balance: float = 1000.0) -> None:
+        self.klines = synthetic_klines(500) if klines is None else klines
+        self.balance = balance
+        self.orders = 0
+
+    def futures_klines(self, symbol: str, interval: str, limit: int = 500, startTime: Optional[int] = None,
+                       endTime: Optional[int] = None, **params) -> List[List[Any]]:
+        rows = self.klines
+        if startTime is not None:
+            rows = rows[rows[:, 0] >= startTime]
+            if endTime is not None:
+                rows = rows[rows[:, 0] <= endTime]
+            return rest_klines(rows[:limit])
+        if endTime is not None:
+            rows = rows[rows[:, 0] <= endTime]
+        return rest_klines(rows[-limit:])
+
+    def futures_account(self, **params) -> Dict[str, Any]:
+        return {'assets': [{'asset': 'USDT', 'walletBalance': str(self.balance), 'updateTime': 0}]}
+
+    def futures_position_information(self, **params) -> List[Dict[str, Any]]:
+        return []
+
+    def futures_get_open_orders(self, **params) -> List[Dict[str, Any]]:
+        return []
+
+    def futures_create_order(self, **params) -> Dict[str, Any]:
+        self.orders += 1
+        return {'orderId': self.orders, 'side': params.get('side'), 'origQty': str(params.get('quantity')),
+                'updateTime': int(time.time() * 1000)}
+
+
+class FakeSocketManager:
+    """Geri çağrıları kaydeden, mesajları `feed` ile elle ileten soket yöneticisi."""
+
+    def __init__(self) -> None:
+        self.callbacks: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+    def _register(self, name: str, callback: Callable) -> str:
+        self.callbacks[name] = callback
+        return name
+
+    def start(self) -> None:
+        pass
+
+    def start_kline_socket(self, callback: Callable, symbol: str, interval: str) -> str:
+        return self._register(f"{symbol.lower()}@kline_{interval}", callback)
+
+    def start_futures_multiplex_socket(self, callback: Callable, streams: List[str]) -> str:
+        return self._register('multiplex:' + ','.join(streams), callback)
+
+    def start_symbol_mark_price_socket(self, callback: Callable, symbol: str, **params) -> str:
+        return self._register(f"{symbol.lower()}@markPrice", callback)
+
+    def start_futures_user_socket(self, callback: Callable) -> str:
+        return self._register('user', callback)
+
+    def stop_socket(self, name: str) -> None:
+        self.callbacks.pop(name, None)
+
+    def feed(self, name: str, message: Dict[str, Any]) -> None:
+        self.callbacks[name](message)
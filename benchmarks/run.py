@@ -0,0 +1,377 @@
+"""
+Sinyal ve veri yolları için çevrimdışı benchmark aracı.
+
+    python -m benchmarks.run                      # tümünü çalıştır, varsa baseline ile karşılaştır
+    python -m benchmarks.run --only streaming     # adı 'streaming' içerenler
+    python -m benchmarks.run --save-baseline      # sonuçları benchmarks/baseline.json'a yaz
+    python -m benchmarks.run --trade-sizes 10000  # istatistik testlerini küçük veriyle çalıştır
+
+Tüm veriler sabit tohumlu sentetik üreticilerden gelir; ağ, API anahtarı ya da PostgreSQL
+gerekmez (istatistikler geçici bir SQLite dosyasıyla ölçülür). Baseline'a göre p50 gecikmesi
+ya da işlem hızı `--threshold` oranından fazla kötüleşen testler gerileme olarak işaretlenir
+ve çıkış kodu 1 olur.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+from typing import Dict, Any, Callable, List, Optional
+
+# Veritabanı modülü içe aktarılırken bağlantı adresini okur; gerçek veritabanına dokunulmaması
+# için repo modüllerinden önce geçici bir SQLite dosyasına yönlendir
+_DB_DIR = tempfile.mkdtemp(prefix="bench-db-")
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+# Tamponlar her çalıştırmada sahte istemciden doldurulsun; yerel kline deposu kullanılmaz
+os.environ['KLINE_STORE_DIR'] = ''
+os.environ['TRADE_JOURNAL_PATH'] = os.path.join(_DB_DIR, 'journal.ndjson')
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fakes import synthetic_klines, kline_messages, FakeClient, FakeSocketManager
+from config import load_strategy_configs
+from kline_buffer import COLUMNS, OPEN, HIGH, LOW, CLOSE, VOLUME
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def measure(func: Callable[[], Any], iterations: int, warmup: int = 10,
+            ops_per_call: int = 1, alloc_iterations: int = 50) -> Dict[str, float]:
+    """`func`'ı tek tek zamanlayıp gecikme dağılımı, işlem hızı ve çağrı başına bellek ayırma ölçer."""
+    for _ in range(warmup):
+        func()
+    samples = np.empty(iterations, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        started = clock()
+        func()
+        samples[i] = clock() - started
+
+    # Bellek ölçümü zamanlamayı bozmaması için ayrı bir turda yapılır
+    alloc_iterations = min(alloc_iterations, iterations)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(alloc_iterations):
+        func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_seconds = samples.sum() / 1e9
+    return {
+        "iterations": iterations,
+        "mean_us": float(samples.mean() / 1e3),
+        "p50_us": float(np.percentile(samples, 50) / 1e3),
+        "p95_us": float(np.percentile(samples, 95) / 1e3),
+        "p99_us": float(np.percentile(samples, 99) / 1e3),
+        "ops_per_sec": float(iterations * ops_per_call / total_seconds) if total_seconds else 0.0,
+        "peak_alloc_kib": float(max(0, peak - before) / 1024),
+        "retained_kib_per_call": float(max(0, after - before) / 1024 / alloc_iterations),
+    }
+
+
+# --- Strateji sinyalleri ---
+
+def _frame(rows: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def bench_get_signal(name: str, iterations: int) -> Dict[str, float]:
+    """Canlı tampondan çağrılan pandas_ta tabanlı `get_signal` (500 mum)."""
+    import strategy as strategy_kadir_v2
+    import strategy_scalper
+    module = strategy_scalper if name == 'Scalper' else strategy_kadir_v2
+    config = load_strategy_configs()[name]
+    df = _frame(synthetic_klines(500))
+    return measure(lambda: module.get_signal(df, config), iterations)
+
+
+def bench_streaming(name: str, iterations: int) -> Dict[str, float]:
+    """Kapanan her mumda çağrılan `StreamingSignal.update` (sinyal/sn)."""
+    import strategy as strategy_kadir_v2
+    import strategy_scalper
+    module = strategy_scalper if name == 'Scalper' else strategy_kadir_v2
+    engine = module.StreamingSignal(load_strategy_configs()[name])
+    rows = synthetic_klines(iterations + 100)
+    position = iter(range(len(rows)))
+
+    def step():
+        r = rows[next(position)]
+        engine.update(r[OPEN], r[HIGH], r[LOW], r[CLOSE], r[VOLUME])
+    return measure(step, iterations, warmup=50)
+
+
+def bench_vectorized(name: str, candles: int) -> Dict[str, float]:
+    """Backtest yolunun vektörel `get_signals` hesabı (mum/sn)."""
+    import strategy as strategy_kadir_v2
+    import strategy_scalper
+    module = strategy_scalper if name == 'Scalper' else strategy_kadir_v2
+    config = load_strategy_configs()[name]
+    df = _frame(synthetic_klines(candles))
+    return measure(lambda: module.get_signals(df, config), iterations=10, warmup=1,
+                   ops_per_call=candles, alloc_iterations=2)
+
+
+# --- Kline mesaj işleyicisi ---
+
+def _make_bot(client: FakeClient, socket_manager: FakeSocketManager):
+    """
+    `_start_kline_socket` işleyicisinin ihtiyaç duyduğu durumla, ağ bağlantısı kurmadan bir
+    `TradingBot` örneği hazırlar (arka plan iş parçacıkları başlatılmaz).
+    """
+    from trading_bot import TradingBot
+    from events import EventDispatcher
+
+    os.environ.setdefault('BINANCE_API_KEY', 'bench')
+    os.environ.setdefault('BINANCE_API_SECRET', 'bench')
+    bot = TradingBot.__new__(TradingBot)
+    bot._load_config_from_env()
+    bot.client = client
+    bot.socket_manager = socket_manager
+    bot.recorder = None
+    bot.ui_update_callback = None
+    bot.kline_buffers = {}
+    bot.signal_engines = {}
+    bot._engine_lock = threading.Lock()
+    bot._last_kline_push = {}
+    # Yayınlanan olaylar kuyrukta birikir; tüketici başlatılmaz, dolunca düşürülür
+    bot.dispatcher = EventDispatcher(maxsize=1_000_000)
+    return bot
+
+
+def bench_kline_handler(iterations: int, ticks_per_candle: int = 10) -> Dict[str, float]:
+    """Websocket kline mesajı başına işleyici süresi (tick/sn); kapanışlarda sinyal motoru da güncellenir."""
+    client, socket_manager = FakeClient(), FakeSocketManager()
+    bot = _make_bot(client, socket_manager)
+    symbol, strategy_name = 'BTCUSDT', bot.active_strategy_name
+    interval = bot.strategy_configs[strategy_name]['timeframe']
+    client.klines = synthetic_klines(bot.kline_buffer_size, interval=interval)
+    bot.active_symbol = symbol
+    bot._start_kline_socket(symbol, interval)
+    bot._get_signal_engine(symbol, strategy_name)
+
+    candles = iterations // ticks_per_candle + 10
+    last_close = int(client.klines[-1, 0])
+    rows = synthetic_klines(candles, interval=interval, seed=3,
+                            start_ms=last_close + (int(client.klines[1, 0]) - int(client.klines[0, 0])))
+    messages = iter(list(kline_messages(rows, symbol, interval, ticks_per_candle)))
+    callback = socket_manager.callbacks[f"{symbol.lower()}@kline_{interval}"]
+    return measure(lambda: callback(next(messages)), iterations, warmup=ticks_per_candle,
+                   alloc_iterations=ticks_per_candle * 5)
+
+
+def bench_paper_pipeline(candles: int) -> Dict[str, float]:
+    """
+    Simüle borsa üzerinde tam bot (kline işleyici → sinyal → emir → kullanıcı akışı) ile uçtan
+    uca işlem hızı; `candles` temel mum beklemeden oynatılır (tik/sn).
+    """
+    from config import load_paper_config
+    from sim_exchange import create_paper_exchange
+    from trading_bot import TradingBot
+
+    os.environ['TRADING_MODE'] = 'paper'
+    # Bot simüle borsadaki sembolde işlem yapmalı; aksi halde oynatma abonesiz ölçülür
+    symbol = 'BTCUSDT'
+    os.environ['TRADING_SYMBOL'] = symbol
+    os.environ['TRADING_RUNNER_SLOTS'] = ''
+    config = {**load_paper_config(), 'speed': 0, 'candles': candles, 'seed': 42}
+    bot_config = load_strategy_configs()
+    intervals = sorted({c['timeframe'] for c in bot_config.values()})
+    exchange, replay = create_paper_exchange([symbol], intervals, warmup_candles=500, config=config,
+                                             log=lambda message: None)
+    replay.autostart = False
+    bot = TradingBot(client=exchange, socket_manager=replay)
+    bot.start_strategy_loop()
+    # Uçtan uca hız bellek izlemesi olmadan ölçülür (tracemalloc hızı yarıya düşürür)
+    try:
+        replay.run()
+    finally:
+        bot.stop_all()
+    if not exchange.fills:
+        raise RuntimeError("Uçtan uca benchmark hiç emir doldurmadı; bot oynatılan akışlara abone değil.")
+    seconds = replay.wall_seconds
+    per_tick_us = seconds / max(1, replay.ticks) * 1e6
+    return {
+        "iterations": replay.ticks, "mean_us": per_tick_us, "p50_us": per_tick_us, "p95_us": per_tick_us,
+        "p99_us": per_tick_us, "ops_per_sec": replay.ticks / seconds if seconds else 0.0,
+        "peak_alloc_kib": 0.0, "retained_kib_per_call": 0.0, "fills": len(exchange.fills),
+    }
+
+
+def bench_optimizer(workers: int, candles: int = 20000) -> Dict[str, float]:
+    """
+    `optimizer.optimize` ile 24 kombinasyonluk ızgaranın kombinasyon/sn hızı. Tek işçi ve tüm
+    çekirdeklerle ölçülür; oran çekirdek ölçeklenmesini gösterir.
+    """
+    import optimizer
+    df = _frame(synthetic_klines(candles, seed=5))
+    space = {'ema_length_fast': [5, 9, 12, 15], 'ema_length_slow': [21, 30, 50], 'rsi_length': [7, 14]}
+    started = time.perf_counter()
+    table = optimizer.optimize(df, 'KadirV2', space, workers=workers)
+    seconds = time.perf_counter() - started
+    per_combo_us = seconds / max(1, len(table)) * 1e6
+    return {
+        "iterations": len(table), "mean_us": per_combo_us, "p50_us": per_combo_us, "p95_us": per_combo_us,
+        "p99_us": per_combo_us, "ops_per_sec": len(table) / seconds if seconds else 0.0,
+        "peak_alloc_kib": 0.0, "retained_kib_per_call": 0.0, "workers": workers,
+    }
+
+
+# --- Veritabanı istatistikleri ---
+
+def _fill_trades(database, target: int, batch: int = 1000, seed: int = 11) -> None:
+    """Tablodaki işlem sayısını `target`'a tamamlar."""
+    existing = database.calculate_stats()['total_trades']
+    rng = np.random.default_rng(seed + existing)
+    symbols = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'SOLUSDT', 'BNBUSDT']
+    strategies = ['KadirV2', 'Scalper', None]
+    for start in range(existing, target, batch):
+        count = min(batch, target - start)
+        pnl = rng.normal(0.1, 2.0, count)
+        trades = [{
+            'symbol': symbols[(start + i) % len(symbols)], 'id': start + i + 1,
+            'side': 'LONG' if i % 2 else 'SHORT', 'realizedPnl': float(pnl[i]),
+            'time': 1_704_067_200_000 + (start + i) * 60_000, 'strategy': strategies[(start + i) % 3],
+        } for i in range(count)]
+        if not database.add_trades(trades):
+            raise RuntimeError("Benchmark veritabanına yazılamadı.")
+
+
+def bench_stats(sizes: List[int], iterations: int) -> Dict[str, Dict[str, float]]:
+    """`calculate_stats` (soğuk: SQL özet sorgusu, sıcak: bellek önbelleği) ve ilk geçmiş sayfası."""
+    import database
+    results = {}
+    for size in sorted(sizes):
+        started = time.perf_counter()
+        _fill_trades(database, size)
+        print(f"  {size} işlem hazırlandı ({time.perf_counter() - started:.1f} sn)", file=sys.stderr)
+
+        def cold():
+            database.stats_cache.invalidate()
+            database.calculate_stats()
+        results[f"calculate_stats_cold[{size}]"] = measure(cold, iterations)
+        results[f"calculate_stats_warm[{size}]"] = measure(database.calculate_stats, iterations * 10)
+        results[f"get_trades_page[{size}]"] = measure(lambda: database.get_trades_page(limit=50), iterations)
+    return results
+
+
+# --- Çalıştırma ve karşılaştırma ---
+
+def run_all(only: Optional[str], trade_sizes: List[int], scale: float) -> Dict[str, Dict[str, float]]:
+    def n(count: int) -> int:
+        return max(20, int(count * scale))
+
+    suites: List[tuple] = [
+        ("get_signal[KadirV2]", lambda: bench_get_signal('KadirV2', n(200))),
+        ("get_signal[Scalper]", lambda: bench_get_signal('Scalper', n(200))),
+        ("streaming_update[KadirV2]", lambda: bench_streaming('KadirV2', n(20000))),
+        ("streaming_update[Scalper]", lambda: bench_streaming('Scalper', n(20000))),
+        ("get_signals_vectorized[KadirV2]", lambda: bench_vectorized('KadirV2', n(100000))),
+        ("get_signals_vectorized[Scalper]", lambda: bench_vectorized('Scalper', n(100000))),
+        ("kline_handler", lambda: bench_kline_handler(n(20000))),
+        ("paper_pipeline", lambda: bench_paper_pipeline(n(20000))),
+        ("optimizer[workers=1]", lambda: bench_optimizer(1)),
+        ("optimizer[all_cores]", lambda: bench_optimizer(os.cpu_count() or 1)),
+    ]
+    results: Dict[str, Dict[str, float]] = {}
+    for name, func in suites:
+        if only and only not in name:
+            continue
+        print(f"{name} ...", file=sys.stderr)
+        try:
+            results[name] = func()
+        except ImportError as e:
+            print(f"  atlandı (eksik bağımlılık: {e})", file=sys.stderr)
+    if trade_sizes and (not only or only in 'calculate_stats get_trades_page'):
+        print("calculate_stats ...", file=sys.stderr)
+        results.update(bench_stats(trade_sizes, n(50)))
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Baseline'a göre p50 gecikmesi ya da işlem hızı eşikten fazla kötüleşen testleri döndürür."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        slower = current['p50_us'] > previous['p50_us'] * (1 + threshold)
+        lower_throughput = current['ops_per_sec'] < previous['ops_per_sec'] * (1 - threshold)
+        if slower or lower_throughput:
+            regressions.append(
+                f"{name}: p50 {previous['p50_us']:.1f} → {current['p50_us']:.1f} µs, "
+                f"hız {previous['ops_per_sec']:.0f} → {current['ops_per_sec']:.0f} /sn"
+            )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'benchmark':<40} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} {'ops/sn':>14} {'tepe KiB':>10}")
+    for name, r in results.items():
+        print(f"{name:<40} {r['p50_us']:>10.1f} {r['p95_us']:>10.1f} {r['p99_us']:>10.1f} "
+              f"{r['ops_per_sec']:>14.0f} {r['peak_alloc_kib']:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sinyal ve veri yolu benchmarkları")
+    parser.add_argument('--only', help="Yalnızca adında bu metin geçen testler")
+    parser.add_argument('--trade-sizes', default='10000,100000,1000000',
+                        help="İstatistik testleri için işlem sayıları (boş: atla)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Tekrar sayılarını ölçekler")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Sonuçları baseline olarak kaydet")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Gerileme eşiği (0.2 = %%20)")
+    parser.add_argument('--output', help="Sonuçları ayrıca bu JSON dosyasına yaz")
+    args = parser.parse_args()
+
+    trade_sizes = [int(s) for s in args.trade_sizes.split(',') if s.strip()]
+    results = run_all(args.only, trade_sizes, args.scale)
+    print_table(results)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(), "platform": platform.platform(),
+            "numpy": np.__version__, "pandas": pd.__version__, "created_at": int(time.time()),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {"meta": report["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Yalnızca bu çalıştırmada ölçülen testlerin baseline'ı güncellenir
+        baseline["meta"] = report["meta"]
+        baseline["results"].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline kaydedildi: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Baseline bulunamadı; karşılaştırma yapılmadı (--save-baseline ile oluşturun).")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nGERİLEME:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nBaseline'a göre gerileme yok.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+import os
+import json
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Set
+
+import metrics
+from recorder import CONTROL_METHODS
+
+# Web işçilerinin bot sürecinde çağırabileceği metotlar
+COMMANDS = CONTROL_METHODS | frozenset(('get_settings', 'get_metrics'))
+# Botun değil sunucunun yanıtladığı komut: bot sürecinin ölçüm kaydı Prometheus metni olarak
+# döner (process="bot" etiketiyle); bot henüz hazır olmasa da çalışır
+METRICS_COMMAND = 'render_metrics'
+# Satır uzunluğu sınırı; ölçüm yanıtları varsayılan 64 KB'ı aşabilir
+LINE_LIMIT = 16 << 20
+
+
+class BotUnavailableError(ConnectionError):
+    """Bot sürecine bağlı değilken ya da bot henüz hazır değilken verilen komutlar için."""
+
+
+class BotCommandError(RuntimeError):
+    """Komut bot sürecinde hata verdi."""
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+class _Connection:
+    """
+    Bot sürecine bağlı tek bir web işçisi. Olaylar sınırlı bir kuyrukta bekler ve dolunca en
+    eskisi düşürülür; komut yanıtları ayrı, sınırsız bir kuyruktan önce yazılır ve hiç düşürülmez
+    (yanıtı kaybolan komut web tarafında zaman aşımına uğrar, oysa bot onu çalıştırmıştır).
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int) -> None:
+        self.writer = writer
+        self.max_pending = max_pending
+        self._queue: deque = deque()
+        self._replies: deque = deque()
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, line: bytes) -> None:
+        if len(self._queue) >= self.max_pending:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(line)
+        self._ready.set()
+
+    def reply(self, line: bytes) -> None:
+        self._replies.append(line)
+        self._ready.set()
+
+    async def drain_forever(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            lines = list(self._replies) + list(self._queue)
+            self._replies.clear()
+            self._queue.clear()
+            self.writer.write(b''.join(lines))
+            await self.writer.drain()
+            self.sent += len(lines)
+
+
+class BotServer:
+    """
+    Bot sürecinde çalışan Unix soketi sunucusu. Her bağlantı bir web işçisidir ve satır başına
+    bir JSON mesajı kullanılır:
+
+        → {"id": 1, "cmd": "set_leverage", "args": [20, "BTCUSDT"]}
+        ← {"id": 1, "ok": true, "result": null}
+        ← {"event": "position_update", "data": {...}}
+
+    `publish` botun arayüz geri çağrısıdır; her iş parçacığından çağrılabilir ve beklemez. Olay
+    bir kez serileştirilip tüm bağlantıların kuyruğuna konur; yavaş bir web işçisi botu ya da
+    diğer işçileri bekletmez. `run_in_thread` açıkken (iş parçacıklı TradingBot) senkron
+    komutlar olay döngüsünü bekletmemek için ayrı iş parçacığında çalıştırılır; asyncio
+    botunda döngü içinde çağrılır.
+    """
+
+    def __init__(self, path: str, max_pending: int = 4096, run_in_thread: bool = True,
+                 log: Callable[[str], None] = print) -> None:
+        self.path = path
+        self.max_pending = max_pending
+        self.run_in_thread = run_in_thread
+        self._log = log
+        self.bot = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[_Connection] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.commands = 0
+        self.published = 0
+        self.dropped_no_clients = 0
+
+    async def start(self) -> None:
+        """
+        Soketi açar. Yolda yanıt veren bir soket varsa başka bir bot süreci çalışıyordur ve
+        aynı hesapta ikinci bir botun emir vermemesi için başlatma reddedilir.
+        """
+        self.loop = asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                writer.close()
+                raise RuntimeError(f"{self.path} üzerinde çalışan başka bir bot süreci var.")
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=LINE_LIMIT)
+        # Komutlar emir verebilir; soket yalnızca aynı kullanıcıya açıktır
+        os.chmod(self.path, 0o600)
+        metrics.register_gauge('ipc_connections', lambda: len(self._connections))
+
+    def publish(self, message_type: str, data: Any) -> None:
+        """`TradingBot` arayüz geri çağrısı."""
+        self.published += 1
+        loop = self.loop
+        if not self._connections or loop is None or loop.is_closed():
+            self.dropped_no_clients += 1
+            return
+        loop.call_soon_threadsafe(self._fanout, _encode({'event': message_type, 'data': data}))
+
+    def _fanout(self, line: bytes) -> None:
+        for connection in self._connections:
+            connection.offer(line)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(writer, self.max_pending)
+        self._connections.add(connection)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        sender = asyncio.create_task(connection.drain_forever())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self._log("Bot soketine geçersiz mesaj geldi, yok sayıldı.")
+                    continue
+                # Uzun süren komutlar (örn. tarayıcı) aynı işçinin sonraki komutlarını bekletmesin
+                task = asyncio.create_task(self._respond(connection, request))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            self._handlers.discard(handler)
+            sender.cancel()
+            writer.close()
+
+    async def _respond(self, connection: _Connection, request: Dict[str, Any]) -> None:
+        try:
+            result = await self._execute(request.get('cmd'), request.get('args', []))
+            response = {'id': request.get('id'), 'ok': True, 'result': result}
+        except BotUnavailableError as e:
+            response = {'id': request.get('id'), 'ok': False, 'error': str(e), 'unavailable': True}
+        except Exception as e:
+            response = {'id': request.get('id'), 'ok': False, 'error': str(e)}
+        connection.reply(_encode(response))
+
+    async def _execute(self, cmd: str, args: list) -> Any:
+        if cmd == METRICS_COMMAND:
+            return metrics.render_prometheus(process='bot')
+        if cmd not in COMMANDS:
+            raise ValueError(f"Bilinmeyen komut: {cmd}")
+        if self.bot is None:
+            raise BotUnavailableError("Bot başlatılıyor.")
+        self.commands += 1
+        method = getattr(self.bot, cmd)
+        if asyncio.iscoroutinefunction(method):
+            return await method(*args)
+        if self.run_in_thread:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for task in list(self._tasks):
+            task.cancel()
+        # Bağlantılar kapatılınca okuyucular dosya sonunu görür ve işleyiciler kendiliğinden biter
+        handlers = list(self._handlers)
+        for connection in list(self._connections):
+            connection.writer.close()
+        if handlers:
+            await asyncio.wait(handlers, timeout=5)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(self._connections)
+        return {
+            "connections": len(connections),
+            "commands": self.commands,
+            "published": self.published,
+            "sent": sum(c.sent for c in connections),
+            "dropped": sum(c.dropped for c in connections),
+            "max_pending": max((len(c._queue) for c in connections), default=0),
+            "pending_replies": sum(len(c._replies) for c in connections),
+        }
+
+
+class BotClient:
+    """
+    Web işçisinde bot sürecine bağlanan istemci. Bağlantı koparsa artan aralıklarla yeniden
+    kurulur; bu sırada verilen komutlar `BotUnavailableError` ile hemen başarısız olur. Gelen
+    olaylar `on_event(tip, veri)` ile iletilir (örn. `Broadcaster.publish`).
+    """
+
+    def __init__(self, path: str, on_event: Callable[[str, Any], None], timeout: float = 15.0,
+                 log: Callable[[str], None] = print) -> None:
+        self.path = path
+        self.on_event = on_event
+        self.timeout = timeout
+        self._log = log
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self.connected = asyncio.Event()
+        self.events = 0
+        self.reconnects = 0
+        self.timeouts = 0
+
+    def start(self) -> None:
+        """Olay döngüsü içinde çağrılmalıdır; bağlantı arka planda kurulur."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        delay = 0.2
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+            delay = 0.2
+            self.connected.set()
+            self._log(f"Bot sürecine bağlanıldı ({self.path}).")
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._dispatch(json.loads(line))
+            except (ConnectionError, ValueError) as e:
+                self._log(f"Bot soketi okunurken hata: {e}")
+            finally:
+                self.connected.clear()
+                self._writer.close()
+                self._writer = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(BotUnavailableError("Bot süreciyle bağlantı koptu."))
+                self._pending.clear()
+            self.reconnects += 1
+            self._log("Bot süreciyle bağlantı koptu, yeniden bağlanılıyor.")
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        if 'event' in message:
+            self.events += 1
+            self.on_event(message['event'], message.get('data'))
+            return
+        future = self._pending.pop(message.get('id'), None)
+        if future is None or future.done():
+            return
+        if message.get('ok'):
+            future.set_result(message.get('result'))
+        elif message.get('unavailable'):
+            future.set_exception(BotUnavailableError(message.get('error')))
+        else:
+            future.set_exception(BotCommandError(message.get('error')))
+
+    async def call(self, cmd: str, *args) -> Any:
+        """
+        Komutu bot sürecinde çalıştırır ve sonucunu döndürür. Yanıt `timeout` içinde gelmezse
+        `BotUnavailableError` yükseltilir; komutun bot tarafında çalışıp çalışmadığı bilinmez.
+        """
+        if self._writer is None:
+            raise BotUnavailableError("Bot sürecine bağlı değil.")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(_encode({'id': request_id, 'cmd': cmd, 'args': list(args)}))
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise BotUnavailableError(f"Bot süreci {self.timeout:g} sn içinde yanıt vermedi ({cmd}).")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": self.connected.is_set(), "pending": len(self._pending),
+                "events": self.events, "reconnects": self.reconnects, "timeouts": self.timeouts}
+
+
+class RemoteBot:
+    """
+    Web işçilerinde bot nesnesinin yerini alan vekil (BOT_MODE=remote). `COMMANDS` içindeki
+    metotlar bot sürecinde çalıştırılan eş yordamlardır; `main_web.call_bot` ve
+    `run_in_background` bunları asyncio botu gibi kullanır.
+    """
+
+    def __init__(self, client: BotClient) -> None:
+        self.client = client
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __getattr__(self, name: str):
+        if name not in COMMANDS:
+            raise AttributeError(name)
+
+        async def command(*args):
+            return await self.client.call(name, *args)
+        command.__name__ = name
+        return command
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        result = await self.client.call('get_metrics')
+        result["ipc"] = self.client.stats()
+        return result
+
+    async def render_metrics(self) -> str:
+        """Bot sürecinin ölçümlerini Prometheus metin biçiminde döndürür."""
+        return await self.client.call(METRICS_COMMAND)
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Yanıtı beklenmeyen komutları (manuel işlem, acil kapatma) arka planda gönderir."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Bot komutu başarısız: {task.exception()}")
+
+    async def close(self) -> None:
+        await self.client.close()
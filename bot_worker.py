@@ -0,0 +1,56 @@
+"""
+Botu web sunucusundan ayrı, tek bir süreçte çalıştırır (BOT_MODE=remote ile birlikte kullanılır).
+Web işçileri komutları bu sürecin Unix soketinden gönderir ve bot olaylarını aynı soketten alır;
+böylece web katmanı birden çok işçiye çoğaltılsa da emir veren tek bir bot olur.
+
+    python bot_worker.py
+"""
+import os
+import signal
+import asyncio
+
+import database
+from bot_ipc import BotServer
+from config import load_ipc_config
+
+BOT_RUNTIME = os.environ.get("BOT_RUNTIME", "thread").lower()
+
+
+async def main() -> None:
+    ipc = load_ipc_config()
+    # Soket önce açılır: aynı yolda çalışan bir bot varsa ikinci bot hiç kurulmaz
+    server = BotServer(ipc['path'], max_pending=ipc['max_pending'], run_in_thread=BOT_RUNTIME != "asyncio")
+    await server.start()
+    print(f"Bot soketi dinleniyor: {ipc['path']}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    bot = None
+    try:
+        await asyncio.to_thread(database.ensure_schema)
+        if BOT_RUNTIME == "asyncio":
+            from async_bot import AsyncTradingBot
+            bot = AsyncTradingBot(ui_update_callback=server.publish)
+            await bot.start()
+        else:
+            from trading_bot import TradingBot
+            bot = await asyncio.to_thread(TradingBot, ui_update_callback=server.publish)
+        server.bot = bot
+        print("Bot hazır, komutlar kabul ediliyor.")
+        await stop.wait()
+    finally:
+        print("Bot süreci kapatılıyor...")
+        if bot is not None:
+            if asyncio.iscoroutinefunction(bot.stop_all):
+                await bot.stop_all()
+            else:
+                await asyncio.to_thread(bot.stop_all)
+        await server.stop()
+        await asyncio.to_thread(database.close_pool)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from binance.enums import SIDE_BUY, SIDE_SELL
+
+from risk import exit_prices
+from symbol_filters import SymbolFilters
+
+STOP_LOSS = 'STOP_MARKET'
+TAKE_PROFIT = 'TAKE_PROFIT_MARKET'
+# Kayda eklenmeden önce dolan reduce-only emirler için hatırlanan en fazla emir numarası
+RECENT_FILLS = 256
+
+
+def bracket_orders(symbol: str, signal: str, quantity: float, entry_price: float, atr: float,
+                   config: Dict[str, Any], filters: SymbolFilters, risk_mode: str = 'atr',
+                   fixed_roi_tp: float = 0.02, leverage: int = 10) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    """
+    Açılan pozisyon için reduce-only zarar durdur ve kâr al emirlerini `futures_place_batch_order`
+    biçiminde (tüm değerler metin) hazırlar. Seviyeler backtest ile aynı `risk.exit_prices`
+    kuralıyla hesaplanıp fiyat adımına yuvarlanır. Emirler verilemeyecekse ([], neden) döner.
+    """
+    if not atr or atr <= 0:
+        return [], "ATR değeri yok"
+    direction = 1 if signal == "LONG" else -1
+    stop_loss, take_profit = exit_prices(direction, entry_price, atr, config, risk_mode, fixed_roi_tp, leverage)
+    stop_loss, take_profit = filters.round_price(stop_loss), filters.round_price(take_profit)
+    if stop_loss <= 0 or direction * (entry_price - stop_loss) <= 0 or direction * (take_profit - entry_price) <= 0:
+        return [], f"geçersiz seviyeler (SL {stop_loss}, TP {take_profit})"
+    orders = []
+    for order_type, stop_price in ((STOP_LOSS, stop_loss), (TAKE_PROFIT, take_profit)):
+        error = filters.validate(quantity, entry_price, reduce_only=True, stop_price=stop_price)
+        if error is not None:
+            return [], f"{error[1]} ({error[0]})"
+        orders.append({
+            'symbol': symbol,
+            'side': SIDE_SELL if direction == 1 else SIDE_BUY,
+            'type': order_type,
+            'quantity': f"{quantity:.{filters.quantity_decimals}f}",
+            'stopPrice': f"{stop_price:.{filters.price_decimals}f}",
+            'reduceOnly': 'true',
+            'workingType': 'MARK_PRICE',
+        })
+    return orders, None
+
+
+class Bracket:
+    """Bir pozisyonun borsada bekleyen zarar durdur / kâr al emir çifti."""
+
+    def __init__(self, symbol: str, stop_loss_id: Optional[int], take_profit_id: Optional[int],
+                 on_close: Optional[Callable[[], None]] = None) -> None:
+        self.symbol = symbol
+        self.stop_loss_id = stop_loss_id
+        self.take_profit_id = take_profit_id
+        self.on_close = on_close
+        self.opened_at = time.time()
+
+    @property
+    def order_ids(self) -> List[int]:
+        return [order_id for order_id in (self.stop_loss_id, self.take_profit_id) if order_id is not None]
+
+    def sibling(self, order_id: int) -> Optional[int]:
+        return self.take_profit_id if order_id == self.stop_loss_id else self.stop_loss_id
+
+
+class BracketBook:
+    """
+    Bekleyen koruma emirlerinin kaydı. Kullanıcı akışındaki ORDER_TRADE_UPDATE olaylarıyla
+    (`AccountStore.on_order_update`) beslenir: bacaklardan biri dolunca çift kayıttan çıkarılır
+    ve iptal edilecek diğer bacak döndürülür. Borsaya çağrı yapmaz; iptali bot gerçekleştirir.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_order: Dict[int, Bracket] = {}
+        self._by_symbol: Dict[str, List[Bracket]] = {}
+        # Toplu emir yanıtı gelmeden dolan bacaklar (kullanıcı akışı yanıttan önce gelebilir)
+        self._recent_fills: 'OrderedDict[int, str]' = OrderedDict()
+        self.stop_losses = 0
+        self.take_profits = 0
+
+    def add(self, bracket: Bracket) -> Optional[Tuple[Bracket, Optional[int]]]:
+        """Çifti kaydeder; bacaklardan biri kayıttan önce dolmuşsa `on_order` gibi sonucu döndürür."""
+        with self._lock:
+            for order_id in bracket.order_ids:
+                if order_id in self._recent_fills:
+                    self._count(self._recent_fills.pop(order_id))
+                    return bracket, bracket.sibling(order_id)
+            for order_id in bracket.order_ids:
+                self._by_order[order_id] = bracket
+            self._by_symbol.setdefault(bracket.symbol, []).append(bracket)
+        return None
+
+    def _count(self, order_type: str) -> None:
+        if order_type == STOP_LOSS:
+            self.stop_losses += 1
+        else:
+            self.take_profits += 1
+
+    def _remove(self, bracket: Bracket) -> None:
+        for order_id in bracket.order_ids:
+            self._by_order.pop(order_id, None)
+        brackets = self._by_symbol.get(bracket.symbol, [])
+        if bracket in brackets:
+            brackets.remove(bracket)
+        if not brackets:
+            self._by_symbol.pop(bracket.symbol, None)
+
+    def on_order(self, order: Dict[str, Any]) -> Optional[Tuple[Bracket, Optional[int]]]:
+        """Bacaklardan biri dolduysa (çift, iptal edilecek kardeş emir) döndürür."""
+        with self._lock:
+            bracket = self._by_order.get(order['orderId'])
+            if bracket is None:
+                if order['status'] == 'FILLED' and order['type'] in (STOP_LOSS, TAKE_PROFIT) and order['reduceOnly']:
+                    self._recent_fills[order['orderId']] = order['type']
+                    while len(self._recent_fills) > RECENT_FILLS:
+                        self._recent_fills.popitem(last=False)
+                return None
+            if order['status'] == 'FILLED':
+                self._remove(bracket)
+                self._count(order['type'])
+                return bracket, bracket.sibling(order['orderId'])
+            if order['status'] in ('CANCELED', 'EXPIRED', 'REJECTED'):
+                # Dışarıdan iptal edilen bacak; diğeri korunmaya devam eder
+                self._by_order.pop(order['orderId'], None)
+                if order['orderId'] == bracket.stop_loss_id:
+                    bracket.stop_loss_id = None
+                else:
+                    bracket.take_profit_id = None
+                if not bracket.order_ids:
+                    self._remove(bracket)
+            return None
+
+    def pop_symbol(self, symbol: str) -> List[Bracket]:
+        """Pozisyon elle kapatılırken sembolün tüm çiftlerini kayıttan çıkarır."""
+        with self._lock:
+            brackets = list(self._by_symbol.get(symbol, []))
+            for bracket in brackets:
+                self._remove(bracket)
+            return brackets
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": sum(len(brackets) for brackets in self._by_symbol.values()),
+                "stop_losses": self.stop_losses,
+                "take_profits": self.take_profits,
+            }
+
+
+def parse_batch_response(response: List[Dict[str, Any]]) -> Tuple[List[Optional[int]], List[str]]:
+    """Toplu emir yanıtını (emir numaraları, hata mesajları) olarak ayırır; hatalı öğeler None olur."""
+    order_ids: List[Optional[int]] = []
+    errors: List[str] = []
+    for item in response:
+        if 'orderId' in item:
+            order_ids.append(int(item['orderId']))
+        else:
+            order_ids.append(None)
+            errors.append(f"{item.get('msg')} ({item.get('code')})")
+    return order_ids, errors
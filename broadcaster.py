@@ -0,0 +1,176 @@
+import json
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# Her istemcide yalnızca en güncel örneği tutulan mesaj tipleri
+DEFAULT_COALESCE_TYPES = ('position_update', 'stats_update')
+
+# 'compact' biçimde sık gönderilen mesajlar {"t": kısa tip, "d": [alan değerleri]} olarak kodlanır;
+# alan sırası istemcideki (static/app.js) tabloyla aynı olmalıdır.
+COMPACT_FIELDS = {
+    'kline_update': ('k', ('symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close', 'volume', 'closed')),
+    'position_update': ('p', ('symbol', 'quantity', 'entry_price', 'mark_price', 'pnl_usdt', 'roi_percent')),
+}
+FORMATS = ('json', 'compact')
+
+
+def encode(message_type: str, data: Any, fmt: str = 'json') -> str:
+    """Mesajı istemci biçimine göre metne çevirir."""
+    if fmt == 'compact':
+        if message_type in COMPACT_FIELDS and isinstance(data, dict):
+            short_type, fields = COMPACT_FIELDS[message_type]
+            return json.dumps({"t": short_type, "d": [data.get(field) for field in fields]},
+                              separators=(',', ':'), default=str)
+        return json.dumps({"type": message_type, "data": data}, separators=(',', ':'), default=str)
+    return json.dumps({"type": message_type, "data": data}, default=str)
+
+
+class ClientQueue:
+    """
+    Tek bir websocket istemcisinin sınırlı gönderim kuyruğu. Yalnızca olay döngüsü iş
+    parçacığından kullanılır. Kuyruk dolunca en eski mesaj düşürülür; birleştirilen tiplerde
+    yalnızca son mesaj saklanır. Mesajlar her biçim için bir kez serileştirilmiş metin olarak gelir.
+    """
+
+    def __init__(self, maxsize: int, coalesce_types: Tuple[str, ...], fmt: str = 'json') -> None:
+        self.maxsize = maxsize
+        self.format = fmt
+        self.coalesce_types = coalesce_types
+        self._queue: deque = deque()
+        self._latest: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def depth(self) -> int:
+        return len(self._queue) + len(self._latest)
+
+    def offer(self, message_type: str, texts: Dict[str, str]) -> None:
+        text = texts[self.format]
+        if message_type in self.coalesce_types:
+            if message_type in self._latest:
+                self.coalesced += 1
+            self._latest[message_type] = text
+        else:
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(text)
+        self._ready.set()
+
+    async def get(self) -> List[str]:
+        """Bekleyen tüm mesajları sırayla döndürür; boşsa yeni mesaj gelene kadar bekler."""
+        await self._ready.wait()
+        self._ready.clear()
+        frames = list(self._queue) + list(self._latest.values())
+        self._queue.clear()
+        self._latest.clear()
+        self.sent += len(frames)
+        return frames
+
+
+class Broadcaster:
+    """
+    Bot iş parçacıklarından gelen arayüz güncellemelerini tüm websocket istemcilerine dağıtır.
+    `publish` her iş parçacığından güvenle çağrılabilir ve beklemez: log satırları kilitli bir
+    listeye eklenip `log_interval` aralıklarla tek 'log_batch' mesajı olarak, diğer mesajlar
+    `call_soon_threadsafe` ile olay döngüsüne aktarılır. Her mesaj, kullanılan her biçim için
+    çağıran iş parçacığında bir kez serileştirilir ve istemcilerin kendi sınırlı kuyruklarına
+    konur; yavaş bir istemci diğerlerini ve botu bekletmez.
+    """
+
+    def __init__(self, max_queue: int = 256, log_interval: float = 0.25, max_pending_logs: int = 1000,
+                 coalesce_types: Tuple[str, ...] = DEFAULT_COALESCE_TYPES) -> None:
+        self.max_queue = max_queue
+        self.log_interval = log_interval
+        self.coalesce_types = coalesce_types
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Set[ClientQueue] = set()
+        # Bağlı istemcilerin biçimleri; bot iş parçacıklarından okunduğu için bütün olarak değiştirilir
+        self._formats: frozenset = frozenset()
+        self._pending_logs: deque = deque(maxlen=max_pending_logs)
+        self._logs_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped_logs = 0
+        self.dropped_no_loop = 0
+        self.disconnected_slow = 0
+        # Bağlantısı kopan istemcilerin sayaçları toplamda kaybolmasın
+        self._closed_totals = {'sent': 0, 'dropped': 0, 'coalesced': 0}
+
+    def publish(self, message_type: str, data: Any) -> None:
+        """`TradingBot` arayüz geri çağrısı; her iş parçacığından çağrılabilir."""
+        self.published += 1
+        if message_type == 'log':
+            with self._logs_lock:
+                if len(self._pending_logs) == self._pending_logs.maxlen:
+                    self.dropped_logs += 1
+                self._pending_logs.append(data)
+            return
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            self.dropped_no_loop += 1
+            return
+        if self._formats:
+            loop.call_soon_threadsafe(self._fanout, message_type, self._encode_all(message_type, data))
+
+    def _encode_all(self, message_type: str, data: Any) -> Dict[str, str]:
+        return {fmt: encode(message_type, data, fmt) for fmt in self._formats}
+
+    def _fanout(self, message_type: str, texts: Dict[str, str]) -> None:
+        for client in self._clients:
+            if client.format in texts:
+                client.offer(message_type, texts)
+
+    async def _flush_logs(self) -> None:
+        while True:
+            await asyncio.sleep(self.log_interval)
+            with self._logs_lock:
+                if not self._pending_logs:
+                    continue
+                lines = list(self._pending_logs)
+                self._pending_logs.clear()
+            if self._clients:
+                self._fanout('log_batch', self._encode_all('log_batch', lines))
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self._flusher is None or self._flusher.done():
+            self.loop = loop
+            self._flusher = loop.create_task(self._flush_logs())
+
+    def register(self, fmt: str = 'json') -> ClientQueue:
+        """Olay döngüsü içinde çağrılmalıdır; ilk çağrıda dağıtıcıyı döngüye bağlar."""
+        self._ensure_started()
+        client = ClientQueue(self.max_queue, self.coalesce_types, fmt if fmt in FORMATS else 'json')
+        self._clients.add(client)
+        self._formats = frozenset(c.format for c in self._clients)
+        return client
+
+    def unregister(self, client: ClientQueue) -> None:
+        if client in self._clients:
+            self._clients.discard(client)
+            self._formats = frozenset(c.format for c in self._clients)
+            self._closed_totals['sent'] += client.sent
+            self._closed_totals['dropped'] += client.dropped
+            self._closed_totals['coalesced'] += client.coalesced
+
+    def stats(self) -> Dict[str, Any]:
+        clients = list(self._clients)
+        with self._logs_lock:
+            pending_logs = len(self._pending_logs)
+        return {
+            "clients": len(clients),
+            "published": self.published,
+            "sent": self._closed_totals['sent'] + sum(c.sent for c in clients),
+            "dropped": self._closed_totals['dropped'] + sum(c.dropped for c in clients),
+            "coalesced": self._closed_totals['coalesced'] + sum(c.coalesced for c in clients),
+            "max_client_queue": max((c.depth() for c in clients), default=0),
+            "pending_logs": pending_logs,
+            "dropped_logs": self.dropped_logs,
+            "dropped_no_loop": self.dropped_no_loop,
+            "disconnected_slow": self.disconnected_slow,
+        }
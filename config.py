@@ -0,0 +1,85 @@
+import os
+from typing import Dict, Any
+
+
+def load_strategy_configs() -> Dict[str, Dict[str, Any]]:
+    """Strateji parametrelerini ortam değişkenlerinden (varsayılanlarıyla) okur."""
+    return {
+        "KadirV2": {
+            'timeframe': os.environ.get('KADIRV2_TIMEFRAME', '5m'),
+            'atr_multiplier_sl': float(os.environ.get('KADIRV2_ATR_SL', 1.5)),
+            'atr_multiplier_tp': float(os.environ.get('KADIRV2_ATR_TP', 3.0)),
+            'ema_length_fast': int(os.environ.get('KADIRV2_EMA_FAST', 9)),
+            'ema_length_slow': int(os.environ.get('KADIRV2_EMA_SLOW', 21)),
+            'rsi_length': int(os.environ.get('KADIRV2_RSI_LENGTH', 14)),
+            'rsi_overbought': int(os.environ.get('KADIRV2_RSI_OB', 70)),
+            'rsi_oversold': int(os.environ.get('KADIRV2_RSI_OS', 30)),
+            'atr_length': int(os.environ.get('KADIRV2_ATR_LEN', 14))
+        },
+        "Scalper": {
+            'timeframe': os.environ.get('SCALPER_TIMEFRAME', '1m'),
+            'atr_multiplier_sl': float(os.environ.get('SCALPER_ATR_SL', 1.0)),
+            'volume_ma_length': int(os.environ.get('SCALPER_VOL_MA_LEN', 20)),
+            'volume_threshold': float(os.environ.get('SCALPER_VOL_THRESHOLD', 2.0)),
+            'candle_body_ratio': float(os.environ.get('SCALPER_BODY_RATIO', 0.6)),
+            'atr_length': int(os.environ.get('SCALPER_ATR_LEN', 14))
+        }
+    }
+
+
+def load_screener_config() -> Dict[str, Any]:
+    """Screener eşiklerini ve puan ağırlıklarını ortam değişkenlerinden okur."""
+    return {
+        'timeframe': os.environ.get('SCREENER_TIMEFRAME', '5m'),
+        'bars': int(os.environ.get('SCREENER_BARS', 99)),
+        'candidates': int(os.environ.get('SCREENER_CANDIDATES', 30)),
+        'min_quote_volume': float(os.environ.get('SCREENER_MIN_QUOTE_VOLUME', 50_000_000)),
+        'max_spread_bps': float(os.environ.get('SCREENER_MAX_SPREAD_BPS', 5.0)),
+        'refresh_seconds': float(os.environ.get('SCREENER_REFRESH_SECONDS', 30)),
+        'weight_volatility': float(os.environ.get('SCREENER_W_VOLATILITY', 1.0)),
+        'weight_volume_surge': float(os.environ.get('SCREENER_W_VOLUME_SURGE', 1.0)),
+        'weight_trend': float(os.environ.get('SCREENER_W_TREND', 1.0)),
+        'weight_spread': float(os.environ.get('SCREENER_W_SPREAD', 0.5)),
+        'ema_length_fast': int(os.environ.get('KADIRV2_EMA_FAST', 9)),
+        'ema_length_slow': int(os.environ.get('KADIRV2_EMA_SLOW', 21)),
+        'rsi_length': int(os.environ.get('KADIRV2_RSI_LENGTH', 14)),
+        'atr_length': int(os.environ.get('KADIRV2_ATR_LEN', 14)),
+        'volume_ma_length': int(os.environ.get('SCALPER_VOL_MA_LEN', 20)),
+    }
+
+
+def load_paper_config() -> Dict[str, Any]:
+    """TRADING_MODE=paper iken kullanılan simüle borsa ve tekrar oynatma ayarları."""
+    return {
+        'balance': float(os.environ.get('PAPER_BALANCE', 1000)),
+        'fee_rate': float(os.environ.get('PAPER_FEE_RATE', 0.0004)),
+        'slippage_bps': float(os.environ.get('PAPER_SLIPPAGE_BPS', 1.0)),
+        # Gerçek zamanın kaç katı hızda oynatılacağı; 0: bekleme olmadan en yüksek hız
+        'speed': float(os.environ.get('PAPER_SPEED', 100)),
+        'candles': int(os.environ.get('PAPER_CANDLES', 10000)),
+        'ticks_per_candle': int(os.environ.get('PAPER_TICKS_PER_CANDLE', 4)),
+        'base_interval': os.environ.get('PAPER_BASE_INTERVAL', '1m'),
+        # 'synthetic': sabit tohumlu rastgele yürüyüş, 'store': yerel kline deposundaki gerçek mumlar
+        'data': os.environ.get('PAPER_DATA', 'synthetic'),
+        'seed': int(os.environ.get('PAPER_SEED', 42)),
+    }
+
+
+def load_recorder_config() -> Dict[str, Any]:
+    """Websocket oturum kaydı ayarları; RECORD_DIR boşsa kayıt yapılmaz (bkz. recorder.py)."""
+    return {
+        'directory': os.environ.get('RECORD_DIR', ''),
+        'max_bytes': int(float(os.environ.get('RECORD_MAX_MB', 64)) * 1024 * 1024),
+        'max_files': int(os.environ.get('RECORD_MAX_FILES', 20)),
+    }
+
+
+def load_ipc_config() -> Dict[str, Any]:
+    """Bot süreci ile web işçileri arasındaki Unix soketi ayarları (bkz. bot_ipc.py, bot_worker.py)."""
+    return {
+        'path': os.environ.get('BOT_IPC_PATH', '/tmp/kadirv2-bot.sock'),
+        # Komut yanıtı için beklenen en uzun süre (sn)
+        'timeout': float(os.environ.get('BOT_IPC_TIMEOUT', 15)),
+        # Yavaş bir web işçisi için bekletilen en fazla olay; aşılınca en eskiler düşürülür
+        'max_pending': int(os.environ.get('BOT_IPC_MAX_PENDING', 4096)),
+    }
@@ -1,101 +1,502 @@
 # database.py (Tam ve Düzeltilmiş Versiyon)
 
 import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager, closing
+from typing import List, Dict, Any, Tuple, Callable, Optional, TypeVar, Iterator
+
 import psycopg2
-from typing import List, Dict, Any, Tuple
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+import metrics
 
-# Render, veritabanı URL'sini bu ortam değişkeniyle sağlar
+# Render, veritabanı URL'sini bu ortam değişkeniyle sağlar.
+# Test ve yerel çalışma için "sqlite:///trades.db" ya da "sqlite://" (bellekte) kullanılabilir.
 DATABASE_URL = os.environ.get('DATABASE_URL')
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+# Havuzdaki tüm bağlantılar kullanımdayken yeni isteğin boş bağlantı için bekleyeceği en uzun süre (sn)
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+# Havuzdan alınan bağlantı bu süreden uzun boşta kaldıysa kullanılmadan önce sınanır
+DB_HEALTHCHECK_SECONDS = float(os.environ.get('DB_HEALTHCHECK_SECONDS', 30))
+# Başka süreçlerin yazdığı işlemlerin istatistiklere yansıma süresi (saniye)
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 60))
+DAY_MS = 86400000
 
-def create_connection():
-    """PostgreSQL veritabanı bağlantısı oluşturur."""
-    conn = None
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-    except psycopg2.OperationalError as e:
-        print(f"Veritabanı bağlantı hatası: {e}")
-    return conn
-
-def create_table():
-    """'trades' tablosunu, eğer mevcut değilse, oluşturur."""
-    conn = create_connection()
-    if conn is not None:
+# Sayfalı geçmiş sorgularının döndürdüğü sütunlar (sırasıyla)
+TRADE_COLUMNS = ('id', 'symbol', 'trade_id', 'side', 'pnl', 'timestamp', 'strategy')
+
+DB_ERRORS = (psycopg2.Error, sqlite3.Error)
+# Bağlantının koptuğunu gösteren, yeniden bağlanarak bir kez daha denenebilecek hatalar
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+# Kayıttan bağımsız, beklenip yeniden denenebilecek hatalar (bağlantı, havuz bekleme zaman aşımı, SQLite kilidi)
+TRANSIENT_ERRORS = CONNECTION_ERRORS + (PoolError, sqlite3.OperationalError)
+
+
+class TradeRejectedError(Exception):
+    """Kayıt eksik/hatalı alan ya da kısıt ihlali nedeniyle kalıcı olarak yazılamıyor; tekrar denemek işe yaramaz."""
+
+T = TypeVar('T')
+
+
+class PostgresBackend:
+    """
+    psycopg2 ThreadedConnectionPool üzerinde sağlık kontrollü bağlantı havuzu. `getconn` havuz
+    doluyken beklemeden `PoolError` verdiğinden, bağlantılar `maxconn` boyutlu bir semaforla
+    dağıtılır: havuz doluyken istek `timeout` saniyeye kadar boş bağlantı bekler.
+    """
+
+    placeholder = '%s'
+    id_column = 'SERIAL PRIMARY KEY'
+
+    def __init__(self, url: str, minconn: int, maxconn: int, timeout: float = 30.0) -> None:
+        self._pool = ThreadedConnectionPool(minconn, maxconn, url)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        self._last_used: Dict[int, float] = {}
+
+    def _checkout(self):
+        conn = self._pool.getconn()
+        if conn.closed:
+            self._pool.putconn(conn, close=True)
+            return self._pool.getconn()
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used > DB_HEALTHCHECK_SECONDS:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except CONNECTION_ERRORS:
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                return self._pool.getconn()
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"Havuzda {self.timeout:g} sn içinde boş bağlantı bulunamadı.")
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS trades (
-                        id SERIAL PRIMARY KEY,
-                        symbol TEXT NOT NULL,
-                        trade_id BIGINT UNIQUE NOT NULL,
-                        side TEXT NOT NULL,
-                        pnl REAL NOT NULL,
-                        timestamp BIGINT NOT NULL
-                    );
-                """)
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
                 conn.commit()
-        except psycopg2.Error as e:
-            print(f"Tablo oluşturma hatası: {e}")
+            except CONNECTION_ERRORS:
+                broken = True
+                raise
+            except BaseException:
+                # GeneratorExit dahil: yarıda bırakılan akış sorguları da geri alınır
+                conn.rollback()
+                raise
+            finally:
+                if broken or conn.closed:
+                    self._last_used.pop(id(conn), None)
+                    self._pool.putconn(conn, close=True)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                    self._pool.putconn(conn)
         finally:
-            conn.close()
-
-def add_trade(trade_data: Dict[str, Any]):
-    """Veritabanına yeni bir tamamlanmış işlem ekler."""
-    conn = create_connection()
-    if conn is not None:
-        sql = ''' INSERT INTO trades(symbol, trade_id, side, pnl, timestamp)
-                  VALUES(%s, %s, %s, %s, %s) ON CONFLICT (trade_id) DO NOTHING;'''
+            self._slots.release()
+
+    def add_column_if_missing(self, cursor, table: str, column: str, definition: str) -> None:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+
+class SQLiteBackend:
+    """Postgres olmadan test için tek bağlantılı, kilitle korunan SQLite karşılığı."""
+
+    placeholder = '?'
+    id_column = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def add_column_if_missing(self, cursor, table: str, column: str, definition: str) -> None:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+# Şema içe aktarmada değil, ilk veritabanı işleminde (ya da `ensure_schema` ile) bir kez oluşturulur
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _create_backend(url: Optional[str]):
+    if url and url.startswith('sqlite://'):
+        # sqlite:///goreli.db, sqlite:////mutlak/yol.db, sqlite:// (bellekte)
+        path = url[len('sqlite://'):]
+        return SQLiteBackend(path[1:] if path.startswith('/') else path or ':memory:')
+    return PostgresBackend(url, DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT)
+
+
+def get_backend():
+    """Süreç genelinde paylaşılan veritabanı arka ucunu (ilk çağrıda) oluşturur."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(DATABASE_URL)
+    return _backend
+
+
+def close_pool() -> None:
+    global _backend, _schema_ready
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
+            # Bellek içi SQLite kapanınca tablolar da gider
+            _schema_ready = False
+
+
+def ensure_schema() -> bool:
+    """Tabloları gerekiyorsa oluşturur; başarılı olana kadar her çağrıda yeniden dener."""
+    global _schema_ready
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                _schema_ready = create_table()
+    return _schema_ready
+
+
+def _sql(query: str) -> str:
+    """Sorgulardaki %s yer tutucularını arka ucun biçimine çevirir."""
+    placeholder = get_backend().placeholder
+    return query if placeholder == '%s' else query.replace('%s', placeholder)
+
+
+def _run(work: Callable[[Any], T], error_message: str, default: T, operation: str = 'query',
+         raise_rejected: bool = False) -> T:
+    """
+    `work(conn)` çalıştırır; bağlantı koptuysa bir kez yeniden bağlanıp dener, hatada `default` döner.
+    `raise_rejected` açıksa geçici olmayan veritabanı hataları `TradeRejectedError` olarak yükseltilir.
+    """
+    if not _schema_ready and operation != 'create_table':
+        ensure_schema()
+    for attempt in range(2):
         try:
-            with conn.cursor() as cursor:
-                cursor.execute(sql, (
-                    trade_data['symbol'],
-                    trade_data['id'],
-                    trade_data['side'],
-                    float(trade_data['realizedPnl']),
-                    int(trade_data['time'])
-                ))
-                conn.commit()
-        except psycopg2.Error as e:
-            print(f"İşlem ekleme hatası: {e}")
-        finally:
-            conn.close()
+            started = time.perf_counter()
+            with get_backend().connection() as conn:
+                result = work(conn)
+            metrics.histogram('db_latency', operation=operation).observe(time.perf_counter() - started)
+            return result
+        except CONNECTION_ERRORS as e:
+            if attempt == 0:
+                continue
+            print(f"Veritabanı bağlantı hatası: {e}")
+        except DB_ERRORS as e:
+            if raise_rejected and not isinstance(e, TRANSIENT_ERRORS):
+                raise TradeRejectedError(str(e)) from e
+            print(f"{error_message}: {e}")
+            break
+    return default
+
+
+class StatsCache:
+    """
+    (sembol, strateji) başına [işlem, kazanç, pnl] toplamlarını bellekte tutar. `add_trade`
+    her başarılı yazımda toplamları artırır; böylece istatistikler geçmiş büyüklüğünden
+    bağımsız olarak hesaplanır. Diğer süreçlerin yazımları `invalidate` çağrılınca (örn. web
+    işçisine bot sürecinden yeni işlem bildirildiğinde) ya da en geç `ttl` dolunca yeniden yüklenir.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._buckets: Optional[Dict[Tuple[str, str], List[float]]] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Optional[Dict[Tuple[str, str], List[float]]]:
+        with self._lock:
+            if self._buckets is None or time.monotonic() - self._loaded_at > self.ttl:
+                return None
+            return {key: list(values) for key, values in self._buckets.items()}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def load(self, rows: List[Tuple], version: int) -> None:
+        """SQL'den okunan toplamları, okuma sırasında yeni yazım olmadıysa önbelleğe yerleştirir."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._buckets = {(row[0], row[1]): [int(row[2]), int(row[3]), float(row[4])] for row in rows}
+            self._loaded_at = time.monotonic()
+
+    def record(self, symbol: str, strategy: str, pnl: float) -> None:
+        with self._lock:
+            self._version += 1
+            if self._buckets is not None:
+                bucket = self._buckets.setdefault((symbol, strategy), [0, 0, 0.0])
+                bucket[0] += 1
+                bucket[1] += 1 if pnl > 0 else 0
+                bucket[2] += pnl
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._buckets = None
+
+
+stats_cache = StatsCache(STATS_CACHE_TTL)
+
+
+def create_table() -> bool:
+    """'trades' ve günlük özet tablosunu, eğer mevcut değilse, oluşturur."""
+    def work(conn):
+        backend = get_backend()
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS trades (
+                    id {backend.id_column},
+                    symbol TEXT NOT NULL,
+                    trade_id BIGINT UNIQUE NOT NULL,
+                    side TEXT NOT NULL,
+                    pnl REAL NOT NULL,
+                    timestamp BIGINT NOT NULL,
+                    strategy TEXT
+                );
+            """)
+            backend.add_column_if_missing(cursor, 'trades', 'strategy', 'TEXT')
+            # Anahtar kümesi (timestamp, trade_id) sayfalaması ve sembol filtresi için indeksler
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_time ON trades (timestamp DESC, trade_id DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_symbol_time "
+                           "ON trades (symbol, timestamp DESC, trade_id DESC)")
+            # (sembol, strateji, gün) başına özet; istatistikler bu küçük tablodan hesaplanır
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trade_summary (
+                    symbol TEXT NOT NULL,
+                    strategy TEXT NOT NULL DEFAULT '',
+                    day BIGINT NOT NULL,
+                    trades BIGINT NOT NULL,
+                    wins BIGINT NOT NULL,
+                    pnl DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (symbol, strategy, day)
+                );
+            """)
+            cursor.execute("SELECT COUNT(*) FROM trade_summary")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(_sql("""
+                    INSERT INTO trade_summary(symbol, strategy, day, trades, wins, pnl)
+                    SELECT symbol, COALESCE(strategy, ''), timestamp / %s, COUNT(*),
+                           SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), SUM(pnl)
+                    FROM trades GROUP BY symbol, COALESCE(strategy, ''), timestamp / %s
+                """), (DAY_MS, DAY_MS))
+        return True
+    return _run(work, "Tablo oluşturma hatası", False, 'create_table')
+
+def insert_trades(trades: List[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    İşlemleri tek bir çok satırlı `INSERT ... ON CONFLICT DO NOTHING` ile yazar ve gerçekten eklenen
+    trade_id'leri döndürür; yalnızca bu satırlar özet tabloya ve istatistik önbelleğine işlenir
+    (tekrarlanan trade_id'ler hata sayılmaz). Veritabanına geçici olarak ulaşılamazsa None döner;
+    kayıtlardan biri hatalıysa ya da veritabanınca reddedilirse `TradeRejectedError` yükseltir.
+    """
+    if not trades:
+        return []
+    rows_by_id: Dict[int, Tuple] = {}
+    try:
+        for trade in trades:
+            # Aynı toplu yazımda tekrarlanan trade_id'lerden yalnızca ilki yazılır
+            rows_by_id.setdefault(int(trade['id']), (
+                trade['symbol'],
+                int(trade['id']),
+                trade['side'],
+                float(trade['realizedPnl']),
+                int(trade['time']),
+                trade.get('strategy') or None
+            ))
+    except (KeyError, TypeError, ValueError) as e:
+        raise TradeRejectedError(f"Geçersiz işlem kaydı: {e!r}") from e
+    rows = list(rows_by_id.values())
+    sql = f''' INSERT INTO trades(symbol, trade_id, side, pnl, timestamp, strategy)
+               VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))}
+               ON CONFLICT (trade_id) DO NOTHING RETURNING trade_id;'''
+    summary_sql = ''' INSERT INTO trade_summary(symbol, strategy, day, trades, wins, pnl)
+                      VALUES(%s, %s, %s, %s, %s, %s)
+                      ON CONFLICT (symbol, strategy, day) DO UPDATE SET
+                          trades = trade_summary.trades + EXCLUDED.trades,
+                          wins = trade_summary.wins + EXCLUDED.wins,
+                          pnl = trade_summary.pnl + EXCLUDED.pnl;'''
+
+    def work(conn):
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(_sql(sql), [value for row in rows for value in row])
+            inserted_ids = {row[0] for row in cursor.fetchall()}
+            inserted = [row for row in rows if row[1] in inserted_ids]
+            summary: Dict[Tuple[str, str, int], List[float]] = {}
+            for symbol, _, _, pnl, timestamp, strategy in inserted:
+                bucket = summary.setdefault((symbol, strategy or '', timestamp // DAY_MS), [0, 0, 0.0])
+                bucket[0] += 1
+                bucket[1] += 1 if pnl > 0 else 0
+                bucket[2] += pnl
+            if summary:
+                cursor.executemany(_sql(summary_sql), [key + tuple(values) for key, values in summary.items()])
+            return inserted
+
+    inserted = _run(work, "İşlem ekleme hatası", None, 'add_trades', raise_rejected=True)
+    if inserted is None:
+        return None
+    for symbol, _, _, pnl, _, strategy in inserted:
+        stats_cache.record(symbol, strategy or '', pnl)
+    return [row[1] for row in inserted]
+
+def add_trades(trades: List[Dict[str, Any]]) -> bool:
+    """`insert_trades` ile yazar; kayıtlar yazılamazsa (geçici ya da kalıcı hata) False döner."""
+    try:
+        return insert_trades(trades) is not None
+    except TradeRejectedError as e:
+        print(f"İşlem ekleme hatası: {e}")
+        return False
+
+def add_trade(trade_data: Dict[str, Any]) -> bool:
+    """Veritabanına yeni bir tamamlanmış işlem ekler ve özet tablo ile istatistik önbelleğini günceller."""
+    return add_trades([trade_data])
 
 # ----- YENİ EKLENEN FONKSİYONLAR -----
 
 def get_all_trades() -> List[Tuple]:
     """Tüm işlem kayıtlarını veritabanından çeker."""
-    conn = create_connection()
-    trades = []
-    if conn is not None:
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT id, symbol, trade_id, side, pnl, timestamp FROM trades ORDER BY timestamp DESC")
-                trades = cursor.fetchall()
-        except psycopg2.Error as e:
-            print(f"İşlemleri getirme hatası: {e}")
-        finally:
-            conn.close()
-    return trades
+    def work(conn):
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT id, symbol, trade_id, side, pnl, timestamp FROM trades ORDER BY timestamp DESC")
+            return cursor.fetchall()
+    return _run(work, "İşlemleri getirme hatası", [], 'get_all_trades')
 
-def calculate_stats() -> Dict[str, Any]:
-    """Veritabanındaki verilere göre performans istatistikleri hesaplar."""
-    trades = get_all_trades()
-    if not trades:
-        return {"total_pnl": 0, "win_rate": 0, "total_trades": 0, "wins": 0, "losses": 0}
-
-    # Veritabanı sütun sırası: 0:id, 1:symbol, 2:trade_id, 3:side, 4:pnl, 5:timestamp
-    total_pnl = sum(trade[4] for trade in trades)
-    wins = sum(1 for trade in trades if trade[4] > 0)
-    total_trades = len(trades)
-    losses = total_trades - wins
-    win_rate = (wins / total_trades) * 100 if total_trades > 0 else 0
-    
+def _trade_filters(symbol: Optional[str] = None, side: Optional[str] = None,
+                   start: Optional[int] = None, end: Optional[int] = None) -> Tuple[List[str], List[Any]]:
+    """Geçmiş sorguları için WHERE koşullarını ve parametrelerini üretir (zaman aralığı ms, [start, end))."""
+    conditions, params = [], []
+    for clause, value in (("symbol = %s", symbol), ("side = %s", side),
+                          ("timestamp >= %s", start), ("timestamp < %s", end)):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    return conditions, params
+
+def get_trades_page(limit: int = 50, cursor: Optional[str] = None, symbol: Optional[str] = None,
+                    side: Optional[str] = None, start: Optional[int] = None,
+                    end: Optional[int] = None) -> Tuple[List[Tuple], Optional[str]]:
+    """
+    En yeniden eskiye bir sayfa işlem ve sonraki sayfanın imlecini ("timestamp:trade_id") döndürür.
+    OFFSET yerine (timestamp, trade_id) anahtar kümesi kullanıldığından her sayfa indeksten sabit
+    sürede okunur. Son sayfada imleç None'dır.
+    """
+    conditions, params = _trade_filters(symbol, side, start, end)
+    if cursor:
+        timestamp, _, trade_id = cursor.partition(':')
+        conditions.append("(timestamp, trade_id) < (%s, %s)")
+        params += [int(timestamp), int(trade_id)]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    def work(conn):
+        with closing(conn.cursor()) as db_cursor:
+            db_cursor.execute(_sql(f"""
+                SELECT {', '.join(TRADE_COLUMNS)} FROM trades {where}
+                ORDER BY timestamp DESC, trade_id DESC LIMIT %s
+            """), params + [limit + 1])
+            return db_cursor.fetchall()
+    rows = _run(work, "İşlemleri getirme hatası", [], 'get_trades_page')
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, f"{rows[-1][5]}:{rows[-1][2]}"
+
+def iter_trades(symbol: Optional[str] = None, side: Optional[str] = None, start: Optional[int] = None,
+                end: Optional[int] = None, batch_size: int = 1000) -> Iterator[Tuple]:
+    """
+    Filtreye uyan tüm işlemleri en yeniden eskiye, `get_trades_page` anahtar kümesi sayfalarıyla
+    üretir; sonuç kümesi bellekte toplanmaz. Bağlantı yalnızca her sayfanın sorgusu süresince
+    tutulur, böylece yavaş bir indirme SQLite kilidini ya da havuzdaki bir bağlantıyı bekletmez.
+    """
+    cursor = None
+    while True:
+        rows, cursor = get_trades_page(batch_size, cursor, symbol, side, start, end)
+        yield from rows
+        if cursor is None:
+            return
+
+def _summarize(trades: int, wins: int, pnl: float) -> Dict[str, Any]:
     return {
-        "total_pnl": total_pnl,
-        "win_rate": win_rate,
-        "total_trades": total_trades,
+        "total_pnl": pnl,
+        "win_rate": (wins / trades) * 100 if trades > 0 else 0,
+        "total_trades": trades,
         "wins": wins,
-        "losses": losses
+        "losses": trades - wins
+    }
+
+def calculate_stats() -> Dict[str, Any]:
+    """
+    Performans istatistiklerini sembol ve strateji kırılımlarıyla döndürür. Toplamlar özet
+    tablodan SQL ile bir kez okunur, sonrasında bellekteki önbellekten artımlı olarak gelir.
+    """
+    buckets = stats_cache.snapshot()
+    if buckets is None:
+        version = stats_cache.version
+
+        def work(conn):
+            with closing(conn.cursor()) as cursor:
+                cursor.execute("""
+                    SELECT symbol, strategy, SUM(trades), SUM(wins), SUM(pnl)
+                    FROM trade_summary GROUP BY symbol, strategy
+                """)
+                return cursor.fetchall()
+        rows = _run(work, "İstatistik hesaplama hatası", None, 'calculate_stats')
+        if rows is None:
+            return {**_summarize(0, 0, 0), "by_symbol": {}, "by_strategy": {}}
+        stats_cache.load(rows, version)
+        buckets = {(row[0], row[1]): [int(row[2]), int(row[3]), float(row[4])] for row in rows}
+
+    totals = [0, 0, 0.0]
+    by_symbol: Dict[str, List[float]] = {}
+    by_strategy: Dict[str, List[float]] = {}
+    for (symbol, strategy), values in buckets.items():
+        for group in (totals, by_symbol.setdefault(symbol, [0, 0, 0.0]),
+                      by_strategy.setdefault(strategy or 'Manuel/Bilinmiyor', [0, 0, 0.0])):
+            for i in range(3):
+                group[i] += values[i]
+
+    return {
+        **_summarize(*totals),
+        "by_symbol": {key: _summarize(*values) for key, values in by_symbol.items()},
+        "by_strategy": {key: _summarize(*values) for key, values in by_strategy.items()},
     }
 
-# Uygulama başladığında tabloyu kontrol et/oluştur
-create_table()
+def get_daily_stats(days: int = 30) -> List[Dict[str, Any]]:
+    """Son `days` günün günlük toplamlarını (en yeni gün önce) özet tablodan döndürür."""
+    def work(conn):
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(_sql("""
+                SELECT day, SUM(trades), SUM(wins), SUM(pnl) FROM trade_summary
+                WHERE day >= %s GROUP BY day ORDER BY day DESC
+            """), (int(time.time() * 1000) // DAY_MS - days + 1,))
+            return cursor.fetchall()
+    return [
+        {"day": int(row[0]) * DAY_MS, **_summarize(int(row[1]), int(row[2]), float(row[3]))}
+        for row in _run(work, "Günlük istatistik hatası", [], 'get_daily_stats')
+    ]
@@ -0,0 +1,162 @@
+import queue
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Any, Optional
+
+# Olay tipleri
+CANDLE_CLOSED = 'candle_closed'
+KLINE_TICK = 'kline_tick'
+
+
+class EventDispatcher:
+    """
+    Websocket iş parçacıklarından yayınlanan olayları bir kuyruk üzerinden tek bir
+    işçi iş parçacığında abonelere sırayla dağıtır. Kuyruk doluysa olay düşürülür.
+    Durdurulduktan sonra gelen ya da kuyrukta kalan olaylar işlenmeden atılır.
+    """
+
+    def __init__(self, maxsize: int = 10000, on_error: Callable[[str], None] = print) -> None:
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = defaultdict(list)
+        self._on_error = on_error
+        self._thread = None
+        self.running = False
+        self.dropped = 0
+
+    def subscribe(self, event_type: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers[event_type].append(handler)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> bool:
+        if not self.running and self._thread is not None:
+            # Durdurulmuş işçi kuyruğu okumaz; kalan olay `wait_idle`'ı sonsuza dek bekletirdi
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((event_type, payload))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def wait_idle(self) -> None:
+        """Kuyruktaki tüm olaylar işlenene kadar bekler (tekrar oynatmada sıralı çalışma için)."""
+        self._queue.join()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """İşçiyi durdurur ve çıkmasını bekler; kuyruk doluysa bloklanmaz."""
+        self.running = False
+        try:
+            # Boş kuyrukta bekleyen işçiyi uyandırır
+            self._queue.put_nowait((None, None))
+        except queue.Full:
+            # Kuyruk boş değil: işçi bir sonraki olayı alınca durdurulduğunu görür
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            event_type, payload = self._queue.get()
+            if not self.running:
+                self._queue.task_done()
+                self._discard_pending()
+                break
+            if event_type is None:
+                self._queue.task_done()
+                continue
+            for handler in self._handlers.get(event_type, ()):
+                try:
+                    handler(payload)
+                except Exception as e:
+                    self._on_error(f"'{event_type}' olayı işlenirken hata: {e}")
+            self._queue.task_done()
+
+    def _discard_pending(self) -> None:
+        # Atılan olaylar da tamamlandı sayılır; yoksa `wait_idle` (queue.join) hiç dönmezdi
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._queue.task_done()
+
+
+class AsyncEventDispatcher:
+    """
+    `EventDispatcher`'ın asyncio sürümü: olaylar bir `asyncio.Queue` üzerinden tek bir görevde
+    sırayla dağıtılır; eş yordam (coroutine) döndüren işleyiciler beklenir. `publish` yalnızca
+    olay döngüsü iş parçacığından çağrılmalıdır. Kuyruk doluysa olay düşürülür.
+    """
+
+    def __init__(self, maxsize: int = 10000, on_error: Callable[[str], None] = print) -> None:
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], Any]]] = defaultdict(list)
+        self._on_error = on_error
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+        self.dropped = 0
+
+    def subscribe(self, event_type: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+        self._handlers[event_type].append(handler)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> bool:
+        if self._queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((event_type, payload))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def wait_idle(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    def start(self) -> None:
+        """Çalışan olay döngüsünde dağıtım görevini başlatır."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self.running = True
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Görevi iptal eder; o an işlenen olayın işleyicisi de iptal edilir."""
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while self.running:
+            event_type, payload = await self._queue.get()
+            try:
+                for handler in self._handlers.get(event_type, ()):
+                    try:
+                        result = handler(payload)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self._on_error(f"'{event_type}' olayı işlenirken hata: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,166 @@
+from collections import deque
+from typing import Optional, Dict, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Kapanan her mumda O(1) güncellenen, pandas_ta ile aynı tanımları kullanan indikatörler.
+# Güncelleme adımları pandas `ewm` döngüsünün aritmetiğini birebir izler; böylece aşağıdaki
+# vektörel `*_series` fonksiyonlarıyla (backtest) bit düzeyinde aynı sonucu verir.
+# Isınma süresi dolmadan `value` None döner.
+
+
+class EMA:
+    """pandas_ta `ema`: ilk değer ilk `length` verinin SMA'sı, sonrası alpha = 2 / (length + 1)."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self._decay = 1.0 - self.alpha
+        self._seed = []
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is None:
+            self._seed.append(x)
+            if len(self._seed) == self.length:
+                self.value = float(np.sum(self._seed)) / self.length
+                self._seed = []
+        elif self.value != x:
+            self.value = (self._decay * self.value + self.alpha * x) / (self._decay + self.alpha)
+        return self.value
+
+
+class RMA:
+    """pandas_ta `rma` (Wilder ortalaması): `ewm(alpha=1/length, min_periods=length)`, adjust=True."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self._decay = 1.0 - 1.0 / length
+        self._weight = 1.0
+        self._mean: Optional[float] = None
+        self._count = 0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self._mean is None:
+            self._mean = x
+        else:
+            self._weight *= self._decay
+            if self._mean != x:
+                self._mean = (self._weight * self._mean + x) / (self._weight + 1.0)
+            self._weight += 1.0
+        self._count += 1
+        if self._count >= self.length:
+            self.value = self._mean
+        return self.value
+
+
+class SMA:
+    """Sabit pencereli hareketli ortalama; kümülatif toplamların farkıyla O(1) güncellenir."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self._cumsums = deque([0.0], maxlen=length + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self._cumsums.append(self._cumsums[-1] + x)
+        if len(self._cumsums) == self.length + 1:
+            self.value = (self._cumsums[-1] - self._cumsums[0]) / self.length
+        return self.value
+
+
+class RSI:
+    """pandas_ta `rsi`: kapanış farklarının pozitif/negatif kısımlarının RMA oranı."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self._gain = RMA(length)
+        self._loss = RMA(length)
+        self._prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        if self._prev_close is not None:
+            change = close - self._prev_close
+            gain = self._gain.update(change if change > 0 else 0.0)
+            loss = self._loss.update(-change if change < 0 else 0.0)
+            if gain is not None and loss is not None:
+                total = gain + loss
+                self.value = 100.0 * gain / total if total else None
+        self._prev_close = close
+        return self.value
+
+
+class ATR:
+    """pandas_ta `atr` (mamode='rma', sütun adı ATRr_n): gerçek aralığın RMA'sı, ilk mum atlanır."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self._rma = RMA(length)
+        self._prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self._prev_close is not None:
+            true_range = max(high - low, abs(high - self._prev_close), abs(self._prev_close - low))
+            self.value = self._rma.update(true_range)
+        self._prev_close = close
+        return self.value
+
+
+# --- Vektörel karşılıklar (tüm seri tek seferde, ısınma bölgesi NaN) ---
+# Girdiler (mum,) ya da birçok sembol için (mum, sembol) boyutlu olabilir; zaman ekseni 0'dır.
+
+def _frame(x: np.ndarray):
+    return pd.DataFrame(x) if x.ndim == 2 else pd.Series(x)
+
+
+def ema_series(x: np.ndarray, length: int) -> np.ndarray:
+    seeded = np.full(x.shape, np.nan)
+    if len(x) >= length:
+        # Her sembolün ilk `length` değeri bitişik toplanır; 1B toplamla bit düzeyinde aynı sonuç
+        seeded[length - 1] = np.sum(np.ascontiguousarray(x[:length].T), axis=-1) / length
+        seeded[length:] = x[length:]
+    return _frame(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+
+
+def rma_series(x: np.ndarray, length: int) -> np.ndarray:
+    return _frame(x).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()
+
+
+def sma_series(x: np.ndarray, length: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if len(x) >= length:
+        cumsum = np.concatenate((np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)))
+        out[length - 1:] = (cumsum[length:] - cumsum[:-length]) / length
+    return out
+
+
+def rsi_series(close: np.ndarray, length: int) -> np.ndarray:
+    change = np.diff(close, axis=0, prepend=np.nan)
+    gain = rma_series(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    loss = rma_series(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    total = gain + loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total != 0, 100.0 * gain / total, np.nan)
+
+
+def atr_series(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int) -> np.ndarray:
+    prev_close = np.concatenate((np.full((1,) + close.shape[1:], np.nan), close[:-1]))
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)))
+    true_range[0] = np.nan
+    return rma_series(true_range, length)
+
+
+def cached(cache: Optional[Dict], key: Tuple, func: Callable[..., np.ndarray], *args) -> np.ndarray:
+    """
+    `func(*args)` sonucunu `cache` içinde `key` ile saklar. Anahtar, indikatörü ve parametrelerini
+    tam olarak tanımlamalıdır; önbellek yalnızca aynı veri serisi için kullanılmalıdır.
+    """
+    if cache is None:
+        return func(*args)
+    if key not in cache:
+        cache[key] = func(*args)
+    return cache[key]
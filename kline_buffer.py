@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Any
+
+# Tampondaki kolon sırası (REST kline yanıtının ilk 7 alanı ile aynı)
+COLUMNS = ['open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time']
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME = range(len(COLUMNS))
+
+_INTERVAL_UNITS_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+def interval_ms(interval: str) -> int:
+    """Binance zaman dilimini ('1m', '4h', '1d' ...) milisaniyeye çevirir."""
+    return int(interval[:-1]) * _INTERVAL_UNITS_MS[interval[-1]]
+
+
+class KlineBuffer:
+    """
+    Tek bir (sembol, zaman dilimi) çifti için sabit kapasiteli, NumPy tabanlı OHLCV halka tamponu.
+
+    Her satır dizide iki kez (i ve i + capacity konumlarına) yazılır; böylece son `n` mum
+    her zaman bitişik bir dilimdir ve `window()` kopyalamadan bir görünüm döndürebilir.
+    Son satır her zaman güncel (henüz kapanmamış olabilecek) mumdur.
+    """
+
+    def __init__(self, symbol: str, interval: str, capacity: int = 500) -> None:
+        if capacity < 3:
+            raise ValueError("Kline tampon kapasitesi en az 3 olmalıdır.")
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)), dtype=np.float64)
+        self._pos = -1          # Güncel mumun [0, capacity) aralığındaki yuvası
+        self._count = 0         # Tampondaki geçerli mum sayısı
+        self.last_closed = False
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_open_time(self) -> Optional[int]:
+        if self._count == 0:
+            return None
+        return int(self._data[self._pos, OPEN_TIME])
+
+    def _write(self, slot: int, row) -> None:
+        self._data[slot] = row
+        self._data[slot + self.capacity] = row
+
+    def update(self, open_time: int, open_: float, high: float, low: float,
+               close: float, volume: float, close_time: int, closed: bool = False) -> bool:
+        """
+        Bir kline güncellemesini tampona işler. Aynı açılış zamanlı mum yerinde güncellenir,
+        yeni bir açılış zamanı halkayı bir yuva ilerletir. Mum kapandıysa True döner.
+        """
+        row = (open_time, open_, high, low, close, volume, close_time)
+        with self.lock:
+            last_open = self._data[self._pos, OPEN_TIME] if self._count else None
+            if last_open is not None and open_time < last_open:
+                # Sıra dışı gelen eski mesajları yok say
+                return False
+            if last_open is None or open_time > last_open:
+                self._pos = (self._pos + 1) % self.capacity
+                self._count = min(self._count + 1, self.capacity)
+            self._write(self._pos, row)
+            self.last_closed = closed
+        return closed
+
+    def update_from_message(self, k: dict) -> bool:
+        """Websocket kline mesajının 'k' alanını tampona işler."""
+        return self.update(
+            k['t'], float(k['o']), float(k['h']), float(k['l']),
+            float(k['c']), float(k['v']), k['T'], closed=bool(k['x'])
+        )
+
+    def seed(self, klines: List[List[Any]]) -> None:
+        """REST `futures_klines` yanıtıyla tamponu bir kez doldurur (eski → yeni sırada)."""
+        rows = klines[-self.capacity:]
+        with self.lock:
+            self._pos = -1
+            self._count = 0
+            for k in rows:
+                self._pos = (self._pos + 1) % self.capacity
+                self._count += 1
+                self._write(self._pos, [float(v) for v in k[:len(COLUMNS)]])
+            # REST yanıtının son mumu genellikle henüz kapanmamıştır
+            self.last_closed = False
+
+    def seed_array(self, rows: np.ndarray, closed: bool = True) -> None:
+        """(n, 7) mum dizisiyle (örn. `KlineStore` okuması) tamponu bir kez doldurur."""
+        rows = rows[-self.capacity:]
+        n = len(rows)
+        with self.lock:
+            self._data[:n] = rows
+            self._data[self.capacity:self.capacity + n] = rows
+            self._pos = n - 1
+            self._count = n
+            self.last_closed = closed
+
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """Son `n` mumun (eski → yeni) kopyasız (n, 7) görünümünü döndürür."""
+        n = self._count if n is None else min(n, self._count)
+        end = self._pos + self.capacity + 1
+        return self._data[end - n:end]
+
+    def closed_window(self) -> np.ndarray:
+        """Yalnızca kapanmış mumların görünümü (güncel mum kapanmadıysa hariç tutulur)."""
+        return self.window() if self.last_closed else self.window()[:-1]
+
+    def to_frame(self, n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Son `n` mumu, tampon belleğini paylaşan bir DataFrame olarak döndürür.
+        Görünüm bir sonraki güncellemede değişebilir; saklanacaksa kopyalanmalıdır.
+        """
+        if self._count == 0:
+            return None
+        return pd.DataFrame(self.window(n), columns=COLUMNS, copy=False)
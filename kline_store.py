@@ -0,0 +1,266 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from kline_buffer import KlineBuffer, COLUMNS, OPEN_TIME, interval_ms
+
+# Boş bırakılırsa yerel depo kapatılır ve tamponlar doğrudan REST ile doldurulur
+STORE_DIR = os.environ.get('KLINE_STORE_DIR', 'data/klines')
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+# futures_klines tek istekte en fazla 1500 mum döndürür
+MAX_PAGE = 1500
+# Binance haftalık mumları pazartesi açılır; epoch (1970-01-01) perşembedir
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def _partition_ms(step: int) -> int:
+    """Dakikalık zaman dilimleri günlük, daha büyükler 32 günlük dosyalara bölünür."""
+    return DAY_MS if step < HOUR_MS else 32 * DAY_MS
+
+
+def _align_down(ts: int, step: int, interval: str) -> int:
+    """`ts` anında ya da öncesinde açılan mumun açılış zamanı."""
+    offset = WEEK_OFFSET_MS if interval.endswith('w') else 0
+    return (ts - offset) // step * step + offset
+
+
+class KlineStore:
+    """
+    Kapanmış mumları (sembol, zaman dilimi) başına, zaman aralığına bölünmüş `.npy` dosyalarında
+    (n, 7) float64 dizileri olarak saklar. Okumalar `mmap_mode='r'` ile yapılır; tek dosyaya
+    düşen aralıklar kopyasız görünüm olarak döner. `backfill` yalnızca diskte olmayan açılış
+    zamanlarını REST'ten ister, böylece yeniden başlatmada yalnızca aradaki mumlar indirilir.
+    Yazımlar geçici dosya + `os.replace` ile atomiktir; açık eşlemeler eski dosyayı görmeye devam eder.
+    """
+
+    def __init__(self, root: str = STORE_DIR) -> None:
+        self.root = root
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.requests = 0
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _path(self, symbol: str, interval: str, partition_start: int) -> str:
+        day = datetime.fromtimestamp(partition_start / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self._dir(symbol, interval), f"{day}.npy")
+
+    def _partitions(self, step: int, start_ms: int, end_ms: int) -> range:
+        span = _partition_ms(step)
+        return range(start_ms // span * span, end_ms + 1, span)
+
+    def _map(self, path: str) -> Optional[np.ndarray]:
+        """Dosyanın bellek eşlemesini döndürür; dosya değiştiyse eşleme yenilenir."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Kline deposu: {path} okunamadı: {e}")
+            return None
+        with self._lock:
+            self._maps[path] = (mtime, data)
+        return data
+
+    def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> np.ndarray:
+        """Açılış zamanı [start_ms, end_ms] aralığındaki mumları eski → yeni sırada döndürür."""
+        step = interval_ms(interval)
+        parts = []
+        for partition in self._partitions(step, start_ms, end_ms):
+            data = self._map(self._path(symbol, interval, partition))
+            if data is None or not len(data):
+                continue
+            times = data[:, OPEN_TIME]
+            lo, hi = np.searchsorted(times, start_ms), np.searchsorted(times, end_ms, side='right')
+            if hi > lo:
+                parts.append(data[lo:hi])
+        if not parts:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def tail(self, symbol: str, interval: str, n: int, end_ms: Optional[int] = None) -> np.ndarray:
+        """`end_ms` (varsayılan: şimdi) öncesindeki son `n` kapanmış mumu döndürür."""
+        step = interval_ms(interval)
+        end_ms = int(time.time() * 1000) if end_ms is None else end_ms
+        rows = self.read(symbol, interval, end_ms - (n + 1) * step, end_ms)
+        return rows[-n:]
+
+    def write(self, symbol: str, interval: str, rows: np.ndarray) -> int:
+        """Mumları mevcut dosyalarla açılış zamanına göre birleştirip yazar; yazılan satır sayısını döndürür."""
+        rows = np.asarray(rows, dtype=np.float64)
+        if not len(rows):
+            return 0
+        step = interval_ms(interval)
+        span = _partition_ms(step)
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        partition_ids = rows[:, OPEN_TIME].astype(np.int64) // span
+        with self._lock:
+            for partition_id in np.unique(partition_ids):
+                path = self._path(symbol, interval, int(partition_id) * span)
+                new = rows[partition_ids == partition_id]
+                if os.path.exists(path):
+                    # Aynı açılış zamanında yeni gelen satır eskisinin yerine geçer
+                    merged = np.concatenate((new, np.load(path)))
+                else:
+                    merged = new
+                _, first = np.unique(merged[:, OPEN_TIME], return_index=True)
+                merged = merged[first]
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, 'wb') as f:
+                    np.save(f, merged)
+                os.replace(tmp, path)
+                self._maps.pop(path, None)
+        return len(rows)
+
+    def missing_ranges(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Diskte bulunmayan açılış zamanlarını ardışık [ilk, son] aralıkları olarak döndürür."""
+        step = interval_ms(interval)
+        first = _align_down(start_ms + step - 1, step, interval)
+        if first > end_ms:
+            return []
+        expected = np.arange(first, end_ms + 1, step, dtype=np.int64)
+        have = self.read(symbol, interval, first, end_ms)[:, OPEN_TIME].astype(np.int64)
+        missing = expected[~np.isin(expected, have)]
+        if not len(missing):
+            return []
+        breaks = np.flatnonzero(np.diff(missing) != step)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(missing) - 1]))
+        return [(int(missing[s]), int(missing[e])) for s, e in zip(starts, ends)]
+
+    def _backfill_steps(self, symbol: str, interval: str, start_ms: int, end_ms: Optional[int]):
+        """
+        `backfill` adımları: her REST isteğinin parametrelerini üretir, yanıtı `send` ile alır ve
+        sonunda çekilen mum sayısını döndürür. Senkron ve asenkron istemciler aynı mantığı paylaşır.
+        """
+        step = interval_ms(interval)
+        now = int(time.time() * 1000)
+        # Yalnızca kapanmış mumlar saklanır
+        last_closed = _align_down(now, step, interval) - step
+        end_ms = last_closed if end_ms is None else min(end_ms, last_closed)
+        fetched = 0
+        for first, last in self.missing_ranges(symbol, interval, start_ms, end_ms):
+            cursor = first
+            while cursor <= last:
+                limit = min(MAX_PAGE, (last - cursor) // step + 1)
+                klines = yield dict(symbol=symbol, interval=interval, startTime=cursor, endTime=last, limit=limit)
+                self.requests += 1
+                if not klines:
+                    break
+                rows = np.array([k[:len(COLUMNS)] for k in klines], dtype=np.float64)
+                rows = rows[rows[:, OPEN_TIME] + step <= now]
+                self.write(symbol, interval, rows)
+                fetched += len(rows)
+                cursor = int(klines[-1][0]) + step
+        self.fetched += fetched
+        return fetched
+
+    def backfill(self, client, symbol: str, interval: str, start_ms: int, end_ms: Optional[int] = None) -> int:
+        """
+        [start_ms, end_ms] aralığında eksik kapanmış mumları REST'ten çekip kaydeder ve çekilen
+        mum sayısını döndürür. Borsanın veri vermediği boşluklarda sayfalama durur.
+        """
+        steps = self._backfill_steps(symbol, interval, start_ms, end_ms)
+        try:
+            params = next(steps)
+            while True:
+                params = steps.send(client.futures_klines(**params))
+        except StopIteration as done:
+            return done.value
+
+    async def backfill_async(self, client, symbol: str, interval: str, start_ms: int,
+                             end_ms: Optional[int] = None) -> int:
+        """`backfill`'in `AsyncClient` ile çalışan sürümü."""
+        steps = self._backfill_steps(symbol, interval, start_ms, end_ms)
+        try:
+            params = next(steps)
+            while True:
+                params = steps.send(await client.futures_klines(**params))
+        except StopIteration as done:
+            return done.value
+
+    def warm(self, client, symbol: str, interval: str, n: int) -> np.ndarray:
+        """Son `n` kapanmış mumu, eksikleri tamamlayarak diskten döndürür."""
+        step = interval_ms(interval)
+        now = int(time.time() * 1000)
+        self.backfill(client, symbol, interval, now - (n + 1) * step)
+        return self.tail(symbol, interval, n, now)
+
+    async def warm_async(self, client, symbol: str, interval: str, n: int) -> np.ndarray:
+        step = interval_ms(interval)
+        now = int(time.time() * 1000)
+        await self.backfill_async(client, symbol, interval, now - (n + 1) * step)
+        return self.tail(symbol, interval, n, now)
+
+
+_store: Optional[KlineStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[KlineStore]:
+    """Süreç genelinde paylaşılan depoyu döndürür; `KLINE_STORE_DIR` boşsa None."""
+    global _store
+    if not STORE_DIR:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KlineStore(STORE_DIR)
+    return _store
+
+
+def store_for(client) -> Optional[KlineStore]:
+    """
+    İstemci için kullanılacak depo. Simüle istemcilerin verisi gerçek mumlarla karışmasın diye
+    paylaşılan depo yerine istemcinin kendi `kline_store`'u (yoksa None) kullanılır.
+    """
+    if getattr(client, 'simulated', False):
+        return getattr(client, 'kline_store', None)
+    return get_store()
+
+
+def seed_buffer(buffer: KlineBuffer, client) -> None:
+    """
+    Tamponu geçmiş mumlarla doldurur: depo açıksa kapanmış mumlar diskten (yalnızca eksikler
+    REST'ten), değilse ya da depo okunamazsa tek bir REST çağrısıyla.
+    """
+    store = store_for(client)
+    if store is not None:
+        try:
+            rows = store.warm(client, buffer.symbol, buffer.interval, buffer.capacity)
+        except OSError as e:
+            print(f"Kline deposu kullanılamadı, REST'e geçiliyor: {e}")
+        else:
+            if len(rows):
+                buffer.seed_array(rows)
+                return
+    buffer.seed(client.futures_klines(symbol=buffer.symbol, interval=buffer.interval, limit=buffer.capacity))
+
+
+async def seed_buffer_async(buffer: KlineBuffer, client) -> None:
+    """`seed_buffer`'ın `AsyncClient` ile çalışan sürümü."""
+    store = store_for(client)
+    if store is not None:
+        try:
+            rows = await store.warm_async(client, buffer.symbol, buffer.interval, buffer.capacity)
+        except OSError as e:
+            print(f"Kline deposu kullanılamadı, REST'e geçiliyor: {e}")
+        else:
+            if len(rows):
+                buffer.seed_array(rows)
+                return
+    buffer.seed(await client.futures_klines(symbol=buffer.symbol, interval=buffer.interval, limit=buffer.capacity))
@@ -1,35 +1,175 @@
 import os
+import csv
+import io
+import json
+import time
 import asyncio
 import secrets
 import threading
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
 
 from fastapi import (
     FastAPI, WebSocket, Request, Depends, 
     HTTPException, status
 )
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
 
 import database
-from trading_bot import TradingBot
+import metrics
+from broadcaster import Broadcaster
+from bot_ipc import BotUnavailableError, BotCommandError
 
 # --- 1. UYGULAMA VE GÜVENLİK AYARLARI ---
-app = FastAPI(title="KadirV2 Pro Trading Terminal")
-security = HTTPBasic()
-
 APP_USERNAME = os.environ.get("APP_USERNAME")
 APP_PASSWORD = os.environ.get("APP_PASSWORD")
 
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", 50))
+WS_QUEUE_SIZE = int(os.environ.get("WS_QUEUE_SIZE", 256))
+WS_LOG_INTERVAL = float(os.environ.get("WS_LOG_INTERVAL", 0.25))
+WS_SEND_TIMEOUT = float(os.environ.get("WS_SEND_TIMEOUT", 5))
+# 'thread': iş parçacıklı TradingBot, 'asyncio': uvicorn'un olay döngüsünde çalışan AsyncTradingBot
+BOT_RUNTIME = os.environ.get("BOT_RUNTIME", "thread").lower()
+# Bot hazır olmadan gelen isteklerin en fazla bekleyeceği süre (sn)
+BOT_STARTUP_TIMEOUT = float(os.environ.get("BOT_STARTUP_TIMEOUT", 30))
+# 'embedded': bot bu süreçte çalışır (tek işçi), 'remote': bot ayrı süreçtedir (bot_worker.py) ve
+# komutlar Unix soketinden gönderilir; web işçileri durumsuz olduğundan istenildiği kadar çoğaltılabilir
+BOT_MODE = os.environ.get("BOT_MODE", "embedded").lower()
+
+broadcaster = Broadcaster(max_queue=WS_QUEUE_SIZE, log_interval=WS_LOG_INTERVAL)
+metrics.register_gauge('ws_clients', lambda: broadcaster.stats()['clients'])
+metrics.register_gauge('ws_max_client_queue', lambda: broadcaster.stats()['max_client_queue'])
+metrics.register_counter('ws_dropped_messages', lambda: broadcaster.stats()['dropped'])
+metrics.register_gauge('ws_pending_logs', lambda: broadcaster.stats()['pending_logs'])
+
+# Bot, içe aktarmada değil uygulama başlarken arka planda kurulur (bkz. `startup`)
+bot_instance = None
+bot_ready = asyncio.Event()
+startup_error: Optional[str] = None
+# Başlangıç adımlarının süreleri (sn); /get-metrics altında "startup" olarak raporlanır
+startup_timings: Dict[str, float] = {}
+
+def _timed(step: str, func, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        startup_timings[step] = round(time.perf_counter() - started, 4)
+
+def _import_bot_class():
+    # binance, pandas ve strateji modülleri yalnızca burada, ilk kez yüklenir
+    if BOT_RUNTIME == "asyncio":
+        from async_bot import AsyncTradingBot
+        return AsyncTradingBot
+    from trading_bot import TradingBot
+    return TradingBot
+
+def _on_bot_event(message_type: str, data: Any) -> None:
+    # İşlemleri bot süreci yazar; bu işçinin istatistik önbelleği yeni işlem bildirildiğinde
+    # boşaltılır, yoksa /get-stats ve ilk sayfa STATS_CACHE_TTL boyunca eski toplamları gösterirdi
+    if message_type in ('history_append', 'stats_update'):
+        database.stats_cache.invalidate()
+    broadcaster.publish(message_type, data)
+
+def _connect_remote_bot():
+    from config import load_ipc_config
+    from bot_ipc import BotClient, RemoteBot
+    ipc = load_ipc_config()
+    # Bot süreci olayları her web işçisine ayrı ayrı gönderir; burada yerel istemcilere dağıtılır
+    client = BotClient(ipc['path'], on_event=_on_bot_event, timeout=ipc['timeout'])
+    client.start()
+    return RemoteBot(client)
+
+async def _start_bot():
+    if BOT_MODE == "remote":
+        # Bağlantı arka planda kurulur ve koparsa yenilenir; bot süreci yokken komutlar 503 döner
+        return _timed("bot_connect", _connect_remote_bot)
+    bot_class = await asyncio.to_thread(_timed, "bot_import", _import_bot_class)
+    if BOT_RUNTIME == "asyncio":
+        # Kurucu ağ çağrısı yapmaz; bağlantılar olay döngüsünde açılır
+        bot = _timed("bot_init", bot_class, ui_update_callback=broadcaster.publish)
+        started = time.perf_counter()
+        await bot.start()
+        startup_timings["bot_connect"] = round(time.perf_counter() - started, 4)
+    else:
+        # REST istemcisi ve soket yöneticisi kurucuda bağlanır; olay döngüsünü bekletmesin
+        bot = await asyncio.to_thread(_timed, "bot_init", bot_class, ui_update_callback=broadcaster.publish)
+    return bot
+
+async def startup():
+    """Birbirinden bağımsız başlangıç adımlarını (şema, bot) eşzamanlı çalıştırır."""
+    global bot_instance, startup_error
+    started = time.perf_counter()
+    try:
+        _, bot_instance = await asyncio.gather(
+            asyncio.to_thread(_timed, "db_schema", database.ensure_schema),
+            _start_bot(),
+        )
+    except Exception as e:
+        startup_error = str(e)
+        print(f"Bot başlatılamadı: {e}")
+    startup_timings["total"] = round(time.perf_counter() - started, 4)
+    print(f"Başlangıç süreleri (sn): {startup_timings}")
+    bot_ready.set()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop()) if metrics.ENABLED else None
+    # Sunucu bot hazır olmadan istek kabul etmeye başlar; botu gerektiren istekler `get_bot` ile bekler
+    startup_task = asyncio.create_task(startup())
+    yield
+    if not startup_task.done():
+        await asyncio.wait([startup_task], timeout=BOT_STARTUP_TIMEOUT)
+    if BOT_MODE == "remote":
+        if bot_instance is not None:
+            await bot_instance.close()
+    elif bot_instance is not None and asyncio.iscoroutinefunction(bot_instance.stop_all):
+        await bot_instance.stop_all()
+    if loop_monitor:
+        loop_monitor.cancel()
+
+app = FastAPI(title="KadirV2 Pro Trading Terminal", lifespan=lifespan)
+security = HTTPBasic()
+
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-update_queue = asyncio.Queue()
-bot_instance = TradingBot(ui_update_callback=lambda t, d: update_queue.put_nowait({"type": t, "data": d}))
+@app.exception_handler(BotUnavailableError)
+async def bot_unavailable_handler(request: Request, exc: BotUnavailableError):
+    # Bot süreci kapalı, yeniden başlıyor ya da henüz hazır değil
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": f"Bot sürecine ulaşılamıyor: {exc}"})
+
+async def get_bot():
+    """Bot kurulumu sürüyorsa bitmesini bekler; başarısızsa 503 döner."""
+    if not bot_ready.is_set():
+        try:
+            await asyncio.wait_for(bot_ready.wait(), BOT_STARTUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bot hâlâ başlatılıyor.")
+    if bot_instance is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=f"Bot başlatılamadı: {startup_error}")
+    return bot_instance
+
+async def call_bot(method, *args):
+    """Bot komutunu çalıştırır; asyncio çekirdeğinde ya da bot ayrı süreçteyken eş yordam dönerse bekler."""
+    result = method(*args)
+    if asyncio.iscoroutine(result):
+        return await result
+    return result
+
+def run_in_background(method, *args):
+    """Emir gönderen komutları isteği bekletmeden başlatır (asyncio'da görev, aksi halde iş parçacığı)."""
+    if asyncio.iscoroutinefunction(method):
+        bot_instance.spawn(method(*args))
+    else:
+        threading.Thread(target=method, args=args, daemon=True).start()
 
 # --- 2. KULLANICI DOĞRULAMA FONKSİYONU ---
 def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)):
@@ -69,91 +209,142 @@ class StrategyRequest(BaseModel):
 
 # --- 4. WEB SAYFASI VE API ENDPOINT'LERİ ---
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, username: str = Depends(authenticate_user)):
-    initial_stats = database.calculate_stats()
-    initial_history = database.get_all_trades()
-    initial_settings = {
-        "leverage": bot_instance.leverage,
-        "quantity_usd": bot_instance.quantity_usd,
-        "active_symbol": bot_instance.active_symbol,
-        "risk_mode": bot_instance.risk_management_mode,
-        "fixed_roi_tp": bot_instance.fixed_roi_tp * 100,
-        "strategy": bot_instance.active_strategy_name
-    }
+async def read_root(request: Request, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    # Veritabanı çağrıları bloklayıcıdır; olay döngüsünü tutmamaları için iş parçacığında çalışır
+    initial_stats = await asyncio.to_thread(database.calculate_stats)
+    initial_history, history_cursor = await asyncio.to_thread(database.get_trades_page, HISTORY_PAGE_SIZE)
+    initial_settings = await call_bot(bot.get_settings)
     return templates.TemplateResponse("index.html", {
         "request": request,
         "stats": initial_stats,
         "history": initial_history,
+        "history_cursor": history_cursor,
         "settings": initial_settings
     })
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, format: str = "json"):
     await websocket.accept()
+    client = broadcaster.register(format)
 
     try:
         while True:
-            update = await update_queue.get()
-            await websocket.send_json(update)
-            update_queue.task_done()
+            for frame in await client.get():
+                await asyncio.wait_for(websocket.send_text(frame), WS_SEND_TIMEOUT)
+    except asyncio.TimeoutError:
+        # Gönderimi zaman aşımına uğrayan istemci diğerlerini bekletmemesi için kapatılır
+        broadcaster.disconnected_slow += 1
+        await websocket.close()
     except Exception:
         print("WebSocket bağlantısı kapandı.")
+    finally:
+        broadcaster.unregister(client)
 
 # --- Bot Kontrolleri ---
 @app.post("/start")
-async def start_bot(username: str = Depends(authenticate_user)):
-    bot_instance.start_strategy_loop()
+async def start_bot(username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.start_strategy_loop)
     return {"status": "success", "message": "Strateji başlatıldı."}
 
 @app.post("/stop")
-async def stop_bot(username: str = Depends(authenticate_user)):
-    bot_instance.stop_strategy_loop()
+async def stop_bot(username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.stop_strategy_loop)
     return {"status": "success", "message": "Strateji durduruldu."}
 
 @app.post("/set-leverage")
-async def set_leverage(req: LeverageRequest, username: str = Depends(authenticate_user)):
-    bot_instance.set_leverage(req.leverage, bot_instance.active_symbol)
+async def set_leverage(req: LeverageRequest, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    settings = await call_bot(bot.get_settings)
+    await call_bot(bot.set_leverage, req.leverage, settings["active_symbol"])
     return {"status": "success"}
 
 @app.post("/set-quantity")
-async def set_quantity(req: QuantityRequest, username: str = Depends(authenticate_user)):
-    bot_instance.set_quantity(req.quantity_usd)
+async def set_quantity(req: QuantityRequest, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.set_quantity, req.quantity_usd)
     return {"status": "success"}
 
 @app.post("/manual-trade/{side}")
-async def manual_trade(side: str, username: str = Depends(authenticate_user)):
+async def manual_trade(side: str, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
     if side.upper() in ["LONG", "SHORT"]:
-        threading.Thread(target=bot_instance.manual_trade, args=(side.upper(),), daemon=True).start()
+        run_in_background(bot.manual_trade, side.upper())
         return {"status": "success"}
     return {"status": "error", "message": "Geçersiz işlem yönü. 'LONG' veya 'SHORT' olmalıdır."}
 
 @app.post("/emergency-close")
-async def emergency_close(username: str = Depends(authenticate_user)):
-    threading.Thread(target=bot_instance.close_current_position, args=(True,), daemon=True).start()
+async def emergency_close(username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    run_in_background(bot.close_current_position, True)
     return {"status": "success", "message": "Acil kapatma emri gönderildi."}
 
 @app.post("/update-symbol")
-async def update_symbol(req: SymbolRequest, username: str = Depends(authenticate_user)):
-    bot_instance.update_symbol(req.mode, req.symbol)
+async def update_symbol(req: SymbolRequest, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.update_symbol, req.mode, req.symbol)
     return {"status": "success"}
 
 @app.post("/update-risk")
-async def update_risk(req: RiskRequest, username: str = Depends(authenticate_user)):
-    bot_instance.set_risk_mode(req.mode, req.roi)
+async def update_risk(req: RiskRequest, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.set_risk_mode, req.mode, req.roi)
     return {"status": "success"}
 
 @app.post("/update-strategy")
-async def update_strategy(req: StrategyRequest, username: str = Depends(authenticate_user)):
-    bot_instance.set_strategy(req.strategy_name)
+async def update_strategy(req: StrategyRequest, username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    await call_bot(bot.set_strategy, req.strategy_name)
     return {"status": "success"}
 
 @app.get("/get-stats", response_model=Dict[str, Any])
-async def get_stats(username: str = Depends(authenticate_user)):
+def get_stats(username: str = Depends(authenticate_user)):
     return database.calculate_stats()
 
-@app.get("/get-history", response_model=List[Any])
-async def get_history(username: str = Depends(authenticate_user)):
-    return database.get_all_trades()
+@app.get("/get-history", response_model=Dict[str, Any])
+def get_history(limit: int = HISTORY_PAGE_SIZE, cursor: Optional[str] = None, symbol: Optional[str] = None,
+                side: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None,
+                username: str = Depends(authenticate_user)):
+    trades, next_cursor = database.get_trades_page(min(max(limit, 1), 500), cursor, symbol, side, start, end)
+    return {
+        "trades": [dict(zip(database.TRADE_COLUMNS, trade)) for trade in trades],
+        "next_cursor": next_cursor
+    }
+
+@app.get("/export-history")
+def export_history(format: str = "ndjson", symbol: Optional[str] = None, side: Optional[str] = None,
+                   start: Optional[int] = None, end: Optional[int] = None,
+                   username: str = Depends(authenticate_user)):
+    rows = database.iter_trades(symbol, side, start, end)
+    if format == "csv":
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(database.TRADE_COLUMNS)
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() > 65536:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        return StreamingResponse(generate(), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=trades.csv"})
+
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(dict(zip(database.TRADE_COLUMNS, row))) + "\n"
+    return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
+
+@app.get("/get-metrics", response_model=Dict[str, Any])
+async def get_metrics(username: str = Depends(authenticate_user), bot=Depends(get_bot)):
+    return {**await call_bot(bot.get_metrics), "websocket": broadcaster.stats(), "startup": startup_timings}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(username: str = Depends(authenticate_user)):
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ölçümler kapalı.")
+    # Birden çok web işçisi aynı seriyi üretir; her işçinin serileri kendi `worker` etiketini taşır
+    texts = [metrics.render_prometheus(process="web", worker=str(os.getpid()))]
+    if BOT_MODE == "remote" and bot_instance is not None:
+        # Botun sıcak yol ölçümleri (sinyal, emir, veritabanı yazımı) bot sürecindedir
+        try:
+            texts.append(await bot_instance.render_metrics())
+        except (BotUnavailableError, BotCommandError) as e:
+            print(f"Bot ölçümleri alınamadı: {e}")
+    return PlainTextResponse(metrics.merge_prometheus(*texts), media_type="text/plain; version=0.0.4")
 
 # --- 5. UYGULAMA BAŞLATICI ---
 if __name__ == "__main__":
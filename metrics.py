@@ -0,0 +1,224 @@
+import os
+import asyncio
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Any, Callable, Tuple
+
+# METRICS_ENABLED=false iken tüm ölçümler boş nesnelere gider; sıcak yolda yalnızca bir no-op çağrı kalır
+ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+# Prometheus histogram kova sınırları (saniye)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """
+    Son `maxlen` gecikme örneğini (saniye) tutar ve milisaniye cinsinden özet üretir. Ayrıca
+    Prometheus için başlangıçtan beri birikimli kova sayaçlarını tutar.
+    """
+
+    def __init__(self, name: str, maxlen: int = 1000, labels: Labels = ()) -> None:
+        self.name = name
+        self.labels = labels
+        self._samples = deque(maxlen=maxlen)
+        self._buckets = [0] * (len(BUCKETS) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._buckets[bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.total
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": count,
+            "avg_ms": total / count * 1000,
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+
+    def buckets(self) -> Tuple[list, int, float]:
+        with self._lock:
+            return list(self._buckets), self.count, self.total
+
+
+class Counter:
+    def __init__(self, name: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _NullMetric:
+    """Ölçüm kapalıyken dönen, hiçbir şey yapmayan nesne."""
+
+    count = 0
+
+    def observe(self, seconds: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": 0}
+
+
+_NULL = _NullMetric()
+_registry: Dict[Tuple[str, Labels], LatencyHistogram] = {}
+_counters: Dict[Tuple[str, Labels], Counter] = {}
+# Değeri yalnızca okunurken hesaplanan göstergeler (kuyruk derinlikleri vb.)
+_gauges: Dict[str, Callable[[], float]] = {}
+# Değeri okunurken hesaplanan, yalnızca artan sayaçlar (başka bir nesnenin tuttuğu toplamlar)
+_counter_funcs: Dict[str, Callable[[], float]] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, **labels: str) -> LatencyHistogram:
+    """Verilen isim ve etiketlerdeki histogramı döndürür, yoksa oluşturur."""
+    if not ENABLED:
+        return _NULL
+    key = (name, tuple(sorted(labels.items())))
+    h = _registry.get(key)
+    if h is None:
+        with _registry_lock:
+            h = _registry.setdefault(key, LatencyHistogram(name, labels=key[1]))
+    return h
+
+
+def counter(name: str, **labels: str) -> Counter:
+    if not ENABLED:
+        return _NULL
+    key = (name, tuple(sorted(labels.items())))
+    c = _counters.get(key)
+    if c is None:
+        with _registry_lock:
+            c = _counters.setdefault(key, Counter(name, labels=key[1]))
+    return c
+
+
+def register_gauge(name: str, func: Callable[[], float]) -> None:
+    """`/metrics` okunurken çağrılacak bir gösterge fonksiyonu kaydeder."""
+    if ENABLED:
+        with _registry_lock:
+            _gauges[name] = func
+
+
+def register_counter(name: str, func: Callable[[], float]) -> None:
+    """
+    Yalnızca artan bir toplamı okuyan fonksiyonu sayaç olarak kaydeder; `/metrics` çıktısında
+    `<name>_total` adıyla ve counter tipiyle yer alır (Prometheus `rate()` ve sıfırlanma tespiti için).
+    """
+    if ENABLED:
+        with _registry_lock:
+            _counter_funcs[name] = func
+
+
+def _label_text(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+def snapshot_all() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        items = list(_registry.items())
+    return {name + _label_text(labels): h.snapshot() for (name, labels), h in items}
+
+
+def render_prometheus(**constant_labels: str) -> str:
+    """
+    Tüm ölçümleri Prometheus metin biçiminde (0.0.4) döndürür. `constant_labels` her seriye eklenir
+    (örn. process="bot"); böylece farklı süreçlerin çıktıları `merge_prometheus` ile birleştirilebilir.
+    """
+    with _registry_lock:
+        histograms = sorted(_registry.items())
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        counter_funcs = sorted(_counter_funcs.items())
+    constant = tuple(sorted(constant_labels.items()))
+
+    lines = []
+    typed = set()
+    for (name, labels), h in histograms:
+        metric = f"{name}_seconds"
+        labels = constant + labels
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        bucket_counts, count, total = h.buckets()
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, bucket_counts):
+            cumulative += bucket_count
+            lines.append(f"{metric}_bucket{_label_text(labels + (('le', str(bound)),))} {cumulative}")
+        lines.append(f"{metric}_bucket{_label_text(labels + (('le', '+Inf'),))} {count}")
+        lines.append(f"{metric}_sum{_label_text(labels)} {total}")
+        lines.append(f"{metric}_count{_label_text(labels)} {count}")
+    for (name, labels), c in counters:
+        metric = f"{name}_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_label_text(constant + labels)} {c.value}")
+    for name, func in counter_funcs:
+        try:
+            value = float(func())
+        except Exception:
+            continue
+        lines.append(f"# TYPE {name}_total counter")
+        lines.append(f"{name}_total{_label_text(constant)} {value}")
+    for name, func in gauges:
+        try:
+            value = float(func())
+        except Exception:
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{_label_text(constant)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_prometheus(*texts: str) -> str:
+    """
+    Birden çok `render_prometheus` çıktısını tek çıktıda birleştirir. Aynı ölçüm ailesi birden çok
+    süreçte bulunabilir; metin biçimi her ailenin tek `# TYPE` satırı altında toplanmasını ister.
+    """
+    families: Dict[str, list] = {}
+    current = None
+    for text in texts:
+        for line in text.splitlines():
+            if line.startswith('# TYPE '):
+                name = line.split()[2]
+                current = families.get(name)
+                if current is None:
+                    current = families[name] = [line]
+            elif line and current is not None:
+                current.append(line)
+    return "\n".join(line for family in families.values() for line in family) + "\n"
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Olay döngüsünün gecikmesini, planlanan uyanma zamanından sapma olarak ölçer."""
+    loop = asyncio.get_running_loop()
+    lag = histogram('event_loop_lag')
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, loop.time() - expected))
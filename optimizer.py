@@ -0,0 +1,128 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, load_klines, simulate, summarize
+from config import load_strategy_configs
+from kline_buffer import COLUMNS
+
+# İşçi süreç durumu: paylaşılan bellekteki mum verisi ve parametre kombinasyonları arasında
+# paylaşılan indikatör önbelleği (aynı EMA uzunluğu bir kez hesaplanır)
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_df: Optional[pd.DataFrame] = None
+_worker_cache: Dict = {}
+
+
+def _init_worker(shm_name: str, shape: tuple) -> None:
+    global _worker_shm, _worker_df
+    # Havuz işçileri (fork, spawn ve forkserver) ana sürecin kaynak izleyicisini paylaşır; blok
+    # yeniden kaydedilmez ve izleyiciden çıkarılmamalıdır, silme ana süreçteki unlink ile yapılır
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_df = pd.DataFrame(data, columns=COLUMNS, copy=False)
+
+
+def _evaluate_chunk(strategy_name: str, base_config: Dict[str, Any], combos: List[Dict[str, Any]],
+                    sim_kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    module = STRATEGIES[strategy_name]
+    rows = []
+    for params in combos:
+        config = {**base_config, **params}
+        signals, atr = module.get_signals(_worker_df, config, cache=_worker_cache)
+        trades = simulate(_worker_df, signals, atr, config, **sim_kwargs)
+        rows.append({**params, **summarize(trades)})
+    return rows
+
+
+def parameter_combinations(space: Dict[str, List[Any]], samples: Optional[int] = None,
+                           seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Izgara araması için tüm kombinasyonları, `samples` verilirse ızgaradan tekrarsız rastgele
+    seçilmiş kombinasyonları döndürür. Izgara bellekte açılmadan indekslerle örneklenir.
+    """
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = int(np.prod(sizes))
+    if samples is None or samples >= total:
+        return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    rng = np.random.default_rng(seed)
+    flat = rng.choice(total, size=samples, replace=False)
+    return [
+        {name: space[name][int(i)] for name, i in zip(names, np.unravel_index(index, sizes))}
+        for index in flat
+    ]
+
+
+def optimize(df: pd.DataFrame, strategy_name: str, space: Dict[str, List[Any]],
+             base_config: Optional[Dict[str, Any]] = None, samples: Optional[int] = None,
+             workers: Optional[int] = None, sort_by: str = 'total_pnl', seed: int = 0,
+             **sim_kwargs) -> pd.DataFrame:
+    """
+    Parametre kombinasyonlarını bir süreç havuzunda değerlendirir ve `sort_by` metriğine göre
+    sıralanmış sonuç tablosunu döndürür. Mum dizileri işçilere kopyalanmaz; paylaşılan bellekten
+    okunur. İşler, aynı indikatörleri paylaşan kombinasyonlar aynı işçiye düşecek şekilde bölünür.
+    """
+    base_config = base_config or load_strategy_configs()[strategy_name]
+    combos = parameter_combinations(space, samples, seed)
+    # Önbellek isabetini artırmak için kombinasyonları parametre değerlerine göre sırala
+    combos.sort(key=lambda c: tuple(str(c[name]) for name in space))
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, -(-len(combos) // (workers * 4)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    data = np.ascontiguousarray(df[COLUMNS].to_numpy(dtype=np.float64))
+    shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, data.shape)) as executor:
+            futures = [executor.submit(_evaluate_chunk, strategy_name, base_config, chunk, sim_kwargs)
+                       for chunk in chunks]
+            rows = [row for future in futures for row in future.result()]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(sort_by, ascending=False).reset_index(drop=True)
+
+
+def _parse_space(items: List[str]) -> Dict[str, List[Any]]:
+    space = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        space[name] = [float(v) if '.' in v else int(v) for v in values.split(',')]
+    return space
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strateji parametre optimizasyonu")
+    parser.add_argument("path", help="Kline CSV ya da Parquet dosyası")
+    parser.add_argument("--strategy", default="KadirV2", choices=list(STRATEGIES))
+    parser.add_argument("--param", action="append", default=[],
+                        help="Parametre değerleri, örn. ema_length_fast=5,9,12 (tekrarlanabilir)")
+    parser.add_argument("--samples", type=int, default=None, help="Rastgele arama için örnek sayısı")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sort-by", default="total_pnl")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--risk-mode", default="atr")
+    parser.add_argument("--roi", type=float, default=2.0, help="Sabit ROI hedefi (%%)")
+    parser.add_argument("--leverage", type=int, default=10)
+    args = parser.parse_args()
+
+    klines = load_klines(args.path)
+    started = time.perf_counter()
+    table = optimize(klines, args.strategy, _parse_space(args.param), samples=args.samples,
+                     workers=args.workers, sort_by=args.sort_by, risk_mode=args.risk_mode,
+                     fixed_roi_tp=args.roi / 100, leverage=args.leverage)
+    print(f"{len(table)} kombinasyon {time.perf_counter() - started:.1f} sn'de değerlendirildi.")
+    print(table.head(args.top).to_string())
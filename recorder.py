@@ -0,0 +1,250 @@
+import os
+import gzip
+import json
+import time
+import zlib
+import struct
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'KREC1\n'
+# Kayıt başlığı: alış zamanı (ns), akış adı uzunluğu, yük uzunluğu
+HEADER = struct.Struct('<QHI')
+# Birleşik soketten gelen mesajlar bu önekle kaydedilir; tekrar oynatmada yalnızca
+# birleşik abonelere, öneksizler yalnızca tekil abonelere gönderilir
+MULTIPLEX_PREFIX = 'mux:'
+# Oturum başında kaydedilen ayarlar; tekrar oynatmada bot aynı ayarlarla kurulur (API anahtarları hariç)
+SESSION_ENV_PREFIXES = ('TRADING_', 'KADIRV2_', 'SCALPER_', 'SCREENER_', 'KLINE_BUFFER_SIZE', 'UI_')
+# 'control' kayıtlarıyla tekrar oynatılabilen TradingBot komutları
+CONTROL_METHODS = frozenset((
+    'start_strategy_loop', 'stop_strategy_loop', 'set_leverage', 'set_quantity', 'manual_trade',
+    'close_current_position', 'update_symbol', 'set_risk_mode', 'set_strategy',
+))
+
+
+class SessionRecorder:
+    """
+    Websocket mesajlarını alış zamanlarıyla sıkıştırılmış, dönen ikili dosyalara yazar.
+    `record` sıcak yolda yalnızca zaman damgası alıp mesajı bir kuyruğa ekler; JSON'a çevirme,
+    sıkıştırma ve disk yazımı arka plandaki yazıcı iş parçacığında yapılır. Kuyruk `max_pending`
+    kaydı aşarsa yeni kayıtlar düşürülür ve sayılır. Dosyalar `flush_interval` saniyede bir
+    eşitlenir (çökmede en fazla bu kadarı kaybolur), `max_bytes` aşılınca yenisine geçilir ve
+    en yeni `max_files` dosya tutulur.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 << 20, max_files: int = 20,
+                 max_pending: int = 100_000, flush_interval: float = 1.0,
+                 log: Callable[[str], None] = print) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._log = log
+        self._pending: deque = deque()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._raw = None
+        self._file = None
+        self._file_seq = 0
+        self.path: Optional[str] = None
+        self.running = False
+        self.recorded = 0
+        self.dropped = 0
+        self.errors = 0
+        self.bytes_written = 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="recorder")
+        self._thread.start()
+
+    def record(self, stream: str, message: Any) -> None:
+        """Mesajı alış zamanıyla kuyruğa ekler; mesaj bu çağrıdan sonra değiştirilmemelidir."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time_ns(), stream, message))
+
+    def _open(self) -> None:
+        self._file_seq += 1
+        name = f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self._file_seq:04d}.krec.gz"
+        self.path = os.path.join(self.directory, name)
+        self._raw = open(self.path, 'wb')
+        # Hız için en düşük sıkıştırma düzeyi; kline mesajları yine de ~8-10 kat küçülür
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=1)
+        self._file.write(MAGIC)
+        self._prune()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+    def _prune(self) -> None:
+        for path in session_files(self.directory)[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                self._log(f"Eski kayıt dosyası silinemedi ({path}): {e}")
+
+    def _write(self, batch: List[Tuple[int, str, Any]]) -> None:
+        if self._file is None:
+            self._open()
+        chunks = []
+        for recv_ns, stream, message in batch:
+            try:
+                payload = json.dumps(message, separators=(',', ':')).encode()
+            except (TypeError, ValueError) as e:
+                self.errors += 1
+                self._log(f"Kayıt serileştirilemedi ({stream}): {e}")
+                continue
+            name = stream.encode()
+            chunks.append(HEADER.pack(recv_ns, len(name), len(payload)))
+            chunks.append(name)
+            chunks.append(payload)
+        data = b''.join(chunks)
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.recorded += len(chunks) // 3
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            stopping = not self.running
+            self._wakeup.wait(0.05)
+            batch = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            try:
+                if batch:
+                    self._write(batch)
+                if self._file is not None and time.monotonic() - last_flush >= self.flush_interval:
+                    # Eşitleme noktası: dosya kapanmadan da buraya kadar olan kayıtlar okunabilir
+                    self._file.flush(zlib.Z_SYNC_FLUSH)
+                    self._raw.flush()
+                    last_flush = time.monotonic()
+                    if self._raw.tell() >= self.max_bytes:
+                        self._close()
+            except OSError as e:
+                self.errors += 1
+                self._log(f"Oturum kaydı yazılamadı: {e}")
+                self._close()
+            if stopping and not self._pending:
+                break
+        self._close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Kuyruktakileri yazıp dosyayı kapatır."""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "recorded": self.recorded,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "bytes": self.bytes_written,
+        }
+
+
+class RecordingSocketManager:
+    """
+    Soket yöneticisini saran ve abonelik geri çağrılarına gelen her mesajı, işlenmeden önce
+    kayıt cihazına bırakan vekil. Akış adları `sim_exchange.SocketRouter` ile aynıdır; böylece
+    kayıt aynı abonelik çağrılarıyla tekrar oynatılabilir. Diğer tüm öznitelikler sarılan
+    yöneticiye iletilir.
+    """
+
+    def __init__(self, inner, recorder: SessionRecorder) -> None:
+        self.inner = inner
+        self.recorder = recorder
+
+    def __getattr__(self, name: str):
+        return getattr(self.inner, name)
+
+    def _wrap(self, stream: str, callback: Callable) -> Callable:
+        record = self.recorder.record
+
+        def recorded(msg):
+            record(stream, msg)
+            return callback(msg)
+        return recorded
+
+    def start_kline_socket(self, callback: Callable, symbol: str, interval: str, **params) -> str:
+        stream = f"{symbol.lower()}@kline_{interval}"
+        return self.inner.start_kline_socket(callback=self._wrap(stream, callback), symbol=symbol,
+                                             interval=interval, **params)
+
+    def start_kline_futures_socket(self, callback: Callable, symbol: str, interval: str, **params) -> str:
+        stream = f"{symbol.lower()}@kline_{interval}"
+        return self.inner.start_kline_futures_socket(callback=self._wrap(stream, callback), symbol=symbol,
+                                                     interval=interval, **params)
+
+    def start_symbol_mark_price_socket(self, callback: Callable, symbol: str, **params) -> str:
+        stream = f"{symbol.lower()}@markPrice"
+        return self.inner.start_symbol_mark_price_socket(callback=self._wrap(stream, callback), symbol=symbol,
+                                                         **params)
+
+    def start_futures_user_socket(self, callback: Callable) -> str:
+        return self.inner.start_futures_user_socket(callback=self._wrap('user', callback))
+
+    def start_futures_multiplex_socket(self, callback: Callable, streams: List[str]) -> str:
+        record = self.recorder.record
+
+        def recorded(msg):
+            if isinstance(msg, dict) and 'stream' in msg:
+                record(MULTIPLEX_PREFIX + msg['stream'], msg.get('data'))
+            return callback(msg)
+        return self.inner.start_futures_multiplex_socket(callback=recorded, streams=streams)
+
+
+def session_files(directory: str) -> List[str]:
+    """Dizindeki kayıt dosyaları, eskiden yeniye sıralı."""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith('.krec.gz'))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in names]
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Tuple[int, str, Any]]:
+    """
+    Kayıt dosyalarındaki (alış zamanı ns, akış, mesaj) üçlülerini sırayla döndürür. Dizin
+    verilirse içindeki tüm dosyalar okunur. Düzgün kapanmamış dosyalar son eşitleme
+    noktasına kadar okunur.
+    """
+    files: List[str] = []
+    for path in paths:
+        files.extend(session_files(path) if os.path.isdir(path) else [path])
+    for path in files:
+        with gzip.open(path, 'rb') as f:
+            try:
+                if f.read(len(MAGIC)) != MAGIC:
+                    print(f"{path} bir oturum kaydı değil, atlanıyor.")
+                    continue
+                while True:
+                    header = f.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        break
+                    recv_ns, name_len, payload_len = HEADER.unpack(header)
+                    stream = f.read(name_len).decode()
+                    payload = f.read(payload_len)
+                    if len(payload) < payload_len:
+                        break
+                    yield recv_ns, stream, json.loads(payload)
+            except (EOFError, zlib.error):
+                # Yarım kalmış son blok
+                continue
@@ -0,0 +1,285 @@
+"""
+Kaydedilmiş websocket oturumlarını (bkz. recorder.py) TradingBot'a yeniden oynatma aracı.
+
+    python replay.py data/sessions                  # dizindeki tüm kayıtları en yüksek hızda oynat
+    python replay.py data/sessions --speed 1        # özgün hızda oynat
+    python replay.py session-....krec.gz --runs 3   # üç kez oynatıp karar özetlerini karşılaştır
+
+Bot, oturum başında kaydedilen ayarlarla ve gerçek borsa yerine kayıttaki geçmiş mumları ve
+hesap görüntülerini döndüren bir istemciyle kurulur; verilen emirler borsaya gitmez, yalnızca
+listelenir. Mesajlar kayıttaki sırayla tek iş parçacığından gönderilir ve her mesajdan sonra
+olay kuyruğunun ve çoklu sembol yuvalarının boşalması beklenir. Böylece aynı kayıt her
+çalıştırmada aynı kararları üretir; rapordaki `decision_digest` çalıştırmalar ya da sürümler
+arasında karşılaştırılabilir. Hız yalnızca mesajlar arasındaki beklemeyi etkiler.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from kline_buffer import COLUMNS
+from recorder import read_records, MULTIPLEX_PREFIX, CONTROL_METHODS
+from sim_exchange import SocketRouter
+
+
+class RecordedKlines:
+    """Kayıttaki, depodan doldurulmuş (yalnızca kapanmış mumlu) tamponları `KlineStore.warm` gibi sunar."""
+
+    def __init__(self, seeds: Dict[str, Dict[str, Any]]) -> None:
+        self.seeds = seeds
+
+    def warm(self, client, symbol: str, interval: str, n: int) -> np.ndarray:
+        seed = self.seeds.get(f"{symbol.lower()}@kline_{interval}")
+        if seed is None or not seed['closed']:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        return np.asarray(seed['rows'], dtype=np.float64)[-n:]
+
+
+class ReplayClient:
+    """
+    Kayıttan beslenen istemci. Geçmiş mum istekleri kaydedilen tampon içerikleriyle, hesap ve
+    exchange info istekleri oynatma imlecindeki son kaydedilen yanıtla karşılanır. Emir (toplu emir
+    dahil), iptal ve kaldıraç çağrıları `orders` listesine eklenir ve sahte bir yanıt döner.
+    """
+
+    # `kline_store.store_for` paylaşılan depo yerine `kline_store`'u kullanır
+    simulated = True
+
+    def __init__(self, seeds: Dict[str, Dict[str, Any]], snapshot: Optional[Dict[str, Any]] = None,
+                 exchange_info: Optional[Dict[str, Any]] = None) -> None:
+        self.seeds = seeds
+        self.kline_store = RecordedKlines(seeds)
+        self.exchange_info = exchange_info or {'symbols': []}
+        self.snapshot = snapshot or {'account': {'assets': [], 'positions': []},
+                                     'open_orders': [], 'positions': []}
+        self.orders: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _submit(self, call: str, params: Dict[str, Any]) -> int:
+        with self._lock:
+            self.orders.append({'call': call, **params})
+            return len(self.orders)
+
+    def futures_klines(self, symbol: str, interval: str, limit: int = 500, **params) -> List[List[Any]]:
+        seed = self.seeds.get(f"{symbol.lower()}@kline_{interval}")
+        return [] if seed is None else seed['rows'][-limit:]
+
+    def futures_exchange_info(self, **params) -> Dict[str, Any]:
+        return self.exchange_info
+
+    def futures_account(self, **params) -> Dict[str, Any]:
+        return self.snapshot['account']
+
+    def futures_get_open_orders(self, **params) -> List[Dict[str, Any]]:
+        return self.snapshot['open_orders']
+
+    def futures_position_information(self, symbol: Optional[str] = None, **params) -> List[Dict[str, Any]]:
+        return [p for p in self.snapshot['positions'] if symbol is None or p.get('symbol') == symbol]
+
+    def futures_create_order(self, **params) -> Dict[str, Any]:
+        order_id = self._submit('futures_create_order', params)
+        return {'orderId': order_id, 'symbol': params.get('symbol'), 'side': params.get('side'),
+                'type': params.get('type'), 'origQty': str(params.get('quantity', 0)), 'status': 'NEW'}
+
+    def futures_place_batch_order(self, batchOrders: List[Dict[str, Any]], **params) -> List[Dict[str, Any]]:
+        return [self.futures_create_order(**order) for order in batchOrders]
+
+    def futures_cancel_order(self, **params) -> Dict[str, Any]:
+        self._submit('futures_cancel_order', params)
+        return {'orderId': params.get('orderId'), 'status': 'CANCELED'}
+
+    def futures_cancel_all_open_orders(self, **params) -> Dict[str, Any]:
+        self._submit('futures_cancel_all_open_orders', params)
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def futures_change_leverage(self, **params) -> Dict[str, Any]:
+        self._submit('futures_change_leverage', params)
+        return {'symbol': params.get('symbol'), 'leverage': params.get('leverage')}
+
+
+class RecordedSocketManager(SocketRouter):
+    """
+    Kayıttaki mesajları, abonelik adlarına göre bota gönderen soket yöneticisi. `run` çağıranın
+    iş parçacığında çalışır; `speed` özgün aralıkların kaç kat hızlı oynatılacağıdır (0: beklemesiz).
+    'control' kayıtları bot komutu olarak, 'rest:reconcile' kayıtları hesap görüntüsü, 'rest:exchange_info'
+    kayıtları sembol emir kuralları olarak uygulanır.
+    """
+
+    def __init__(self, records: List[Tuple[int, str, Any]], client: ReplayClient, speed: float = 0.0,
+                 log: Callable[[str], None] = print) -> None:
+        super().__init__(autostart=False, log=log)
+        self.records = records
+        self.client = client
+        self.speed = speed
+        self.bot = None
+        self.latencies: List[int] = []
+
+    def _wait_idle(self) -> None:
+        self.bot.dispatcher.wait_idle()
+        if self.bot.runner:
+            self.bot.runner.wait_idle()
+        self.bot.wait_background_idle()
+
+    def _apply(self, stream: str, message: Any) -> None:
+        if stream == 'control':
+            method = message.get('method')
+            if method not in CONTROL_METHODS:
+                self._log(f"Bilinmeyen komut kaydı atlandı: {method}")
+                return
+            getattr(self.bot, method)(*message.get('args', ()))
+        elif stream == 'rest:reconcile':
+            self.client.snapshot = message
+            self.bot.account.apply_account_snapshot(message['account'])
+            self.bot.account.apply_open_orders_snapshot(message['open_orders'])
+            self.bot.account.apply_position_snapshot(message['positions'])
+        elif stream == 'rest:exchange_info':
+            self.client.exchange_info = message
+            self.bot.symbol_filters.load(message)
+        elif stream.startswith(MULTIPLEX_PREFIX):
+            self._deliver(stream[len(MULTIPLEX_PREFIX):], message, multiplex_only=True)
+        else:
+            self._deliver(stream, message, multiplex_only=False)
+
+    def run(self) -> None:
+        if not self.records:
+            self.finished.set()
+            return
+        started = time.perf_counter()
+        first_ns = self.records[0][0]
+        clock = time.perf_counter_ns
+        for recv_ns, stream, message in self.records:
+            if self._stop.is_set():
+                break
+            if self.speed > 0:
+                delay = started + (recv_ns - first_ns) / 1e9 / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            began = clock()
+            try:
+                self._apply(stream, message)
+            except Exception as e:
+                self.errors += 1
+                self._log(f"Kayıt oynatılırken hata ({stream}): {e}")
+            # Sonraki mesajdan önce bu mesajın tetiklediği tüm değerlendirmeler bitmeli
+            self._wait_idle()
+            self.latencies.append(clock() - began)
+        self.wall_seconds = time.perf_counter() - started
+        self.finished.set()
+
+
+def _decision_digest(orders: List[Dict[str, Any]], signals: Dict[str, Any]) -> str:
+    payload = json.dumps({'orders': orders, 'signals': signals}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay_session(paths: List[str], speed: float = 0.0, ready_timeout: float = 10.0,
+                   log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Kayıtları yeni bir TradingBot'a oynatıp performans ve karar özetini döndürür. İşlem
+    günlüğü geçici bir dosyaya yazılır; veritabanına yazılmaması için DATABASE_URL çağırandan
+    önce ayarlanmalıdır (komut satırı aracı bunu geçici bir SQLite dosyasıyla yapar).
+    """
+    records = list(read_records(paths))
+    env: Dict[str, str] = {}
+    seeds: Dict[str, Dict[str, Any]] = {}
+    snapshot = None
+    exchange_info = None
+    events = []
+    for record in records:
+        stream, message = record[1], record[2]
+        if stream == 'session':
+            env = env or message.get('env', {})
+        elif stream.startswith('seed:'):
+            seeds.setdefault(stream[len('seed:'):], message)
+        else:
+            if stream == 'rest:reconcile' and snapshot is None:
+                snapshot = message
+            elif stream == 'rest:exchange_info' and exchange_info is None:
+                exchange_info = message
+            events.append(record)
+
+    overrides = dict(env)
+    overrides.update({
+        # Anahtar gerektirmeyen kurulum; istemci ve soket yöneticisi aşağıda verilir
+        'TRADING_MODE': 'paper',
+        'RECORD_DIR': '',
+        # Yuvalar tek işçide, sırayla değerlendirilir
+        'TRADING_RUNNER_WORKERS': '1',
+        # Uzlaştırmalar yalnızca kayıttaki sırayla uygulanır
+        'ACCOUNT_RECONCILE_SECONDS': '1e9',
+        'TRADE_JOURNAL_PATH': os.path.join(tempfile.mkdtemp(prefix="replay-"), 'journal.ndjson'),
+    })
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        from trading_bot import TradingBot
+        client = ReplayClient(seeds, snapshot, exchange_info)
+        manager = RecordedSocketManager(events, client, speed=speed, log=log)
+        bot = TradingBot(client=client, socket_manager=manager)
+        manager.bot = bot
+        deadline = time.time() + ready_timeout
+        # İlk uzlaştırma ve kullanıcı akışı aboneliği bot içindeki iş parçacığında yapılır
+        while not (bot.account.synced and bot._user_socket) and time.time() < deadline:
+            time.sleep(0.01)
+        try:
+            manager.run()
+        finally:
+            bot.stop_all()
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    signals = {f"{symbol}/{strategy_name}": engine.last for (symbol, strategy_name), engine in bot.signal_engines.items()}
+    if bot.runner:
+        for row in bot.runner.status():
+            signals[f"runner:{row['symbol']}/{row['strategy']}"] = row['signal']
+    latencies = np.array(manager.latencies or [0], dtype=np.float64) / 1e3
+    return {
+        'records': len(records),
+        'events': len(events),
+        'messages': manager.messages,
+        'errors': manager.errors,
+        'wall_seconds': round(manager.wall_seconds, 3),
+        'events_per_sec': round(len(events) / manager.wall_seconds, 1) if manager.wall_seconds else None,
+        'p50_us': round(float(np.percentile(latencies, 50)), 1),
+        'p99_us': round(float(np.percentile(latencies, 99)), 1),
+        'orders': len(client.orders),
+        'decision_digest': _decision_digest(client.orders, signals),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Kaydedilmiş websocket oturumlarını tekrar oynatır")
+    parser.add_argument('paths', nargs='+', help="Kayıt dosyaları ya da kayıt dizinleri")
+    parser.add_argument('--speed', type=float, default=0.0, help="Özgün hızın katı; 0 beklemesiz (varsayılan)")
+    parser.add_argument('--runs', type=int, default=1, help="Kaç kez oynatılacağı; özetler karşılaştırılır")
+    parser.add_argument('--output', help="Raporları ayrıca bu JSON dosyasına yaz")
+    args = parser.parse_args()
+
+    # Tekrar oynatmada açılan işlemler gerçek veritabanına yazılmasın
+    db_dir = tempfile.mkdtemp(prefix="replay-db-")
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'replay.db')}"
+
+    reports = [replay_session(args.paths, speed=args.speed) for _ in range(args.runs)]
+    print(json.dumps(reports, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    if len({r['decision_digest'] for r in reports}) > 1:
+        print("UYARI: Çalıştırmalar farklı kararlar üretti, tekrar oynatma deterministik değil.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,386 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Callable, Tuple
+
+import metrics
+
+# Binance USDⓈ-M futures için dakika başına istek ağırlığı sınırı
+DEFAULT_WEIGHT_LIMIT = 2400
+
+# Emir/ayar değiştiren çağrılar: kuyruğa girmez, önbelleğe alınmaz, tüm okuma önbelleğini geçersiz kılar
+WRITE_PREFIXES = ('futures_create', 'futures_cancel', 'futures_change', 'futures_place',
+                  'create_', 'cancel_', 'order_')
+# Ağ geçidi üzerinden yönetilen çağrılar; listenKey gibi akış çağrıları doğrudan geçer
+REST_PREFIXES = ('futures_', 'get_') + WRITE_PREFIXES
+PASSTHROUGH_PREFIXES = ('futures_stream_',)
+
+# Okuma çağrıları için saniye cinsinden önbellek süreleri (listede olmayanlar önbelleğe alınmaz)
+DEFAULT_TTLS = {
+    'futures_exchange_info': 300.0,
+    'futures_ticker': 2.0,
+    'futures_orderbook_ticker': 1.0,
+    'futures_symbol_ticker': 1.0,
+    'futures_mark_price': 1.0,
+    'futures_account': 1.0,
+    'futures_account_balance': 1.0,
+    'futures_position_information': 1.0,
+    'futures_get_open_orders': 1.0,
+}
+
+
+def estimate_weight(name: str, params: Dict[str, Any]) -> int:
+    """Binance dokümantasyonundaki ağırlıklara göre bir çağrının yaklaşık ağırlığı."""
+    if name == 'futures_klines':
+        limit = int(params.get('limit', 500))
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    if name in ('futures_ticker', 'futures_get_open_orders'):
+        return 1 if 'symbol' in params else 40
+    if name in ('futures_orderbook_ticker', 'futures_symbol_ticker'):
+        return 1 if 'symbol' in params else 2
+    if name in ('futures_account', 'futures_position_information'):
+        return 5
+    if name == 'futures_place_batch_order':
+        return 5
+    return 1
+
+
+class RestGateway:
+    """
+    `Client` önüne konan vekil. Kullanılan ağırlık yanıt başlıklarından (`x-mbx-used-weight-1m`)
+    izlenir; okumalar sınırlı bir iş parçacığı havuzunda, sınırın `read_ratio` kadarına kadar
+    çalıştırılır ve bütçe dolunca dakika sıfırlanana kadar bekletilir. Emirler kuyruğa girmeden
+    çağıran iş parçacığında çalışır ve tüm sınırı kullanabilir; böylece okuma yükü emir
+    gecikmesini etkilemez. Aynı anda yapılan özdeş okumalar tek çağrıda birleştirilir, kısa
+    süreli sonuçlar önbellekte tutulur. 429/418 yanıtlarında `Retry-After` süresince tüm
+    çağrılar bekletilir.
+
+    Önbellekten dönen nesneler çağıranlar arasında paylaşılır; değiştirilmemelidir.
+    """
+
+    def __init__(self, client, weight_limit: int = DEFAULT_WEIGHT_LIMIT, read_ratio: float = 0.8,
+                 max_workers: int = 4, ttls: Optional[Dict[str, float]] = None,
+                 log: Callable[[str], None] = print) -> None:
+        self._client = client
+        self.weight_limit = weight_limit
+        self.read_limit = int(weight_limit * read_ratio)
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self._log = log
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rest")
+        self._minute = int(time.time() // 60)
+        self._used = 0
+        self._blocked_until = 0.0
+        self._generation = 0
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.rate_limited = 0
+
+        session = getattr(client, 'session', None)
+        if session is not None:
+            session.hooks['response'].append(self._on_response)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr) or not name.startswith(REST_PREFIXES) or name.startswith(PASSTHROUGH_PREFIXES):
+            return attr
+        if name.startswith(WRITE_PREFIXES):
+            return lambda **params: self._write(name, attr, params)
+        return lambda **params: self._read(name, attr, params)
+
+    # --- Ağırlık takibi ---
+
+    def _on_response(self, response, *args, **kwargs) -> None:
+        used = response.headers.get('x-mbx-used-weight-1m')
+        with self._cond:
+            if used is not None:
+                self._roll_minute(time.time())
+                self._used = max(self._used, int(used))
+            if response.status_code in (418, 429):
+                retry_after = float(response.headers.get('Retry-After', 60))
+                self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+                self.rate_limited += 1
+                metrics.counter('rest_rate_limited').inc()
+                self._log(f"Binance istek sınırı aşıldı ({response.status_code}), "
+                          f"{retry_after:.0f} sn boyunca istekler bekletilecek.")
+            self._cond.notify_all()
+
+    def _roll_minute(self, now: float) -> None:
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self._used = 0
+
+    def _reserve(self, weight: int, limit: int) -> None:
+        """Ağırlık bütçesi uygun olana kadar bekler ve ağırlığı ayırır."""
+        throttled = False
+        with self._cond:
+            while True:
+                now = time.time()
+                self._roll_minute(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._used + weight <= limit:
+                    self._used += weight
+                    return
+                else:
+                    wait = (self._minute + 1) * 60 - now
+                    if not throttled:
+                        throttled = True
+                        self.throttled += 1
+                self._cond.wait(min(wait, 1.0))
+
+    # --- Çağrılar ---
+
+    def _write(self, name: str, func: Callable, params: Dict[str, Any]):
+        self._reserve(estimate_weight(name, params), self.weight_limit)
+        started = time.perf_counter()
+        try:
+            return func(**params)
+        finally:
+            metrics.histogram('rest_latency', endpoint=name, kind='order').observe(time.perf_counter() - started)
+            with self._lock:
+                self._generation += 1
+                self._cache.clear()
+
+    def _read(self, name: str, func: Callable, params: Dict[str, Any]):
+        key = (name, tuple(sorted((k, repr(v)) for k, v in params.items())))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.time():
+                self.cache_hits += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+        if leader:
+            self._executor.submit(self._execute_read, key, name, func, params, future)
+        return future.result()
+
+    def _execute_read(self, key: Tuple, name: str, func: Callable, params: Dict[str, Any], future: Future) -> None:
+        try:
+            self._reserve(estimate_weight(name, params), self.read_limit)
+            with self._lock:
+                generation = self._generation
+            started = time.perf_counter()
+            result = func(**params)
+            metrics.histogram('rest_latency', endpoint=name, kind='read').observe(time.perf_counter() - started)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._inflight.pop(key, None)
+            ttl = self.ttls.get(name)
+            # Çağrı sürerken bir emir verildiyse sonuç eskimiş olabilir, önbelleğe alınmaz
+            if ttl and generation == self._generation:
+                self._cache[key] = (time.time() + ttl, result)
+        future.set_result(result)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._roll_minute(time.time())
+            return {
+                "used_weight": self._used,
+                "weight_limit": self.weight_limit,
+                "read_limit": self.read_limit,
+                "inflight": len(self._inflight),
+                "cache_hits": self.cache_hits,
+                "coalesced": self.coalesced,
+                "throttled": self.throttled,
+                "rate_limited": self.rate_limited,
+                "blocked_for": max(0.0, self._blocked_until - time.time()),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class AsyncRestGateway:
+    """
+    `RestGateway`'in `AsyncClient` için asyncio sürümü. Aynı ağırlık bütçesi, okuma birleştirme
+    ve kısa süreli önbellek kurallarını uygular; ancak iş parçacığı havuzu yerine tüm çağrılar
+    olay döngüsünde eş yordam olarak çalışır ve bütçe dolunca `asyncio.sleep` ile beklenir.
+    Kullanılan ağırlık, istemcinin sakladığı son yanıtın başlıklarından okunur. Yalnızca tek
+    bir olay döngüsünden kullanılmalıdır.
+
+    Önbellekten dönen nesneler çağıranlar arasında paylaşılır; değiştirilmemelidir.
+    """
+
+    def __init__(self, client, weight_limit: int = DEFAULT_WEIGHT_LIMIT, read_ratio: float = 0.8,
+                 ttls: Optional[Dict[str, float]] = None, log: Callable[[str], None] = print) -> None:
+        self._client = client
+        self.weight_limit = weight_limit
+        self.read_limit = int(weight_limit * read_ratio)
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self._log = log
+        self._minute = int(time.time() // 60)
+        self._used = 0
+        self._blocked_until = 0.0
+        self._generation = 0
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._last_response = None
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.rate_limited = 0
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr) or not name.startswith(REST_PREFIXES) or name.startswith(PASSTHROUGH_PREFIXES):
+            return attr
+        if name.startswith(WRITE_PREFIXES):
+            return lambda **params: self._write(name, attr, params)
+        return lambda **params: self._read(name, attr, params)
+
+    # --- Ağırlık takibi ---
+
+    def _on_response(self) -> None:
+        response = getattr(self._client, 'response', None)
+        if response is None or response is self._last_response:
+            return
+        self._last_response = response
+        used = response.headers.get('x-mbx-used-weight-1m')
+        if used is not None:
+            self._roll_minute(time.time())
+            self._used = max(self._used, int(used))
+        status_code = getattr(response, 'status', getattr(response, 'status_code', 200))
+        if status_code in (418, 429):
+            retry_after = float(response.headers.get('Retry-After', 60))
+            self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+            self.rate_limited += 1
+            metrics.counter('rest_rate_limited').inc()
+            self._log(f"Binance istek sınırı aşıldı ({status_code}), "
+                      f"{retry_after:.0f} sn boyunca istekler bekletilecek.")
+
+    def _roll_minute(self, now: float) -> None:
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self._used = 0
+
+    async def _reserve(self, weight: int, limit: int) -> None:
+        """Ağırlık bütçesi uygun olana kadar bekler ve ağırlığı ayırır."""
+        throttled = False
+        while True:
+            now = time.time()
+            self._roll_minute(now)
+            if now < self._blocked_until:
+                wait = self._blocked_until - now
+            elif self._used + weight <= limit:
+                self._used += weight
+                return
+            else:
+                wait = (self._minute + 1) * 60 - now
+                if not throttled:
+                    throttled = True
+                    self.throttled += 1
+            await asyncio.sleep(min(wait, 1.0))
+
+    # --- Çağrılar ---
+
+    async def _write(self, name: str, func: Callable, params: Dict[str, Any]):
+        await self._reserve(estimate_weight(name, params), self.weight_limit)
+        started = time.perf_counter()
+        try:
+            return await func(**params)
+        finally:
+            metrics.histogram('rest_latency', endpoint=name, kind='order').observe(time.perf_counter() - started)
+            self._on_response()
+            self._generation += 1
+            self._cache.clear()
+
+    async def _read(self, name: str, func: Callable, params: Dict[str, Any]):
+        key = (name, tuple(sorted((k, repr(v)) for k, v in params.items())))
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.time():
+            self.cache_hits += 1
+            return cached[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Bekleyenlerden biri iptal edilirse ortak çağrı iptal olmasın
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._execute_read(key, name, func, params))
+        self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    async def _execute_read(self, key: Tuple, name: str, func: Callable, params: Dict[str, Any]):
+        try:
+            await self._reserve(estimate_weight(name, params), self.read_limit)
+            generation = self._generation
+            started = time.perf_counter()
+            try:
+                result = await func(**params)
+            finally:
+                self._on_response()
+            metrics.histogram('rest_latency', endpoint=name, kind='read').observe(time.perf_counter() - started)
+        finally:
+            self._inflight.pop(key, None)
+        ttl = self.ttls.get(name)
+        # Çağrı sürerken bir emir verildiyse sonuç eskimiş olabilir, önbelleğe alınmaz
+        if ttl and generation == self._generation:
+            self._cache[key] = (time.time() + ttl, result)
+        return result
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        self._roll_minute(time.time())
+        return {
+            "used_weight": self._used,
+            "weight_limit": self.weight_limit,
+            "read_limit": self.read_limit,
+            "inflight": len(self._inflight),
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+            "blocked_for": max(0.0, self._blocked_until - time.time()),
+        }
+
+    async def shutdown(self) -> None:
+        """Bekleyen okumaları iptal eder ve istemcinin HTTP oturumunu kapatır."""
+        for future in list(self._inflight.values()):
+            future.cancel()
+        close = getattr(self._client, 'close_connection', None)
+        if close is not None:
+            await close()
+
+
+class SyncClientAdapter:
+    """
+    Senkron bir istemciyi (örn. `sim_exchange.SimulatedExchange`) `AsyncClient` arayüzüyle
+    sunar. Çağrılar olay döngüsünde doğrudan çalıştırılır; yalnızca ağ kullanmayan, bellek içi
+    istemciler için uygundur.
+    """
+
+    def __init__(self, client) -> None:
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        async def call(**params):
+            return attr(**params)
+        return call
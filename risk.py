@@ -0,0 +1,17 @@
+from typing import Dict, Any, Tuple
+
+
+def exit_prices(direction, entry_price, atr, config: Dict[str, Any], risk_mode: str = 'atr',
+                fixed_roi_tp: float = 0.02, leverage: int = 10) -> Tuple[Any, Any]:
+    """
+    Giriş fiyatına göre (stop_loss, take_profit) seviyelerini döndürür. `direction` LONG için 1,
+    SHORT için -1'dir; skaler ya da NumPy dizisi olabilir. Stop her zaman ATR tabanlıdır; kâr al
+    'atr' modunda ATR çarpanıyla, diğer modlarda kaldıraçlı sabit ROI hedefiyle hesaplanır.
+    """
+    sl_multiplier = float(config.get('atr_multiplier_sl', 1.5))
+    stop_loss = entry_price - direction * atr * sl_multiplier
+    if risk_mode == 'atr':
+        tp_distance = atr * float(config.get('atr_multiplier_tp', 2 * sl_multiplier))
+    else:
+        tp_distance = entry_price * fixed_roi_tp / leverage
+    return stop_loss, entry_price + direction * tp_distance
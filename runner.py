@@ -0,0 +1,339 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple, Any, Optional
+
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
+
+import metrics
+import strategy as strategy_kadir_v2
+import strategy_scalper
+from kline_buffer import KlineBuffer, OPEN, HIGH, LOW, CLOSE, VOLUME
+from kline_store import seed_buffer, seed_buffer_async
+
+# Tek bir websocket bağlantısında birleştirilecek en fazla akış sayısı
+MAX_STREAMS_PER_SOCKET = 200
+
+
+class StrategySlot:
+    """
+    Tek bir (sembol, strateji, config) yuvası ve ona ait pozisyon durumu. Tek yönlü pozisyon
+    modunda sembol başına tek net pozisyon olduğundan her sembol yalnızca bir yuvaya aittir.
+    """
+
+    def __init__(self, symbol: str, strategy_name: str, config: Dict[str, Any], buffer: KlineBuffer) -> None:
+        module = strategy_scalper if strategy_name == 'Scalper' else strategy_kadir_v2
+        self.symbol = symbol
+        self.strategy_name = strategy_name
+        self.config = config
+        self.buffer = buffer
+        self.engine = module.StreamingSignal(config)
+        self.position_open = False
+        self.current_position = None
+        self.last_evaluated: Optional[int] = None
+        self.busy = threading.Lock()
+
+
+def _close_slot(slot: StrategySlot) -> None:
+    """Yuvanın pozisyonu borsadaki SL/TP emriyle kapandığında çağrılır."""
+    slot.position_open = False
+    slot.current_position = None
+
+
+class MultiSymbolRunner:
+    """
+    Birçok (sembol, strateji) yuvasını tek süreçte çalıştırır. Tüm kline akışları tek bir
+    birleşik futures soketinden gelir, aynı (sembol, zaman dilimi) için tek tampon tutulur ve
+    kapanan mumlarda yuvaların değerlendirmesi sınırlı bir iş parçacığı havuzunda yapılır.
+    """
+
+    def __init__(self, bot, max_workers: int = 4, buffer_size: int = 300) -> None:
+        self.bot = bot
+        self.client = bot.client
+        self.socket_manager = bot.socket_manager
+        self.buffer_size = buffer_size
+        self.buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        self.slots: Dict[Tuple[str, str], List[StrategySlot]] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="slot")
+        self.active = False
+        self._sockets: List[str] = []
+        # Bitmemiş değerlendirmeler (tekrar oynatmada sıralı çalışma için `wait_idle` bekler);
+        # tamamlanan işler havuz iş parçacıklarından çıkarıldığı için kilitle korunur
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    @property
+    def symbols(self) -> List[str]:
+        return [slot.symbol for slots in self.slots.values() for slot in slots]
+
+    def add_slot(self, symbol: str, strategy_name: str, config: Dict[str, Any]) -> StrategySlot:
+        symbol = symbol.upper()
+        if symbol in self.symbols:
+            # İki yuva aynı net pozisyonu paylaşır, birbirinin emirlerini kapatır ya da katlar
+            raise ValueError(f"{symbol} için birden fazla yuva tanımlanamaz.")
+        key = (symbol, config['timeframe'])
+        if key not in self.buffers:
+            self.buffers[key] = KlineBuffer(symbol, config['timeframe'], capacity=self.buffer_size)
+        slot = StrategySlot(symbol, strategy_name, dict(config), self.buffers[key])
+        self.slots.setdefault(key, []).append(slot)
+        return slot
+
+    def _seed(self, key: Tuple[str, str]) -> None:
+        symbol, interval = key
+        buffer = self.buffers[key]
+        try:
+            seed_buffer(buffer, self.client)
+        except Exception as e:
+            self.bot._log(f"{symbol} {interval} geçmiş mum verisi alınamadı: {e}")
+            return
+        self.bot._record_seed(buffer)
+        for slot in self.slots[key]:
+            for row in buffer.closed_window():
+                slot.engine.update(row[OPEN], row[HIGH], row[LOW], row[CLOSE], row[VOLUME])
+
+    def start(self) -> None:
+        if not self._sockets:
+            # Geçmiş veriyi havuz üzerinden (eşzamanlı ama sınırlı) yükle
+            list(self.executor.map(self._seed, list(self.buffers)))
+
+            streams = [f"{symbol.lower()}@kline_{interval}" for symbol, interval in self.buffers]
+            for i in range(0, len(streams), MAX_STREAMS_PER_SOCKET):
+                self._sockets.append(self.socket_manager.start_futures_multiplex_socket(
+                    callback=self._handle_message, streams=streams[i:i + MAX_STREAMS_PER_SOCKET]
+                ))
+        self.active = True
+        self.bot._log(f"Çoklu sembol çalıştırıcısı {sum(len(s) for s in self.slots.values())} yuva ile başladı.")
+
+    def stop(self) -> None:
+        """Değerlendirmeyi durdurur; akışlar ve göstergeler güncel kalmaya devam eder."""
+        self.active = False
+
+    def shutdown(self) -> None:
+        self.active = False
+        for socket_name in self._sockets:
+            self.socket_manager.stop_socket(socket_name)
+        self._sockets = []
+        self.executor.shutdown(wait=False)
+
+    def _handle_message(self, msg: Dict[str, Any]) -> None:
+        data = msg.get('data', msg)
+        if data.get('e') != 'kline':
+            return
+        k = data['k']
+        key = (k['s'], k['i'])
+        buffer = self.buffers.get(key)
+        if buffer is None or not buffer.update_from_message(k):
+            return
+
+        row = buffer.window(1)[0]
+        received_at = time.time()
+        for slot in self.slots[key]:
+            slot.engine.update(row[OPEN], row[HIGH], row[LOW], row[CLOSE], row[VOLUME])
+            if self.active:
+                # Sinyal bu kapanışta sabitlenir; değerlendirme gecikirse sonraki mumun sinyali okunmaz
+                self._schedule(slot, k['T'], slot.engine.last, received_at)
+
+    def _schedule(self, slot: StrategySlot, close_time: int, result: Tuple[str, float], received_at: float) -> None:
+        future = self.executor.submit(self._evaluate, slot, close_time, result, received_at)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard_pending)
+
+    def _discard_pending(self, future) -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    def wait_idle(self) -> None:
+        """Kuyruğa alınmış tüm yuva değerlendirmeleri bitene kadar bekler."""
+        with self._pending_lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def _evaluate(self, slot: StrategySlot, close_time: int, result: Tuple[str, float], received_at: float) -> None:
+        # Aynı yuva için aynı anda tek değerlendirme; her kapanış yalnızca bir kez işlenir
+        if not slot.busy.acquire(blocking=False):
+            return
+        try:
+            if slot.last_evaluated == close_time:
+                return
+            slot.last_evaluated = close_time
+
+            signal, atr = result
+            if signal != 'WAIT' and not slot.position_open:
+                self._open_position(slot, signal, atr)
+                if slot.position_open:
+                    metrics.histogram('decision_latency').observe(time.time() - received_at)
+            elif slot.position_open:
+                self._check_position(slot)
+        except Exception as e:
+            self.bot._log(f"[{slot.symbol}/{slot.strategy_name}] Değerlendirme hatası: {e}")
+        finally:
+            slot.busy.release()
+
+    def _open_position(self, slot: StrategySlot, signal: str, atr: float) -> None:
+        quantity = self.bot.calculate_quantity(self.bot.get_usdt_balance(), slot.symbol)
+        if not quantity:
+            return
+        order = self.client.futures_create_order(
+            symbol=slot.symbol,
+            side=SIDE_BUY if signal == "LONG" else SIDE_SELL,
+            type=ORDER_TYPE_MARKET,
+            quantity=quantity
+        )
+        slot.position_open = True
+        slot.current_position = order
+        self.bot._log(f"[{slot.symbol}/{slot.strategy_name}] {signal} pozisyonu açıldı. Miktar: {quantity}")
+        self.bot.trade_journal.submit({
+            'symbol': slot.symbol,
+            'id': order['orderId'],
+            'side': signal,
+            'realizedPnl': 0,
+            'time': int(time.time() * 1000),
+            'strategy': slot.strategy_name
+        })
+        self.bot.place_bracket(slot.symbol, signal, order, quantity, atr, slot.config,
+                               on_close=lambda: _close_slot(slot))
+
+    def _check_position(self, slot: StrategySlot) -> None:
+        account = self.bot.account
+        if account.synced:
+            if account.get_position(slot.symbol) is not None:
+                return
+        elif any(float(pos['positionAmt']) != 0
+                 for pos in self.client.futures_position_information(symbol=slot.symbol)):
+            return
+        slot.position_open = False
+        slot.current_position = None
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"symbol": slot.symbol, "strategy": slot.strategy_name, "timeframe": slot.config['timeframe'],
+             "candles": len(slot.buffer), "signal": slot.engine.last[0], "position_open": slot.position_open}
+            for slots in self.slots.values() for slot in slots
+        ]
+
+
+class AsyncMultiSymbolRunner(MultiSymbolRunner):
+    """
+    `MultiSymbolRunner`'ın `async_bot.AsyncTradingBot` için sürümü. Geçmiş veri yüklemesi, birleşik
+    akış ve yuva değerlendirmeleri olay döngüsünde çalışır; değerlendirmeler iş parçacığı havuzu
+    yerine görev olarak başlatılır ve aynı anda en fazla `max_workers` tanesi REST beklemesinde olur.
+    """
+
+    def __init__(self, bot, max_workers: int = 4, buffer_size: int = 300) -> None:
+        self.bot = bot
+        self.client = bot.client
+        self.buffer_size = buffer_size
+        self.buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        self.slots: Dict[Tuple[str, str], List[StrategySlot]] = {}
+        self._limit = asyncio.Semaphore(max_workers)
+        self.active = False
+        self._sockets: List[str] = []
+        # Yalnızca olay döngüsünden değiştirildiği için kilit gerekmez
+        self._pending = set()
+
+    async def _seed(self, key: Tuple[str, str]) -> None:
+        symbol, interval = key
+        buffer = self.buffers[key]
+        try:
+            await seed_buffer_async(buffer, self.client)
+        except Exception as e:
+            self.bot._log(f"{symbol} {interval} geçmiş mum verisi alınamadı: {e}")
+            return
+        self.bot._record_seed(buffer)
+        for slot in self.slots[key]:
+            for row in buffer.closed_window():
+                slot.engine.update(row[OPEN], row[HIGH], row[LOW], row[CLOSE], row[VOLUME])
+
+    async def start(self) -> None:
+        if not self._sockets:
+            await asyncio.gather(*(self._seed(key) for key in list(self.buffers)))
+            streams = [f"{symbol.lower()}@kline_{interval}" for symbol, interval in self.buffers]
+            for i in range(0, len(streams), MAX_STREAMS_PER_SOCKET):
+                self._sockets.append(self.bot._open_stream(
+                    'multiplex', self._handle_message, streams=streams[i:i + MAX_STREAMS_PER_SOCKET]
+                ))
+        self.active = True
+        self.bot._log(f"Çoklu sembol çalıştırıcısı {sum(len(s) for s in self.slots.values())} yuva ile başladı.")
+
+    def shutdown(self) -> None:
+        self.active = False
+        for socket_name in self._sockets:
+            self.bot._close_stream(socket_name)
+        self._sockets = []
+
+    def _schedule(self, slot: StrategySlot, close_time: int, result: Tuple[str, float], received_at: float) -> None:
+        task = self.bot.spawn(self._evaluate(slot, close_time, result, received_at))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def wait_idle(self) -> None:
+        """Başlatılmış tüm yuva değerlendirmesi görevleri bitene kadar bekler."""
+        while self._pending:
+            await asyncio.wait(list(self._pending))
+
+    async def _evaluate(self, slot: StrategySlot, close_time: int, result: Tuple[str, float], received_at: float) -> None:
+        if not slot.busy.acquire(blocking=False):
+            return
+        try:
+            if slot.last_evaluated == close_time:
+                return
+            slot.last_evaluated = close_time
+
+            async with self._limit:
+                signal, atr = result
+                if signal != 'WAIT' and not slot.position_open:
+                    await self._open_position(slot, signal, atr)
+                    if slot.position_open:
+                        metrics.histogram('decision_latency').observe(time.time() - received_at)
+                elif slot.position_open:
+                    await self._check_position(slot)
+        except Exception as e:
+            self.bot._log(f"[{slot.symbol}/{slot.strategy_name}] Değerlendirme hatası: {e}")
+        finally:
+            slot.busy.release()
+
+    async def _open_position(self, slot: StrategySlot, signal: str, atr: float) -> None:
+        quantity = self.bot.calculate_quantity(await self.bot.get_usdt_balance(), slot.symbol)
+        if not quantity:
+            return
+        # Gönderilen emir iptal edilen görevle birlikte yarıda kalmasın; sonuç her durumda işlenir
+        order = await asyncio.shield(self.client.futures_create_order(
+            symbol=slot.symbol,
+            side=SIDE_BUY if signal == "LONG" else SIDE_SELL,
+            type=ORDER_TYPE_MARKET,
+            quantity=quantity
+        ))
+        slot.position_open = True
+        slot.current_position = order
+        self.bot._log(f"[{slot.symbol}/{slot.strategy_name}] {signal} pozisyonu açıldı. Miktar: {quantity}")
+        self.bot.trade_journal.submit({
+            'symbol': slot.symbol,
+            'id': order['orderId'],
+            'side': signal,
+            'realizedPnl': 0,
+            'time': int(time.time() * 1000),
+            'strategy': slot.strategy_name
+        })
+        await self.bot.place_bracket(slot.symbol, signal, order, quantity, atr, slot.config,
+                                     on_close=lambda: _close_slot(slot))
+
+    async def _check_position(self, slot: StrategySlot) -> None:
+        account = self.bot.account
+        if account.synced:
+            if account.get_position(slot.symbol) is not None:
+                return
+        elif any(float(pos['positionAmt']) != 0
+                 for pos in await self.client.futures_position_information(symbol=slot.symbol)):
+            return
+        slot.position_open = False
+        slot.current_position = None
+
+    async def check_positions(self) -> None:
+        """Açık pozisyonlu tüm yuvaları eşzamanlı denetler."""
+        slots = [slot for slots in self.slots.values() for slot in slots if slot.position_open]
+        results = await asyncio.gather(*(self._check_position(slot) for slot in slots), return_exceptions=True)
+        for slot, result in zip(slots, results):
+            if isinstance(result, Exception):
+                self.bot._log(f"[{slot.symbol}/{slot.strategy_name}] Pozisyon denetlenemedi: {result}")
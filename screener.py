@@ -0,0 +1,200 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+import pandas as pd
+
+from config import load_screener_config
+from indicators import ema_series, rsi_series, atr_series, sma_series
+from kline_buffer import KlineBuffer, OPEN_TIME, HIGH, LOW, CLOSE, VOLUME, interval_ms
+from kline_store import KlineStore, store_for
+
+
+def _percentile_rank(x: np.ndarray) -> np.ndarray:
+    """Her değerin semboller arasındaki sıra yüzdesi (0..1); NaN en düşük sırayı alır."""
+    if len(x) < 2:
+        return np.ones(len(x))
+    filled = np.where(np.isnan(x), -np.inf, x)
+    return filled.argsort(kind='stable').argsort(kind='stable') / (len(x) - 1)
+
+
+class Screener:
+    """
+    Tüm USDT-M sürekli vadeli kontratları iki aşamada puanlar. Önce toplu uç noktalardan
+    (borsa bilgisi, 24 saatlik tickerlar, defter tickerları) tek istekle tüm semboller alınır,
+    hacim ve makas filtreleri ile 24 saatlik aralık/hacim sırası NumPy ile tek geçişte
+    hesaplanır. Kalan ilk `candidates` sembolün mumları paralel çekilir ve ATR%, hacim
+    artışı ve KadirV2 EMA/RSI mantığıyla trend gücü, semboller tek bir (mum, sembol)
+    dizisinde birlikte hesaplanarak puanlanır.
+
+    Mum tamponları taramalar arasında saklanır; sonraki taramalarda yalnızca eksik mumlar
+    istenir. Yeni adayların geçmişi yerel kline deposundan okunur. Sonuç `refresh_seconds`
+    boyunca yeniden kullanılır.
+    """
+
+    def __init__(self, client, config: Optional[Dict[str, Any]] = None, max_workers: int = 8,
+                 store: Optional[KlineStore] = None) -> None:
+        self.client = client
+        self.config = load_screener_config() if config is None else config
+        self.store = store_for(client) if store is None else store
+        self.interval_ms = interval_ms(self.config['timeframe'])
+        self.buffers: Dict[str, KlineBuffer] = {}
+        self.last_result: Optional[pd.DataFrame] = None
+        self.last_scan = 0.0
+        self.last_duration = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="screener")
+        self._lock = threading.Lock()
+
+    def _universe(self) -> pd.DataFrame:
+        """İşlemdeki USDT sürekli kontratların 24 saatlik ve defter verisini tek tabloda toplar."""
+        info = self.client.futures_exchange_info()
+        symbols = [s['symbol'] for s in info['symbols']
+                   if s.get('contractType') == 'PERPETUAL' and s.get('quoteAsset') == 'USDT'
+                   and s.get('status') == 'TRADING']
+        tickers = pd.DataFrame(self.client.futures_ticker())
+        books = pd.DataFrame(self.client.futures_orderbook_ticker())
+
+        df = tickers[['symbol', 'lastPrice', 'highPrice', 'lowPrice', 'quoteVolume']].merge(
+            books[['symbol', 'bidPrice', 'askPrice']], on='symbol')
+        df = df[df['symbol'].isin(symbols)].reset_index(drop=True)
+        for column in ('lastPrice', 'highPrice', 'lowPrice', 'quoteVolume', 'bidPrice', 'askPrice'):
+            df[column] = df[column].astype(np.float64)
+        return df
+
+    def _prefilter(self, df: pd.DataFrame) -> pd.DataFrame:
+        last = df['lastPrice'].to_numpy()
+        bid = df['bidPrice'].to_numpy()
+        ask = df['askPrice'].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mid = (bid + ask) / 2
+            df['spread_bps'] = (ask - bid) / mid * 1e4
+            df['range_pct'] = (df['highPrice'].to_numpy() - df['lowPrice'].to_numpy()) / last * 100
+        ok = (df['quoteVolume'].to_numpy() >= self.config['min_quote_volume']) & \
+             (df['spread_bps'].to_numpy() <= self.config['max_spread_bps']) & (last > 0)
+        df = df[ok].reset_index(drop=True)
+        pre_score = _percentile_rank(df['range_pct'].to_numpy()) + \
+            _percentile_rank(np.log(df['quoteVolume'].to_numpy()))
+        order = np.argsort(-pre_score, kind='stable')[:self.config['candidates']]
+        return df.iloc[order].reset_index(drop=True)
+
+    def _refresh_klines(self, symbol: str) -> Optional[KlineBuffer]:
+        bars = self.config['bars']
+        buffer = self.buffers.get(symbol)
+        try:
+            if buffer is None or len(buffer) < bars:
+                buffer = KlineBuffer(symbol, self.config['timeframe'], capacity=bars + 1)
+                if self.store is not None:
+                    # Kapanmış mumlar diskten gelir; güncel mum aşağıdaki tamamlamayla eklenir
+                    buffer.seed_array(self.store.warm(self.client, symbol, self.config['timeframe'], bars))
+                if len(buffer) < bars:
+                    buffer.seed(self.client.futures_klines(symbol=symbol, interval=self.config['timeframe'],
+                                                           limit=bars + 1))
+                self.buffers[symbol] = buffer
+            if buffer.last_closed or buffer.last_open_time + self.interval_ms <= time.time() * 1000:
+                # Son görülen mumdan bu yana eksik kalanları (güncel mum dahil) iste
+                missing = int((time.time() * 1000 - buffer.last_open_time) // self.interval_ms) + 1
+                klines = self.client.futures_klines(symbol=symbol, interval=self.config['timeframe'],
+                                                    limit=min(missing, bars + 1))
+                for k in klines:
+                    buffer.update(int(k[0]), float(k[1]), float(k[2]), float(k[3]),
+                                  float(k[4]), float(k[5]), int(k[6]))
+        except Exception as e:
+            print(f"Screener: {symbol} mum verisi alınamadı: {e}")
+            return None
+        return buffer
+
+    def _score(self, candidates: pd.DataFrame, buffers: List[KlineBuffer]) -> pd.DataFrame:
+        cfg = self.config
+        # Son satır güncel (kapanmamış) mumdur; yalnızca kapanmış mumlar puanlanır
+        n = min(len(b) for b in buffers) - 1
+        data = np.stack([b.window(n + 1)[:-1] for b in buffers], axis=1)  # (mum, sembol, kolon)
+        close, high, low, volume = data[:, :, CLOSE], data[:, :, HIGH], data[:, :, LOW], data[:, :, VOLUME]
+
+        fast = ema_series(close, cfg['ema_length_fast'])[-1]
+        slow = ema_series(close, cfg['ema_length_slow'])[-1]
+        rsi = rsi_series(close, cfg['rsi_length'])[-1]
+        atr = atr_series(high, low, close, cfg['atr_length'])[-1]
+        volume_ma = sma_series(volume, cfg['volume_ma_length'])[-1]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            atr_pct = atr / close[-1] * 100
+            volume_surge = volume[-1] / volume_ma
+            # EMA ayrışmasının ATR'ye oranı; RSI yönü doğrulamıyorsa yarıya indirilir
+            agrees = ((fast > slow) & (rsi > 50)) | ((fast < slow) & (rsi < 50))
+            trend = np.abs(fast - slow) / atr * np.where(agrees, 1.0, 0.5)
+
+        score = cfg['weight_volatility'] * _percentile_rank(atr_pct) + \
+            cfg['weight_volume_surge'] * _percentile_rank(volume_surge) + \
+            cfg['weight_trend'] * _percentile_rank(trend) - \
+            cfg['weight_spread'] * _percentile_rank(candidates['spread_bps'].to_numpy())
+
+        result = pd.DataFrame({
+            'symbol': candidates['symbol'].to_numpy(),
+            'score': score,
+            'direction': np.where(fast >= slow, 'LONG', 'SHORT'),
+            'atr_pct': atr_pct,
+            'volume_surge': volume_surge,
+            'trend': trend,
+            'rsi': rsi,
+            'spread_bps': candidates['spread_bps'].to_numpy(),
+            'quote_volume': candidates['quoteVolume'].to_numpy(),
+            'last_close_time': data[-1, :, OPEN_TIME] + self.interval_ms,
+        })
+        return result.sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+
+    def scan(self, force: bool = False) -> Optional[pd.DataFrame]:
+        """Puanlanmış aday tablosunu (en iyi ilk sırada) döndürür; hata durumunda None."""
+        with self._lock:
+            if not force and self.last_result is not None and \
+                    time.time() - self.last_scan < self.config['refresh_seconds']:
+                return self.last_result
+            started = time.perf_counter()
+            try:
+                candidates = self._prefilter(self._universe())
+            except Exception as e:
+                print(f"Screener: piyasa verisi alınamadı: {e}")
+                return self.last_result
+            if candidates.empty:
+                return None
+
+            buffers = list(self._executor.map(self._refresh_klines, candidates['symbol']))
+            min_bars = max(self.config['ema_length_slow'], self.config['volume_ma_length'],
+                           self.config['atr_length'] + 1, self.config['rsi_length'] + 1) + 1
+            keep = [i for i, b in enumerate(buffers) if b is not None and len(b) > min_bars]
+            if not keep:
+                return None
+            result = self._score(candidates.iloc[keep].reset_index(drop=True), [buffers[i] for i in keep])
+
+            # Aday listesinden düşen sembollerin tamponlarını bırak
+            for symbol in set(self.buffers) - set(candidates['symbol']):
+                del self.buffers[symbol]
+            self.last_result = result
+            self.last_scan = time.time()
+            self.last_duration = time.perf_counter() - started
+            return result
+
+    def best(self) -> Optional[str]:
+        result = self.scan()
+        if result is None or result.empty:
+            return None
+        return str(result['symbol'].iloc[0])
+
+
+_screener: Optional[Screener] = None
+
+
+def get_best_symbol(client=None) -> Optional[str]:
+    """
+    En yüksek puanlı sembolü döndürür. İstemci verilmezse anahtarsız (yalnızca piyasa verisi)
+    bir istemci oluşturulur. Tarayıcı ve mum tamponları çağrılar arasında korunur.
+    """
+    global _screener
+    if _screener is None or (client is not None and _screener.client is not client):
+        if client is None:
+            from binance.client import Client
+            from rest_gateway import RestGateway
+            client = RestGateway(Client())
+        _screener = Screener(client)
+    return _screener.best()
@@ -0,0 +1,775 @@
+import abc
+import time
+import zlib
+import threading
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterable
+
+import numpy as np
+
+from config import load_paper_config
+from kline_buffer import COLUMNS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME, interval_ms
+from symbol_filters import SymbolFilters
+
+# Sentetik veri başlangıç zamanı (2024-01-01 00:00 UTC); sonuçların tekrarlanabilir olması için sabit
+START_MS = 1_704_067_200_000
+
+
+def synthetic_klines(n: int, interval: str = '1m', seed: int = 42, start_price: float = 100.0,
+                     start_ms: int = START_MS) -> np.ndarray:
+    """Log-normal rastgele yürüyüşle (n, 7) boyutlu, Binance kolon sırasında mum dizisi üretir."""
+    rng = np.random.default_rng(seed)
+    step = interval_ms(interval)
+    returns = rng.normal(0.0, 0.002, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.001, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(3.0, 0.5, n)
+    open_time = start_ms + np.arange(n, dtype=np.int64) * step
+    return np.column_stack((open_time, open_, high, low, close, volume, open_time + step - 1)).astype(np.float64)
+
+
+def aggregate_klines(rows: np.ndarray, step: int) -> np.ndarray:
+    """Küçük zaman dilimli mumları `step` ms'lik mumlarda birleştirir (son grup eksik olabilir)."""
+    if not len(rows):
+        return rows[:0].copy()
+    groups = rows[:, OPEN_TIME].astype(np.int64) // step * step
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    ends = np.concatenate((starts[1:], [len(rows)])) - 1
+    out = np.empty((len(starts), len(COLUMNS)), dtype=np.float64)
+    out[:, OPEN_TIME] = groups[starts]
+    out[:, OPEN] = rows[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(rows[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(rows[:, LOW], starts)
+    out[:, CLOSE] = rows[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(rows[:, VOLUME], starts)
+    out[:, CLOSE_TIME] = groups[starts] + step - 1
+    return out
+
+
+def candle_path(open_: float, high: float, low: float, close: float, ticks: int) -> np.ndarray:
+    """
+    Mum içindeki fiyat yolu: yükselen mumda açılış → düşük → yüksek → kapanış, düşende tersi.
+    `ticks` >= 4 iken yol mumun yüksek ve düşük değerlerinden tam olarak geçer.
+    """
+    anchors = [open_, low, high, close] if close >= open_ else [open_, high, low, close]
+    if ticks < 4:
+        return np.array(anchors[4 - ticks:], dtype=np.float64)
+    a = max(1, (ticks - 1) // 3)
+    b = max(a + 1, 2 * (ticks - 1) // 3)
+    return np.interp(np.arange(ticks), [0, a, b, ticks - 1], anchors)
+
+
+class SimulatedExchangeError(Exception):
+    """Borsa hata yanıtlarının karşılığı; `BinanceAPIException` gibi `code` ve `message` taşır."""
+
+    def __init__(self, code: int, message: str) -> None:
+        self.code = code
+        self.message = message
+        super().__init__(f"APIError(code={code}): {message}")
+
+
+class SimulatedExchange:
+    """
+    `binance.Client`'ın botun kullandığı futures alt kümesini yerel bir eşleştirme motoruyla
+    karşılar. Fiyatlar `ReplaySocketManager`'ın oynattığı tiklerden gelir; piyasa emirleri son
+    fiyattan kaymayla, STOP_MARKET / TAKE_PROFIT_MARKET emirleri tetik fiyatına ulaşıldığında
+    dolar. Tek yönlü (BOTH) pozisyon, çapraz marjin, komisyon ve gerçekleşen PNL hesabı tutulur;
+    her değişiklik kullanıcı veri akışına ORDER_TRADE_UPDATE / ACCOUNT_UPDATE olarak yayınlanır.
+    Tüm zaman damgaları simülasyon saatindendir.
+    """
+
+    # `kline_store` bu bayrağı görünce yerel depoya okuma/yazma yapmaz
+    simulated = True
+
+    def __init__(self, balance: float = 1000.0, fee_rate: float = 0.0004, slippage_bps: float = 1.0,
+                 base_interval: str = '1m', intervals: Iterable[str] = ('1m',), leverage: int = 10,
+                 spread_bps: float = 1.0) -> None:
+        self.base_interval = base_interval
+        self.base_step = interval_ms(base_interval)
+        self.intervals = sorted(set(intervals) | {base_interval}, key=interval_ms)
+        for interval in self.intervals:
+            if interval_ms(interval) % self.base_step:
+                raise ValueError(f"{interval} zaman dilimi {base_interval} katı değil.")
+        self.balance = balance
+        self.fee_rate = fee_rate
+        self.slippage = slippage_bps / 10_000
+        self.spread = spread_bps / 10_000
+        self.default_leverage = leverage
+        self.now_ms = 0
+        self._lock = threading.RLock()
+        self._base: Dict[str, np.ndarray] = {}
+        self._history: Dict[Tuple[str, str], np.ndarray] = {}
+        # (sembol, zaman dilimi) başına güncel mum: [açılış, o, h, l, c, v, kapanış]
+        self._candles: Dict[Tuple[str, str], List[float]] = {}
+        self.prices: Dict[str, float] = {}
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.leverages: Dict[str, int] = {}
+        self._symbol_filters: Dict[str, SymbolFilters] = {}
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.fills: List[Dict[str, Any]] = []
+        self.realized_pnl = 0.0
+        self.fees_paid = 0.0
+        self._next_id = 1
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    # --- Veri ve saat ---
+
+    def load_symbol(self, symbol: str, rows: np.ndarray) -> None:
+        """Sembolün temel zaman dilimindeki (n, 7) mumlarını yükler."""
+        with self._lock:
+            self._base[symbol] = rows
+            self._symbol_filters.pop(symbol, None)
+            for interval in self.intervals:
+                self._history[(symbol, interval)] = aggregate_klines(rows, interval_ms(interval))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._base)
+
+    def base_rows(self, symbol: str) -> np.ndarray:
+        return self._base[symbol]
+
+    def start_at(self, open_time: int) -> None:
+        """Saati `open_time`'da açılan temel muma kurar; güncel mumlar o ana kadarki verilerle başlar."""
+        with self._lock:
+            self.now_ms = open_time
+            for symbol, rows in self._base.items():
+                i = int(np.searchsorted(rows[:, OPEN_TIME], open_time))
+                if i >= len(rows):
+                    continue
+                price = rows[i, OPEN]
+                self.prices[symbol] = price
+                for interval in self.intervals:
+                    step = interval_ms(interval)
+                    group_start = open_time // step * step
+                    prior = rows[np.searchsorted(rows[:, OPEN_TIME], group_start):i]
+                    self._candles[(symbol, interval)] = [
+                        group_start, prior[0, OPEN] if len(prior) else price,
+                        max(prior[:, HIGH].max(), price) if len(prior) else price,
+                        min(prior[:, LOW].min(), price) if len(prior) else price,
+                        price, float(prior[:, VOLUME].sum()), group_start + step - 1,
+                    ]
+
+    def tick(self, symbol: str, time_ms: int, price: float, volume: float) -> None:
+        """Bir fiyat tikini işler: güncel mumları ilerletir ve koşullu emirleri kontrol eder."""
+        with self._lock:
+            self.now_ms = max(self.now_ms, time_ms)
+            self.prices[symbol] = price
+            for interval in self.intervals:
+                key = (symbol, interval)
+                candle = self._candles.get(key)
+                step = interval_ms(interval)
+                open_time = time_ms // step * step
+                if candle is None or candle[0] != open_time:
+                    self._candles[key] = [open_time, price, price, price, price, volume, open_time + step - 1]
+                else:
+                    candle[2] = max(candle[2], price)
+                    candle[3] = min(candle[3], price)
+                    candle[4] = price
+                    candle[5] += volume
+            events = self._check_triggers(symbol, price) if self.orders else []
+        self._publish(events)
+
+    def kline(self, symbol: str, interval: str) -> Dict[str, Any]:
+        """Güncel mumu websocket kline mesajının 'k' alanı biçiminde döndürür."""
+        with self._lock:
+            t, o, h, l, c, v, close_time = self._candles[(symbol, interval)]
+            closed = self.now_ms >= close_time
+        return {'t': int(t), 'T': int(close_time), 's': symbol, 'i': interval, 'o': repr(o), 'h': repr(h),
+                'l': repr(l), 'c': repr(c), 'v': repr(v), 'x': closed}
+
+    # --- Kullanıcı veri akışı ---
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._listeners = [cb for cb in self._listeners if cb is not callback]
+
+    def _publish(self, events: List[Dict[str, Any]]) -> None:
+        # Dinleyiciler kilit dışında çağrılır; emir iptali gibi geri çağrılar borsaya dönebilir
+        for event in events:
+            for callback in self._listeners:
+                callback(event)
+
+    def _order_event(self, order: Dict[str, Any], execution: str, last_qty: float = 0.0,
+                     last_price: float = 0.0, fee: float = 0.0, realized: float = 0.0) -> Dict[str, Any]:
+        return {'e': 'ORDER_TRADE_UPDATE', 'E': self.now_ms, 'T': self.now_ms, 'o': {
+            's': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+            'ot': order['type'], 'q': str(order['origQty']), 'p': '0', 'ap': str(order['avgPrice']),
+            'sp': str(order['stopPrice']), 'x': execution, 'X': order['status'], 'i': order['orderId'],
+            'l': str(last_qty), 'z': str(order['executedQty']), 'L': str(last_price), 'n': str(fee),
+            'N': 'USDT', 'T': self.now_ms, 'R': order['reduceOnly'], 'cp': order['closePosition'],
+            'ps': 'BOTH', 'rp': str(realized),
+        }}
+
+    def _account_event(self, symbol: str) -> Dict[str, Any]:
+        pos = self.positions.get(symbol, {'amount': 0.0, 'entry_price': 0.0})
+        return {'e': 'ACCOUNT_UPDATE', 'E': self.now_ms, 'T': self.now_ms, 'a': {
+            'm': 'ORDER',
+            'B': [{'a': 'USDT', 'wb': str(self.balance), 'cw': str(self.balance), 'bc': '0'}],
+            'P': [{'s': symbol, 'pa': str(pos['amount']), 'ep': str(pos['entry_price']),
+                   'up': str(self._unrealized(symbol)), 'mt': 'cross', 'ps': 'BOTH'}],
+        }}
+
+    # --- Eşleştirme ---
+
+    def _unrealized(self, symbol: str) -> float:
+        pos = self.positions.get(symbol)
+        if not pos or not pos['amount'] or symbol not in self.prices:
+            return 0.0
+        return pos['amount'] * (self.prices[symbol] - pos['entry_price'])
+
+    def _available(self) -> float:
+        used = sum(abs(p['amount']) * p['entry_price'] / self.leverages.get(s, self.default_leverage)
+                   for s, p in self.positions.items())
+        return self.balance + sum(self._unrealized(s) for s in self.positions) - used
+
+    def _fill(self, order: Dict[str, Any], quantity: float) -> List[Dict[str, Any]]:
+        """Emri güncel fiyattan (kayma dahil) doldurur; kilit altında çağrılır."""
+        symbol, side = order['symbol'], order['side']
+        price = self.prices.get(symbol)
+        if price is None:
+            raise SimulatedExchangeError(-1121, "Invalid symbol.")
+        pos = self.positions.setdefault(symbol, {'amount': 0.0, 'entry_price': 0.0})
+        amount = pos['amount']
+        direction = 1.0 if side == 'BUY' else -1.0
+        if order['reduceOnly'] or order['closePosition']:
+            if amount == 0 or np.sign(amount) == direction:
+                raise SimulatedExchangeError(-2022, "ReduceOnly Order is rejected.")
+            quantity = abs(amount) if order['closePosition'] else min(quantity, abs(amount))
+        fill_price = price * (1 + direction * self.slippage)
+        leverage = self.leverages.get(symbol, self.default_leverage)
+        increase = quantity if amount == 0 or np.sign(amount) == direction else max(0.0, quantity - abs(amount))
+        if increase and increase * fill_price / leverage > self._available():
+            raise SimulatedExchangeError(-2019, "Margin is insufficient.")
+
+        signed = direction * quantity
+        realized = 0.0
+        if amount == 0 or np.sign(amount) == direction:
+            pos['entry_price'] = (abs(amount) * pos['entry_price'] + quantity * fill_price) / (abs(amount) + quantity)
+        else:
+            closing = min(quantity, abs(amount))
+            realized = closing * (fill_price - pos['entry_price']) * np.sign(amount)
+            remaining = amount + signed
+            if abs(remaining) < 1e-12:
+                pos['entry_price'] = 0.0
+            elif np.sign(remaining) != np.sign(amount):
+                pos['entry_price'] = fill_price
+        pos['amount'] = round(amount + signed, 12)
+        if pos['amount'] == 0:
+            pos['entry_price'] = 0.0
+        fee = quantity * fill_price * self.fee_rate
+        self.balance += realized - fee
+        self.realized_pnl += realized
+        self.fees_paid += fee
+
+        order.update(status='FILLED', executedQty=quantity, avgPrice=fill_price, updateTime=self.now_ms)
+        self.fills.append({'symbol': symbol, 'id': len(self.fills) + 1, 'orderId': order['orderId'],
+                           'side': side, 'price': fill_price, 'qty': quantity, 'realizedPnl': realized,
+                           'commission': fee, 'time': self.now_ms, 'positionSide': 'BOTH'})
+        return [self._order_event(order, 'TRADE', quantity, fill_price, fee, realized),
+                self._account_event(symbol)]
+
+    def _triggered(self, order: Dict[str, Any], price: float) -> bool:
+        stop, sell = order['stopPrice'], order['side'] == 'SELL'
+        if order['type'] == 'STOP_MARKET':
+            return price <= stop if sell else price >= stop
+        return price >= stop if sell else price <= stop
+
+    def _check_triggers(self, symbol: str, price: float) -> List[Dict[str, Any]]:
+        events = []
+        for order_id, order in list(self.orders.items()):
+            if order['symbol'] != symbol or not self._triggered(order, price):
+                continue
+            del self.orders[order_id]
+            try:
+                events.extend(self._fill(order, order['origQty']))
+            except SimulatedExchangeError:
+                # Kapatılacak pozisyon kalmadıysa emir süresi dolmuş sayılır
+                order.update(status='EXPIRED', updateTime=self.now_ms)
+                events.append(self._order_event(order, 'EXPIRED'))
+        return events
+
+    def _rest_order(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'orderId': order['orderId'], 'symbol': order['symbol'], 'status': order['status'],
+            'clientOrderId': order['clientOrderId'], 'price': '0', 'avgPrice': str(order['avgPrice']),
+            'origQty': str(order['origQty']), 'executedQty': str(order['executedQty']),
+            'cumQuote': str(order['executedQty'] * order['avgPrice']), 'type': order['type'],
+            'origType': order['type'], 'side': order['side'], 'positionSide': 'BOTH',
+            'stopPrice': str(order['stopPrice']), 'reduceOnly': order['reduceOnly'],
+            'closePosition': order['closePosition'], 'updateTime': order['updateTime'],
+        }
+
+    # --- Client uyumlu REST metotları ---
+
+    def futures_create_order(self, **params) -> Dict[str, Any]:
+        symbol, order_type = params['symbol'], params['type']
+        if symbol not in self._base:
+            raise SimulatedExchangeError(-1121, "Invalid symbol.")
+        if order_type not in ('MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET'):
+            raise SimulatedExchangeError(-1116, "Invalid orderType.")
+        close_position = str(params.get('closePosition', 'false')).lower() == 'true'
+        quantity = float(params.get('quantity', 0) or 0)
+        if not close_position:
+            # Binance'in LOT_SIZE, PRICE_FILTER ve MIN_NOTIONAL kontrolleri
+            stop_price = float(params['stopPrice']) if order_type != 'MARKET' and 'stopPrice' in params else None
+            error = self._filters(symbol).validate(
+                quantity, self.prices[symbol], stop_price=stop_price,
+                reduce_only=str(params.get('reduceOnly', 'false')).lower() == 'true')
+            if error is not None:
+                raise SimulatedExchangeError(*error)
+        with self._lock:
+            order = {
+                'orderId': self._next_id, 'symbol': symbol, 'side': params['side'], 'type': order_type,
+                'clientOrderId': params.get('newClientOrderId') or f"sim_{self._next_id}",
+                'origQty': quantity, 'executedQty': 0.0, 'avgPrice': 0.0,
+                'stopPrice': float(params.get('stopPrice', 0) or 0),
+                'reduceOnly': str(params.get('reduceOnly', 'false')).lower() == 'true',
+                'closePosition': close_position, 'status': 'NEW', 'updateTime': self.now_ms,
+            }
+            self._next_id += 1
+            if order_type == 'MARKET':
+                events = self._fill(order, quantity)
+            else:
+                if self._triggered(order, self.prices[symbol]):
+                    raise SimulatedExchangeError(-2021, "Order would immediately trigger.")
+                self.orders[order['orderId']] = order
+                events = [self._order_event(order, 'NEW')]
+            response = self._rest_order(order)
+        self._publish(events)
+        return response
+
+    def futures_place_batch_order(self, batchOrders: List[Dict[str, Any]], **params) -> List[Dict[str, Any]]:
+        """Binance gibi en fazla 5 emir; her emir ayrı işlenir, reddedilenler yerinde hata döner."""
+        if len(batchOrders) > 5:
+            raise SimulatedExchangeError(-4082, "Invalid number of batch place orders.")
+        results = []
+        for order in batchOrders:
+            try:
+                results.append(self.futures_create_order(**order))
+            except SimulatedExchangeError as e:
+                results.append({'code': e.code, 'msg': e.message})
+        return results
+
+    def _find_order(self, symbol: str, orderId=None, origClientOrderId=None) -> Dict[str, Any]:
+        for order in self.orders.values():
+            if order['symbol'] == symbol and (order['orderId'] == (int(orderId) if orderId is not None else None)
+                                              or order['clientOrderId'] == origClientOrderId):
+                return order
+        raise SimulatedExchangeError(-2011, "Unknown order sent.")
+
+    def futures_cancel_order(self, symbol: str, orderId=None, origClientOrderId=None, **params) -> Dict[str, Any]:
+        with self._lock:
+            order = self._find_order(symbol, orderId, origClientOrderId)
+            del self.orders[order['orderId']]
+            order.update(status='CANCELED', updateTime=self.now_ms)
+            events = [self._order_event(order, 'CANCELED')]
+            response = self._rest_order(order)
+        self._publish(events)
+        return response
+
+    def futures_cancel_all_open_orders(self, symbol: str, **params) -> Dict[str, Any]:
+        with self._lock:
+            events = []
+            for order_id, order in list(self.orders.items()):
+                if order['symbol'] == symbol:
+                    del self.orders[order_id]
+                    order.update(status='CANCELED', updateTime=self.now_ms)
+                    events.append(self._order_event(order, 'CANCELED'))
+        self._publish(events)
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def futures_get_open_orders(self, symbol: Optional[str] = None, **params) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._rest_order(o) for o in self.orders.values() if symbol is None or o['symbol'] == symbol]
+
+    def futures_change_leverage(self, symbol: str, leverage: int, **params) -> Dict[str, Any]:
+        with self._lock:
+            self.leverages[symbol] = int(leverage)
+        return {'symbol': symbol, 'leverage': int(leverage), 'maxNotionalValue': '1000000'}
+
+    def futures_account(self, **params) -> Dict[str, Any]:
+        with self._lock:
+            unrealized = sum(self._unrealized(s) for s in self.positions)
+            return {
+                'totalWalletBalance': str(self.balance), 'totalUnrealizedProfit': str(unrealized),
+                'availableBalance': str(self._available()),
+                'assets': [{'asset': 'USDT', 'walletBalance': str(self.balance),
+                            'crossWalletBalance': str(self.balance), 'unrealizedProfit': str(unrealized),
+                            'availableBalance': str(self._available()), 'updateTime': self.now_ms}],
+                'positions': self.futures_position_information(),
+            }
+
+    def futures_account_balance(self, **params) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{'asset': 'USDT', 'balance': str(self.balance), 'crossWalletBalance': str(self.balance),
+                     'availableBalance': str(self._available()), 'updateTime': self.now_ms}]
+
+    def futures_position_information(self, symbol: Optional[str] = None, **params) -> List[Dict[str, Any]]:
+        with self._lock:
+            result = []
+            for s in self._base:
+                if symbol is not None and s != symbol:
+                    continue
+                pos = self.positions.get(s, {'amount': 0.0, 'entry_price': 0.0})
+                result.append({
+                    'symbol': s, 'positionAmt': str(pos['amount']), 'entryPrice': str(pos['entry_price']),
+                    'markPrice': str(self.prices.get(s, 0.0)), 'unRealizedProfit': str(self._unrealized(s)),
+                    'leverage': str(self.leverages.get(s, self.default_leverage)), 'positionSide': 'BOTH',
+                    'updateTime': self.now_ms,
+                })
+            return result
+
+    def futures_account_trades(self, symbol: Optional[str] = None, limit: int = 500, **params) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(f) for f in self.fills if symbol is None or f['symbol'] == symbol][-limit:]
+
+    def futures_klines(self, symbol: str, interval: str, limit: int = 500, startTime: Optional[int] = None,
+                       endTime: Optional[int] = None, **params) -> List[List[Any]]:
+        """Simülasyon saatine kadarki kapanmış mumlar ve güncel (kapanmamış) mum."""
+        key = (symbol, interval)
+        if key not in self._history:
+            raise SimulatedExchangeError(-1120, "Invalid interval.")
+        with self._lock:
+            history = self._history[key]
+            candle = self._candles.get(key)
+            if candle is not None:
+                rows = history[:np.searchsorted(history[:, OPEN_TIME], candle[0])]
+                rows = np.vstack((rows, np.array(candle, dtype=np.float64)))
+            else:
+                rows = history[history[:, CLOSE_TIME] <= self.now_ms]
+        if startTime is not None:
+            rows = rows[rows[:, OPEN_TIME] >= startTime]
+        if endTime is not None:
+            rows = rows[rows[:, OPEN_TIME] <= endTime]
+        rows = rows[:limit] if startTime is not None else rows[-limit:]
+        return [[int(r[0]), repr(r[1]), repr(r[2]), repr(r[3]), repr(r[4]), repr(r[5]), int(r[6])] for r in rows]
+
+    def _symbol_info(self, symbol: str) -> Dict[str, Any]:
+        # Adımlar ilk fiyattan türetilir: fiyatın ~5 anlamlı basamağı, ~10 USDT'lik en küçük miktar
+        price = float(self._base[symbol][0, CLOSE])
+        tick = 10.0 ** (np.floor(np.log10(price)) - 4)
+        step = 10.0 ** np.floor(np.log10(10.0 / price))
+        return {
+            'symbol': symbol, 'status': 'TRADING', 'contractType': 'PERPETUAL',
+            'baseAsset': symbol[:-4], 'quoteAsset': 'USDT', 'marginAsset': 'USDT',
+            'pricePrecision': max(0, int(-np.log10(tick))), 'quantityPrecision': max(0, int(-np.log10(step))),
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': f"{tick:.10f}", 'minPrice': f"{tick:.10f}",
+                 'maxPrice': '1000000'},
+                {'filterType': 'LOT_SIZE', 'stepSize': f"{step:.10f}", 'minQty': f"{step:.10f}",
+                 'maxQty': '1000000'},
+                {'filterType': 'MARKET_LOT_SIZE', 'stepSize': f"{step:.10f}", 'minQty': f"{step:.10f}",
+                 'maxQty': '1000000'},
+                {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+            ],
+        }
+
+    def _filters(self, symbol: str) -> SymbolFilters:
+        filters = self._symbol_filters.get(symbol)
+        if filters is None:
+            filters = self._symbol_filters[symbol] = SymbolFilters.from_exchange_info(self._symbol_info(symbol))
+        return filters
+
+    def futures_exchange_info(self, **params) -> Dict[str, Any]:
+        return {'timezone': 'UTC', 'serverTime': self.now_ms,
+                'symbols': [self._symbol_info(symbol) for symbol in self._base]}
+
+    def _ticker(self, symbol: str) -> Dict[str, Any]:
+        rows = self._base[symbol]
+        end = np.searchsorted(rows[:, OPEN_TIME], self.now_ms)
+        day = rows[np.searchsorted(rows[:, OPEN_TIME], self.now_ms - 86_400_000):end]
+        price = self.prices.get(symbol, float(rows[max(0, end - 1), CLOSE]))
+        if not len(day):
+            day = rows[:1]
+        return {'symbol': symbol, 'lastPrice': str(price), 'highPrice': str(max(day[:, HIGH].max(), price)),
+                'lowPrice': str(min(day[:, LOW].min(), price)),
+                'quoteVolume': str(float((day[:, VOLUME] * day[:, CLOSE]).sum())), 'closeTime': self.now_ms}
+
+    def futures_ticker(self, symbol: Optional[str] = None, **params):
+        with self._lock:
+            if symbol is not None:
+                return self._ticker(symbol)
+            return [self._ticker(s) for s in self._base]
+
+    def futures_orderbook_ticker(self, symbol: Optional[str] = None, **params):
+        with self._lock:
+            books = [{'symbol': s, 'bidPrice': str(p * (1 - self.spread / 2)), 'askPrice': str(p * (1 + self.spread / 2)),
+                      'bidQty': '1000', 'askQty': '1000', 'time': self.now_ms}
+                     for s, p in self.prices.items() if symbol is None or s == symbol]
+        return books[0] if symbol is not None and books else books
+
+    def futures_symbol_ticker(self, symbol: Optional[str] = None, **params):
+        with self._lock:
+            tickers = [{'symbol': s, 'price': str(p), 'time': self.now_ms}
+                       for s, p in self.prices.items() if symbol is None or s == symbol]
+        return tickers[0] if symbol is not None and tickers else tickers
+
+    def futures_mark_price(self, symbol: Optional[str] = None, **params):
+        with self._lock:
+            marks = [{'symbol': s, 'markPrice': str(p), 'time': self.now_ms}
+                     for s, p in self.prices.items() if symbol is None or s == symbol]
+        return marks[0] if symbol is not None and marks else marks
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "balance": self.balance,
+                "realized_pnl": self.realized_pnl,
+                "fees_paid": self.fees_paid,
+                "fills": len(self.fills),
+                "open_orders": len(self.orders),
+                "positions": {s: dict(p) for s, p in self.positions.items() if p['amount']},
+                "sim_time": self.now_ms,
+            }
+
+
+class SocketRouter(abc.ABC):
+    """
+    `ThreadedWebsocketManager` arayüzünü taklit eden soket yöneticilerinin ortak tabanı.
+    Abonelikleri akış adına göre yönlendirir; alt sınıflar `run()` içinde `_deliver` ile mesaj
+    gönderir. `autostart` açıksa `start()` oynatmayı ilk kline aboneliğinden `start_delay`
+    saniye sonra ayrı bir iş parçacığında başlatır; kapalıysa `run()` çağıranda çalışır.
+    """
+
+    def __init__(self, autostart: bool = True, start_delay: float = 1.0,
+                 log: Callable[[str], None] = print) -> None:
+        self.autostart = autostart
+        self.start_delay = start_delay
+        self._log = log
+        self._sockets: Dict[str, Tuple[List[str], Callable, bool]] = {}
+        # Akış adı → [(geri çağrı, birleşik mi)]; oynatma iş parçacığı okurken bütün olarak değiştirilir
+        self._routes: Dict[str, List[Tuple[Callable, bool]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._subscribed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.finished = threading.Event()
+        self.messages = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+
+    def start(self) -> None:
+        if self.autostart and self._thread is None:
+            self._thread = threading.Thread(target=self._run_when_subscribed, daemon=True, name="replay")
+            self._thread.start()
+
+    def _register(self, name: str, streams: List[str], callback: Callable, multiplex: bool = False) -> str:
+        with self._lock:
+            self._sockets[name] = (streams, callback, multiplex)
+            self._rebuild_routes()
+        if any('@kline_' in s for s in streams):
+            self._subscribed.set()
+        return name
+
+    def _rebuild_routes(self) -> None:
+        routes: Dict[str, List[Tuple[Callable, bool]]] = {}
+        for streams, callback, multiplex in self._sockets.values():
+            for stream in streams:
+                routes.setdefault(stream, []).append((callback, multiplex))
+        self._routes = routes
+
+    def start_kline_socket(self, callback: Callable, symbol: str, interval: str, **params) -> str:
+        stream = f"{symbol.lower()}@kline_{interval}"
+        return self._register(stream, [stream], callback)
+
+    def start_kline_futures_socket(self, callback: Callable, symbol: str, interval: str, **params) -> str:
+        return self.start_kline_socket(callback, symbol, interval)
+
+    def start_futures_multiplex_socket(self, callback: Callable, streams: List[str]) -> str:
+        return self._register('multiplex:' + '/'.join(streams), list(streams), callback, multiplex=True)
+
+    def start_symbol_mark_price_socket(self, callback: Callable, symbol: str, **params) -> str:
+        stream = f"{symbol.lower()}@markPrice"
+        return self._register(stream, [stream], callback)
+
+    def start_futures_user_socket(self, callback: Callable) -> str:
+        return self._register(f"user:{id(callback)}", ['user'], callback)
+
+    def stop_socket(self, name: str) -> None:
+        with self._lock:
+            self._sockets.pop(name, None)
+            self._rebuild_routes()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._subscribed.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run_when_subscribed(self) -> None:
+        # Botun tüm akışlarına abone olması için ilk kline aboneliğinden sonra kısa bir süre beklenir
+        self._subscribed.wait()
+        if self._stop.wait(self.start_delay):
+            return
+        self.run()
+
+    def _deliver(self, stream: str, message: Dict[str, Any], multiplex_only: Optional[bool] = None) -> None:
+        """Mesajı akışın abonelerine gönderir; `multiplex_only` verilirse yalnızca o türdeki abonelere."""
+        for callback, multiplex in self._routes.get(stream, ()):
+            if multiplex_only is not None and multiplex != multiplex_only:
+                continue
+            try:
+                callback({'stream': stream, 'data': message} if multiplex else message)
+                self.messages += 1
+            except Exception as e:
+                self.errors += 1
+                self._log(f"Oynatma geri çağrısında hata ({stream}): {e}")
+
+    @abc.abstractmethod
+    def run(self) -> None:
+        """Tüm mesajları `_deliver` ile gönderir; bitince `finished` ayarlanmalıdır."""
+
+
+class ReplaySocketManager(SocketRouter):
+    """
+    `SimulatedExchange`'deki temel mumları tiklere bölerek oynatan soket yöneticisi. Her tikte
+    önce borsa ilerletilir (koşullu emirler dolar, kullanıcı akışı olayları yayınlanır), sonra
+    abone olunan kline ve mark fiyatı akışlarına Binance biçiminde mesaj gönderilir. `speed`
+    simülasyon saatinin gerçek zamana oranıdır; 0 iken beklemeden oynatılır.
+    """
+
+    def __init__(self, exchange: SimulatedExchange, speed: float = 100.0, ticks_per_candle: int = 4,
+                 start_ms: Optional[int] = None, end_ms: Optional[int] = None, autostart: bool = True,
+                 start_delay: float = 1.0, log: Callable[[str], None] = print) -> None:
+        super().__init__(autostart=autostart, start_delay=start_delay, log=log)
+        self.exchange = exchange
+        self.speed = speed
+        self.ticks_per_candle = max(1, ticks_per_candle)
+        self.start_ms = exchange.now_ms if start_ms is None else start_ms
+        self.end_ms = end_ms
+        self.ticks = 0
+
+    def start_futures_user_socket(self, callback: Callable) -> str:
+        # Kullanıcı akışı olayları borsadan doğrudan, emri veren iş parçacığında gelir
+        name = f"user:{id(callback)}"
+        self.exchange.add_listener(callback)
+        with self._lock:
+            self._sockets[name] = ([], callback, False)
+        return name
+
+    def stop_socket(self, name: str) -> None:
+        with self._lock:
+            socket = self._sockets.get(name)
+        super().stop_socket(name)
+        if socket is not None and name.startswith('user:'):
+            self.exchange.remove_listener(socket[1])
+
+    def run(self) -> None:
+        """`start_ms`'den itibaren tüm sembollerin temel mumlarını zaman sırasıyla oynatır."""
+        exchange = self.exchange
+        step = exchange.base_step
+        ticks = self.ticks_per_candle
+        offsets = [(j + 1) * step // ticks - 1 for j in range(ticks)]
+        series = {}
+        for symbol in exchange.symbols:
+            rows = exchange.base_rows(symbol)
+            rows = rows[np.searchsorted(rows[:, OPEN_TIME], self.start_ms):]
+            if self.end_ms is not None:
+                rows = rows[rows[:, OPEN_TIME] < self.end_ms]
+            series[symbol] = rows
+        if not series:
+            self.finished.set()
+            return
+        times = np.unique(np.concatenate([rows[:, OPEN_TIME] for rows in series.values()])).astype(np.int64)
+        positions = {symbol: 0 for symbol in series}
+
+        started = time.perf_counter()
+        first_ms = int(times[0]) if len(times) else 0
+        for open_time in times:
+            if self._stop.is_set():
+                break
+            current = []
+            for symbol, rows in series.items():
+                i = positions[symbol]
+                if i < len(rows) and rows[i, OPEN_TIME] == open_time:
+                    positions[symbol] = i + 1
+                    row = rows[i]
+                    path = candle_path(row[OPEN], row[HIGH], row[LOW], row[CLOSE], ticks)
+                    current.append((symbol, symbol.lower(), path, row[VOLUME] / len(path)))
+            for j, offset in enumerate(offsets if current else ()):
+                tick_ms = int(open_time) + offset
+                if self.speed > 0:
+                    delay = (tick_ms - first_ms) / 1000 / self.speed - (time.perf_counter() - started)
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+                routes = self._routes
+                for symbol, lower, path, volume in current:
+                    price = float(path[j])
+                    exchange.tick(symbol, tick_ms, price, volume)
+                    self.ticks += 1
+                    for interval in exchange.intervals:
+                        stream = f"{lower}@kline_{interval}"
+                        if stream in routes:
+                            self._deliver(stream, {'e': 'kline', 'E': tick_ms, 's': symbol,
+                                                   'k': exchange.kline(symbol, interval)})
+                    stream = f"{lower}@markPrice"
+                    if stream in routes:
+                        self._deliver(stream, {'e': 'markPriceUpdate', 'E': tick_ms, 's': symbol,
+                                               'p': repr(price), 'i': repr(price)})
+        self.wall_seconds = time.perf_counter() - started
+        self.finished.set()
+        self._log(f"Oynatma tamamlandı: {self.ticks} tik, {self.messages} mesaj, {self.wall_seconds:.2f} sn.")
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = self.wall_seconds if self.finished.is_set() else 0.0
+        return {
+            "ticks": self.ticks,
+            "messages": self.messages,
+            "errors": self.errors,
+            "sim_time": self.exchange.now_ms,
+            "finished": self.finished.is_set(),
+            "ticks_per_sec": self.ticks / elapsed if elapsed else None,
+            "exchange": self.exchange.stats(),
+        }
+
+
+def create_paper_exchange(symbols: Iterable[str], intervals: Iterable[str], warmup_candles: int,
+                          config: Optional[Dict[str, Any]] = None,
+                          log: Callable[[str], None] = print) -> Tuple[SimulatedExchange, ReplaySocketManager]:
+    """
+    Kağıt üzerinde işlem modu için borsa ve oynatıcıyı kurar. Her sembol için en büyük zaman
+    diliminde `warmup_candles` mumluk geçmiş ve ardından `candles` temel mum oynatılır. Veri
+    'store' modunda yerel kline deposundan, yetmezse sabit tohumlu sentetik üreticiden gelir.
+    """
+    cfg = load_paper_config() if config is None else config
+    intervals = sorted(set(intervals), key=interval_ms)
+    exchange = SimulatedExchange(balance=cfg['balance'], fee_rate=cfg['fee_rate'],
+                                 slippage_bps=cfg['slippage_bps'], base_interval=cfg['base_interval'],
+                                 intervals=intervals)
+    base_step = exchange.base_step
+    max_step = max(interval_ms(i) for i in exchange.intervals)
+    warmup = (warmup_candles + 2) * max_step // base_step
+    total = warmup + cfg['candles']
+
+    starts = []
+    for symbol in symbols:
+        rows = None
+        if cfg['data'] == 'store':
+            from kline_store import get_store
+            store = get_store()
+            if store is not None:
+                rows = store.read(symbol, cfg['base_interval'], 0, int(time.time() * 1000))[-total:]
+                if len(rows) <= warmup:
+                    log(f"{symbol} için depoda yeterli {cfg['base_interval']} mum yok, sentetik veri kullanılıyor.")
+                    rows = None
+        if rows is None:
+            # warmup en büyük zaman diliminin katıdır; oynatma START_MS sınırından başlar
+            rows = synthetic_klines(total, cfg['base_interval'], seed=cfg['seed'] + zlib.crc32(symbol.encode()) % 1000,
+                                    start_ms=START_MS - warmup * base_step)
+        exchange.load_symbol(symbol, np.ascontiguousarray(rows))
+        starts.append(int(rows[min(warmup, len(rows) - 1), OPEN_TIME]))
+
+    start_ms = max(starts)
+    exchange.start_at(start_ms)
+    manager = ReplaySocketManager(exchange, speed=cfg['speed'], ticks_per_candle=cfg['ticks_per_candle'],
+                                  start_ms=start_ms, log=log)
+    return exchange, manager
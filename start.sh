@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+# Render başlatma betiği: tek bot süreci (bot_worker.py) + WEB_CONCURRENCY kadar durumsuz web işçisi.
+# İki süreç aynı makinede Unix soketiyle haberleşir (BOT_IPC_PATH); bot çökerse yeniden başlatılır.
+set -u
+
+export BOT_MODE=remote
+export BOT_IPC_PATH="${BOT_IPC_PATH:-/tmp/kadirv2-bot.sock}"
+
+(
+    trap 'kill -TERM "$bot_pid" 2>/dev/null; wait "$bot_pid"; exit 0' TERM INT
+    while true; do
+        python bot_worker.py &
+        bot_pid=$!
+        wait "$bot_pid"
+        echo "Bot süreci sonlandı (çıkış kodu $?), 5 sn sonra yeniden başlatılıyor."
+        sleep 5
+    done
+) &
+supervisor_pid=$!
+
+gunicorn main_web:app -k uvicorn.workers.UvicornWorker \
+    -w "${WEB_CONCURRENCY:-2}" -b "0.0.0.0:${PORT:-8000}" --graceful-timeout 30 &
+web_pid=$!
+
+trap 'kill -TERM "$web_pid" "$supervisor_pid" 2>/dev/null' TERM INT
+wait "$web_pid"
+kill -TERM "$supervisor_pid" 2>/dev/null
+wait "$supervisor_pid"
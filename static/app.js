@@ -19,6 +19,22 @@ document.addEventListener('DOMContentLoaded', () => {
     const leverageInput = document.getElementById('leverage');
     const quantityInput = document.getElementById('quantity');
     const historyBody = document.getElementById('history-body');
+    const loadMoreHistoryBtn = document.getElementById('load-more-history');
+    const marketInfo = document.getElementById('market-info');
+    const statTotalTrades = document.getElementById('stat-total-trades');
+    const statWinRate = document.getElementById('stat-win-rate');
+    const statTotalPnl = document.getElementById('stat-total-pnl');
+
+    // Sunucudaki broadcaster.COMPACT_FIELDS ile aynı alan sırası
+    const COMPACT_TYPES = {
+        k: ['kline_update', ['symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close', 'volume', 'closed']],
+        p: ['position_update', ['symbol', 'quantity', 'entry_price', 'mark_price', 'pnl_usdt', 'roi_percent']],
+    };
+
+    // Sunucuda çizilen ilk geçmiş sayfasındaki zaman damgalarını okunur hale getir
+    historyBody.querySelectorAll('td[data-timestamp]').forEach(cell => {
+        cell.textContent = new Date(parseInt(cell.dataset.timestamp)).toLocaleString('tr-TR');
+    });
 
     // --- Yardımcı Fonksiyonlar ---
     function addLog(message) {
@@ -27,6 +43,13 @@ document.addEventListener('DOMContentLoaded', () => {
         logArea.scrollTop = logArea.scrollHeight;
     }
 
+    // Sunucunun bir aralıkta topladığı log satırlarını tek DOM güncellemesiyle ekle
+    function addLogs(messages) {
+        const timestamp = new Date().toLocaleTimeString('tr-TR');
+        logArea.innerHTML += messages.map(message => `[${timestamp}] ${message}\n`).join('');
+        logArea.scrollTop = logArea.scrollHeight;
+    }
+
     function updatePositionInfo(data) {
         if (!data || parseFloat(data.quantity) === 0) {
             positionInfo.innerHTML = '<p>Açık pozisyon yok.</p>';
@@ -37,11 +60,88 @@ document.addEventListener('DOMContentLoaded', () => {
             <p><strong>Sembol:</strong> ${data.symbol}</p>
             <p><strong>Büyüklük:</strong> ${data.quantity}</p>
             <p><strong>Giriş Fiyatı:</strong> ${data.entry_price}</p>
+            <p><strong>Mark Fiyatı:</strong> ${data.mark_price}</p>
             <p><strong>PNL (USDT):</strong> <span class="pnl-${pnlColor}">${data.pnl_usdt}</span></p>
             <p><strong>ROI:</strong> <span class="pnl-${pnlColor}">${data.roi_percent}</span></p>
         `;
     }
 
+    function updateMarketInfo(data) {
+        const state = data.closed ? 'kapandı' : 'canlı';
+        marketInfo.textContent = `${data.symbol} ${data.interval} · Son: ${data.close} (${state})`;
+    }
+
+    function updateStats(data) {
+        statTotalTrades.textContent = data.total_trades;
+        statWinRate.textContent = parseFloat(data.win_rate).toFixed(2);
+        statTotalPnl.textContent = parseFloat(data.total_pnl).toFixed(2);
+    }
+
+    function createHistoryRow(trade) {
+        const row = document.createElement('tr');
+        row.dataset.tradeId = trade.trade_id;
+        [trade.trade_id, trade.symbol, trade.side, parseFloat(trade.pnl).toFixed(2),
+         new Date(trade.timestamp).toLocaleString('tr-TR')].forEach(value => {
+            const cell = document.createElement('td');
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        return row;
+    }
+
+    function hasHistoryRow(trade) {
+        return historyBody.querySelector(`tr[data-trade-id="${trade.trade_id}"]`) !== null;
+    }
+
+    // Yeni kaydedilen işlemleri tablonun başına ekle (daha önce eklenenleri atla)
+    function appendHistory(trades) {
+        trades.forEach(trade => {
+            if (!hasHistoryRow(trade)) {
+                historyBody.prepend(createHistoryRow(trade));
+            }
+        });
+    }
+
+    // Bir sonraki eski işlem sayfasını imleçle çekip tablonun sonuna ekle
+    async function loadMoreHistory() {
+        const cursor = historyBody.dataset.nextCursor;
+        if (!cursor) {
+            return;
+        }
+        loadMoreHistoryBtn.disabled = true;
+        try {
+            const response = await fetch(`/get-history?cursor=${encodeURIComponent(cursor)}`);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const page = await response.json();
+            page.trades.forEach(trade => {
+                if (!hasHistoryRow(trade)) {
+                    historyBody.appendChild(createHistoryRow(trade));
+                }
+            });
+            historyBody.dataset.nextCursor = page.next_cursor || '';
+            loadMoreHistoryBtn.hidden = !page.next_cursor;
+        } catch (error) {
+            addLog(`Geçmiş yüklenemedi: ${error}`);
+            console.error('Geçmiş isteği başarısız:', error);
+        } finally {
+            loadMoreHistoryBtn.disabled = false;
+        }
+    }
+
+    // 'compact' biçimdeki {t, d} mesajlarını {type, data} biçimine çevir
+    function decodeMessage(raw) {
+        const message = JSON.parse(raw);
+        if (message.t === undefined) {
+            return message;
+        }
+        const [type, fields] = COMPACT_TYPES[message.t];
+        const data = {};
+        fields.forEach((field, i) => { data[field] = message.d[i]; });
+        return { type, data };
+    }
+
     // API'ye istek göndermek için genel bir fonksiyon
     async function postData(url, data = {}) {
         try {
@@ -62,7 +162,7 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // --- WebSocket Bağlantısı ---
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const ws = new WebSocket(`${protocol}//${window.location.host}/ws`);
+    const ws = new WebSocket(`${protocol}//${window.location.host}/ws?format=compact`);
 
     ws.onopen = () => {
         statusIndicator.className = 'status-online';
@@ -70,16 +170,25 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     ws.onmessage = (event) => {
-        const message = JSON.parse(event.data);
+        const message = decodeMessage(event.data);
         switch (message.type) {
             case 'log':
                 addLog(message.data);
                 break;
+            case 'log_batch':
+                addLogs(message.data);
+                break;
             case 'position_update':
                 updatePositionInfo(message.data);
                 break;
-            case 'history_update':
-                // TODO: Geçmişi yenileme fonksiyonu eklenebilir
+            case 'kline_update':
+                updateMarketInfo(message.data);
+                break;
+            case 'stats_update':
+                updateStats(message.data);
+                break;
+            case 'history_append':
+                appendHistory(message.data);
                 break;
         }
     };
@@ -122,6 +231,8 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    loadMoreHistoryBtn.addEventListener('click', loadMoreHistory);
+
     setLeverageBtn.addEventListener('click', () => {
         const leverage = parseInt(leverageInput.value);
         if (leverage > 0) {
@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
+from indicators import EMA, RSI, ATR, ema_series, rsi_series, atr_series, cached
 
 def get_signal(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[str, float]:
     """
@@ -8,6 +9,9 @@ def get_signal(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[str, float]:
     agresif bir momentum stratejisi.
     """
 
+    # pandas_ta yavaş yüklenir; yalnızca DataFrame tabanlı yol kullanıldığında içe aktarılır
+    import pandas_ta as ta
+
     # Strateji parametrelerini config sözlüğünden al
     ema_fast_len = int(config.get('ema_length_fast', 9))
     ema_slow_len = int(config.get('ema_length_slow', 21))
@@ -16,37 +20,96 @@ def get_signal(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[str, float]:
     rsi_os = int(config.get('rsi_oversold', 30))
     atr_len = int(config.get('atr_length', 14))
 
-    # İndikatörleri hesapla
-    df.ta.ema(length=ema_fast_len, append=True)
-    df.ta.ema(length=ema_slow_len, append=True)
-    df.ta.rsi(length=rsi_len, append=True)
-    df.ta.atr(length=atr_len, append=True)
-
-    # Kolon adları
-    ema_fast_col = f"EMA_{ema_fast_len}"
-    ema_slow_col = f"EMA_{ema_slow_len}"
-    rsi_col = f"RSI_{rsi_len}"
-    atr_col = f"ATRr_{atr_len}"
+    # İndikatörleri hesapla (çağıranın DataFrame'ine kolon eklemeden)
+    ema_fast = ta.ema(df['close'], length=ema_fast_len)
+    ema_slow = ta.ema(df['close'], length=ema_slow_len)
+    rsi = ta.rsi(df['close'], length=rsi_len)
+    atr = ta.atr(df['high'], df['low'], df['close'], length=atr_len)
 
     # Veri kontrolü
-    if df.shape[0] < 3 or any(col not in df.columns for col in [ema_fast_col, ema_slow_col, rsi_col, atr_col]):
+    if df.shape[0] < 3 or any(s is None for s in [ema_fast, ema_slow, rsi, atr]):
         return 'WAIT', 0
 
     # Son kapanan mumun verilerini al
-    latest = df.iloc[-2]
-    prev = df.iloc[-3]
+    latest = {'fast': ema_fast.iloc[-2], 'slow': ema_slow.iloc[-2], 'rsi': rsi.iloc[-2], 'atr': atr.iloc[-2]}
+    prev = {'fast': ema_fast.iloc[-3], 'slow': ema_slow.iloc[-3]}
 
     # Sinyal Koşulları
-    ema_bull_cross = latest[ema_fast_col] > latest[ema_slow_col] and prev[ema_fast_col] <= prev[ema_slow_col]
-    ema_bear_cross = latest[ema_fast_col] < latest[ema_slow_col] and prev[ema_fast_col] >= prev[ema_slow_col]
-    rsi_confirm_long = latest[rsi_col] > rsi_os
-    rsi_confirm_short = latest[rsi_col] < rsi_ob
+    ema_bull_cross = latest['fast'] > latest['slow'] and prev['fast'] <= prev['slow']
+    ema_bear_cross = latest['fast'] < latest['slow'] and prev['fast'] >= prev['slow']
+    rsi_confirm_long = latest['rsi'] > rsi_os
+    rsi_confirm_short = latest['rsi'] < rsi_ob
 
     # Sinyal üret
     if ema_bull_cross and rsi_confirm_long:
-        return 'LONG', latest[atr_col]
+        return 'LONG', latest['atr']
 
     if ema_bear_cross and rsi_confirm_short:
-        return 'SHORT', latest[atr_col]
+        return 'SHORT', latest['atr']
 
     return 'WAIT', 0
+
+
+class StreamingSignal:
+    """
+    `get_signal` ile aynı kararları, yalnızca kapanan mumlarda O(1) güncellenen
+    indikatörlerle üretir. `update` her kapanan mum için bir kez çağrılmalıdır.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.rsi_ob = int(config.get('rsi_overbought', 70))
+        self.rsi_os = int(config.get('rsi_oversold', 30))
+        self.ema_fast = EMA(int(config.get('ema_length_fast', 9)))
+        self.ema_slow = EMA(int(config.get('ema_length_slow', 21)))
+        self.rsi = RSI(int(config.get('rsi_length', 14)))
+        self.atr = ATR(int(config.get('atr_length', 14)))
+        self._prev_fast = None
+        self._prev_slow = None
+        self.last: Tuple[str, float] = ('WAIT', 0)
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> Tuple[str, float]:
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        rsi = self.rsi.update(close)
+        atr = self.atr.update(high, low, close)
+
+        signal: Tuple[str, float] = ('WAIT', 0)
+        if None not in (fast, slow, rsi, atr, self._prev_fast, self._prev_slow):
+            if fast > slow and self._prev_fast <= self._prev_slow and rsi > self.rsi_os:
+                signal = ('LONG', atr)
+            elif fast < slow and self._prev_fast >= self._prev_slow and rsi < self.rsi_ob:
+                signal = ('SHORT', atr)
+
+        self._prev_fast, self._prev_slow = fast, slow
+        self.last = signal
+        return signal
+
+
+def get_signals(df: pd.DataFrame, config: Dict[str, Any],
+                cache: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `StreamingSignal` kararlarının tüm seri için vektörel hesabı. i. eleman, i. mum kapandığında
+    üretilen sinyaldir (1: LONG, -1: SHORT, 0: WAIT); ikinci dizi o mumdaki ATR değeridir.
+    Aynı `df` için verilen `cache` sözlüğü indikatör dizilerini çağrılar arasında paylaştırır.
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    ema_fast_len = int(config.get('ema_length_fast', 9))
+    ema_slow_len = int(config.get('ema_length_slow', 21))
+    rsi_len = int(config.get('rsi_length', 14))
+    atr_len = int(config.get('atr_length', 14))
+
+    fast = cached(cache, ('ema', ema_fast_len), ema_series, close, ema_fast_len)
+    slow = cached(cache, ('ema', ema_slow_len), ema_series, close, ema_slow_len)
+    rsi = cached(cache, ('rsi', rsi_len), rsi_series, close, rsi_len)
+    atr = cached(cache, ('atr', atr_len), atr_series, high, low, close, atr_len)
+
+    prev_fast = np.concatenate(([np.nan], fast[:-1]))
+    prev_slow = np.concatenate(([np.nan], slow[:-1]))
+    ready = ~np.isnan(prev_fast) & ~np.isnan(prev_slow) & ~np.isnan(rsi) & ~np.isnan(atr)
+
+    long_ = ready & (fast > slow) & (prev_fast <= prev_slow) & (rsi > int(config.get('rsi_oversold', 30)))
+    short = ready & (fast < slow) & (prev_fast >= prev_slow) & (rsi < int(config.get('rsi_overbought', 70)))
+    signals = np.where(long_, 1, np.where(short, -1, 0)).astype(np.int8)
+    return signals, atr
@@ -1,33 +1,36 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
+from indicators import SMA, ATR, sma_series, atr_series, cached
 
 def get_signal(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[str, float]:
     """
     Ani hacim artışları ve güçlü momentum mumlarına dayalı hızlı bir scalping stratejisi.
     """
 
+    # pandas_ta yavaş yüklenir; yalnızca DataFrame tabanlı yol kullanıldığında içe aktarılır
+    import pandas_ta as ta
+
     # Parametreleri config sözlüğünden al
     vol_ma_len = int(config.get('volume_ma_length', 20))
     vol_thresh = float(config.get('volume_threshold', 1.5))
     candle_body_ratio = float(config.get('candle_body_ratio', 0.6))
     atr_len = int(config.get('atr_length', 14))
 
-    # İndikatör hesaplamaları
-    df.ta.sma(close=df['volume'], length=vol_ma_len, append=True)
-    df.ta.atr(length=atr_len, append=True)
-
-    vol_sma_col = f"SMA_{vol_ma_len}"
-    atr_col = f"ATRr_{atr_len}"
+    # İndikatör hesaplamaları (çağıranın DataFrame'ine kolon eklemeden)
+    vol_sma = ta.sma(df['volume'], length=vol_ma_len)
+    atr = ta.atr(df['high'], df['low'], df['close'], length=atr_len)
 
     # Veri kontrolü
-    if df.shape[0] < 2 or any(col not in df.columns for col in [vol_sma_col, atr_col]):
+    if df.shape[0] < 2 or vol_sma is None or atr is None:
         return 'WAIT', 0
 
     latest = df.iloc[-2]
+    latest_vol_sma = vol_sma.iloc[-2]
+    latest_atr = atr.iloc[-2]
 
     # 1. Hacim artışı kontrolü
-    is_volume_spike = latest['volume'] > (latest[vol_sma_col] * vol_thresh)
+    is_volume_spike = latest['volume'] > (latest_vol_sma * vol_thresh)
 
     # 2. Güçlü mum gövdesi kontrolü
     candle_range = latest['high'] - latest['low']
@@ -40,9 +43,66 @@ def get_signal(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[str, float]:
 
     # Sinyal üretimi
     if is_volume_spike and is_strong_candle and is_bullish_candle:
-        return 'LONG', latest[atr_col]
+        return 'LONG', latest_atr
     
     if is_volume_spike and is_strong_candle and is_bearish_candle:
-        return 'SHORT', latest[atr_col]
+        return 'SHORT', latest_atr
 
     return 'WAIT', 0
+
+
+class StreamingSignal:
+    """
+    `get_signal` ile aynı kararları, yalnızca kapanan mumlarda O(1) güncellenen
+    indikatörlerle üretir. `update` her kapanan mum için bir kez çağrılmalıdır.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.vol_thresh = float(config.get('volume_threshold', 1.5))
+        self.candle_body_ratio = float(config.get('candle_body_ratio', 0.6))
+        self.vol_sma = SMA(int(config.get('volume_ma_length', 20)))
+        self.atr = ATR(int(config.get('atr_length', 14)))
+        self.last: Tuple[str, float] = ('WAIT', 0)
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> Tuple[str, float]:
+        vol_sma = self.vol_sma.update(volume)
+        atr = self.atr.update(high, low, close)
+
+        signal: Tuple[str, float] = ('WAIT', 0)
+        if vol_sma is not None and atr is not None:
+            is_volume_spike = volume > vol_sma * self.vol_thresh
+            is_strong_candle = abs(close - open_) / (high - low + 1e-9) >= self.candle_body_ratio
+            if is_volume_spike and is_strong_candle and close > open_:
+                signal = ('LONG', atr)
+            elif is_volume_spike and is_strong_candle and close < open_:
+                signal = ('SHORT', atr)
+
+        self.last = signal
+        return signal
+
+
+def get_signals(df: pd.DataFrame, config: Dict[str, Any],
+                cache: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `StreamingSignal` kararlarının tüm seri için vektörel hesabı. i. eleman, i. mum kapandığında
+    üretilen sinyaldir (1: LONG, -1: SHORT, 0: WAIT); ikinci dizi o mumdaki ATR değeridir.
+    Aynı `df` için verilen `cache` sözlüğü indikatör dizilerini çağrılar arasında paylaştırır.
+    """
+    open_ = df['open'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+
+    vol_ma_len = int(config.get('volume_ma_length', 20))
+    atr_len = int(config.get('atr_length', 14))
+
+    vol_sma = cached(cache, ('volume_sma', vol_ma_len), sma_series, volume, vol_ma_len)
+    atr = cached(cache, ('atr', atr_len), atr_series, high, low, close, atr_len)
+    ready = ~np.isnan(vol_sma) & ~np.isnan(atr)
+
+    is_volume_spike = volume > vol_sma * float(config.get('volume_threshold', 1.5))
+    is_strong_candle = np.abs(close - open_) / (high - low + 1e-9) >= float(config.get('candle_body_ratio', 0.6))
+    base = ready & is_volume_spike & is_strong_candle
+    signals = np.where(base & (close > open_), 1, np.where(base & (close < open_), -1, 0)).astype(np.int8)
+    return signals, atr
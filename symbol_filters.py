@@ -0,0 +1,121 @@
+import time
+import math
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Binance'in aynı kural ihlallerinde döndürdüğü hata kodları ve mesajları
+PRECISION_ERROR = (-1111, "Precision is over the maximum defined for this asset.")
+QTY_ZERO_ERROR = (-4003, "Quantity less than or equal to zero.")
+QTY_MIN_ERROR = (-4004, "Quantity less than min quantity.")
+QTY_MAX_ERROR = (-4005, "Quantity greater than max quantity.")
+TICK_ERROR = (-4014, "Price not increased by tick size.")
+NOTIONAL_ERROR = (-4164, "Order's notional must be no smaller than {} (unless you choose reduce only).")
+
+
+def _decimals(value: str) -> int:
+    """'0.00100000' → 3: adım değerinin anlamlı ondalık basamak sayısı."""
+    _, _, fraction = value.partition('.')
+    return len(fraction.rstrip('0'))
+
+
+def _is_multiple(value: float, step: float) -> bool:
+    ratio = value / step
+    return abs(ratio - round(ratio)) < 1e-6
+
+
+class SymbolFilters:
+    """
+    Tek bir sembolün emir kuralları: fiyat adımı (PRICE_FILTER), miktar adımı ve sınırları
+    (LOT_SIZE; piyasa emirleri için MARKET_LOT_SIZE) ve en düşük emir değeri (MIN_NOTIONAL).
+    Adımlar borsanın metin değerlerinden okunur; yuvarlama bu basamak sayısına göre yapılır.
+    """
+
+    def __init__(self, symbol: str, filters: Dict[str, Dict[str, Any]]) -> None:
+        self.symbol = symbol
+        price = filters.get('PRICE_FILTER', {})
+        lot = filters.get('LOT_SIZE', {})
+        market_lot = filters.get('MARKET_LOT_SIZE', lot)
+        self.tick_size = float(price.get('tickSize', 0) or 0)
+        self.price_decimals = _decimals(price.get('tickSize', '0'))
+        self.step_size = float(lot.get('stepSize', 0) or 0)
+        self.min_qty = float(lot.get('minQty', 0) or 0)
+        self.max_qty = float(lot.get('maxQty', 0) or 0) or math.inf
+        self.market_step_size = float(market_lot.get('stepSize', 0) or 0) or self.step_size
+        self.market_min_qty = float(market_lot.get('minQty', 0) or 0) or self.min_qty
+        self.market_max_qty = float(market_lot.get('maxQty', 0) or 0) or self.max_qty
+        self.quantity_decimals = max(_decimals(lot.get('stepSize', '0')),
+                                     _decimals(market_lot.get('stepSize', '0')))
+        notional = filters.get('MIN_NOTIONAL', {})
+        self.min_notional = float(notional.get('notional', notional.get('minNotional', 0)) or 0)
+
+    @classmethod
+    def from_exchange_info(cls, symbol_info: Dict[str, Any]) -> 'SymbolFilters':
+        """`futures_exchange_info()['symbols']` öğesinden kuralları okur."""
+        return cls(symbol_info['symbol'], {f['filterType']: f for f in symbol_info.get('filters', [])})
+
+    def round_quantity(self, quantity: float, market: bool = True) -> float:
+        """Miktarı adım büyüklüğüne aşağı yuvarlar (emir değeri hiçbir zaman istenenden büyük olmaz)."""
+        step = self.market_step_size if market else self.step_size
+        if step <= 0:
+            return quantity
+        # Kayan nokta hatasıyla tam katların bir adım aşağı düşmemesi için küçük pay
+        return round(math.floor(quantity / step + 1e-9) * step, self.quantity_decimals)
+
+    def round_price(self, price: float) -> float:
+        """Fiyatı en yakın fiyat adımına yuvarlar."""
+        if self.tick_size <= 0:
+            return price
+        return round(round(price / self.tick_size) * self.tick_size, self.price_decimals)
+
+    def validate(self, quantity: float, price: float, market: bool = True, reduce_only: bool = False,
+                 stop_price: Optional[float] = None) -> Optional[Tuple[int, str]]:
+        """Emri borsanın uygulayacağı kurallarla sınar; ihlal varsa (kod, mesaj), yoksa None döner."""
+        step = self.market_step_size if market else self.step_size
+        min_qty = self.market_min_qty if market else self.min_qty
+        max_qty = self.market_max_qty if market else self.max_qty
+        if quantity <= 0:
+            return QTY_ZERO_ERROR
+        if step > 0 and not _is_multiple(quantity, step):
+            return PRECISION_ERROR
+        if quantity < min_qty:
+            return QTY_MIN_ERROR
+        if quantity > max_qty:
+            return QTY_MAX_ERROR
+        if stop_price is not None and self.tick_size > 0 and not _is_multiple(stop_price, self.tick_size):
+            return TICK_ERROR
+        if not reduce_only and quantity * price < self.min_notional:
+            code, message = NOTIONAL_ERROR
+            return code, message.format(f"{self.min_notional:g}")
+        return None
+
+
+class SymbolFilterIndex:
+    """
+    Tüm sembollerin kurallarını tek bir `futures_exchange_info` yanıtından kuran dizin. Dizin
+    ağ çağrısı yapmaz; bot yanıtı `load` ile verir ve `stale` olduğunda (varsayılan saatte bir)
+    yeniler. Böylece emir yolunda kurallar her zaman bellekten okunur.
+    """
+
+    def __init__(self, refresh_seconds: float = 3600.0) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._filters: Dict[str, SymbolFilters] = {}
+        self._lock = threading.Lock()
+        self.loaded_at = 0.0
+
+    def load(self, exchange_info: Dict[str, Any]) -> int:
+        """Dizini yanıtla değiştirir ve yüklenen sembol sayısını döndürür."""
+        filters = {s['symbol']: SymbolFilters.from_exchange_info(s) for s in exchange_info.get('symbols', [])}
+        with self._lock:
+            self._filters = filters
+            self.loaded_at = time.time()
+        return len(filters)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.loaded_at >= self.refresh_seconds
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        return self._filters.get(symbol)
+
+    def __len__(self) -> int:
+        return len(self._filters)
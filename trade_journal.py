@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import queue
+import threading
+from typing import Dict, Any, List, Callable, Optional
+
+import database
+import metrics
+
+
+class TradeJournal:
+    """
+    İşlem kayıtları için arkadan yazmalı (write-behind) günlük. `submit` kaydı yalnızca yerel,
+    yalnızca-ekleme bir dosyaya yazıp kuyruğa koyar; veritabanına yazım arka plandaki bir iş
+    parçacığında toplu olarak ve hata durumunda artan bekleme süreleriyle yapılır. Böylece emir
+    yolu veritabanı gecikmesinden bağımsızdır. Süreç çökerse, yazılmamış kayıtlar bir sonraki
+    açılışta dosyadan yeniden kuyruğa alınır. Yalnızca geçici hatalar (bağlantı, kilit) yeniden
+    denenir; veritabanının kalıcı olarak reddettiği kayıt toplu yazımdan ayıklanıp `<path>.dead`
+    dosyasına taşınır ve diğer kayıtları bekletmez. `on_flush`, her başarılı toplu yazımdan sonra
+    yalnızca gerçekten eklenen kayıtlarla (zaten var olan trade_id'ler hariç) yazıcı iş parçacığında
+    çağrılır; yeni kayıt yoksa çağrılmaz.
+    """
+
+    def __init__(self, path: str = 'trade_journal.ndjson', batch_size: int = 100,
+                 flush_interval: float = 0.5, max_backoff: float = 30.0, fsync: bool = False,
+                 compact_bytes: int = 1 << 20, log: Callable[[str], None] = print,
+                 on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+        self.dead_letter_path = path + '.dead'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self._log = log
+        self._on_flush = on_flush
+        self._queue: "queue.Queue" = queue.Queue()
+        self._file_lock = threading.Lock()
+        self._file = None
+        self._thread = None
+        self.running = False
+        self._last_seq = 0       # Dosyaya yazılan son sıra numarası
+        self._flushed_seq = 0    # Kendisi ve öncekilerin tümü veritabanına yazılmış son sıra numarası
+        self._done_seqs = set()  # `_flushed_seq`'ten sonra gelen, yazılmış ama araları boş olan sıralar
+        self.flushed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, seq: int) -> None:
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(seq))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._flushed_seq = self._last_seq = self._read_checkpoint()
+        self._done_seqs.clear()
+        pending = set()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Çökme anında yarım kalmış son satır
+                        continue
+                    self._last_seq = max(self._last_seq, entry['seq'])
+                    if entry['seq'] > self._flushed_seq:
+                        self._queue.put((entry['seq'], entry['trade']))
+                        pending.add(entry['seq'])
+        if pending:
+            self._log(f"İşlem günlüğünden {len(pending)} yazılmamış kayıt yeniden kuyruğa alındı.")
+        # Dosyada bulunmayan (okunamayan) sıralar beklenmez; yoksa kontrol noktası ilerleyemezdi
+        self._done_seqs.update(set(range(self._flushed_seq + 1, self._last_seq + 1)) - pending)
+        self._file = open(self.path, 'a')
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, trade: Dict[str, Any]) -> None:
+        """Kaydı günlük dosyasına ekler ve arka plandaki yazıcıya bırakır; veritabanını beklemez."""
+        with self._file_lock:
+            self._last_seq += 1
+            seq = self._last_seq
+            self._file.write(json.dumps({'seq': seq, 'trade': trade}) + '\n')
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            # Kuyruğa kilit altında konur; böylece kuyruk sırası her zaman sıra numarası sırasıdır
+            self._queue.put((seq, trade))
+
+    def _next_batch(self) -> List:
+        # İlk kaydı `flush_interval` kadar bekle, ardından kuyrukta birikenleri beklemeden topla
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [] if first is None else [first]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        finally:
+            # Dosya yalnızca yazıcı gerçekten bittiğinde kapatılır (`_checkpoint` dosyayı kullanır)
+            with self._file_lock:
+                self._file.close()
+
+    def _write_loop(self) -> None:
+        backoff = 0.5
+        batch: List = []
+        # Kalıcı hata veren toplu yazımın tek tek denenecek kayıtları (sıra numarası sırasıyla)
+        isolated: List = []
+        while self.running or batch or isolated or not self._queue.empty():
+            if not batch:
+                batch = [isolated.pop(0)] if isolated else self._next_batch()
+                if not batch:
+                    continue
+            started = time.perf_counter()
+            try:
+                inserted = database.insert_trades([trade for _, trade in batch])
+            except database.TradeRejectedError as e:
+                if len(batch) > 1:
+                    # Hatalı kaydı bulmak için kayıtlar tek tek yazılır
+                    isolated = batch + isolated
+                else:
+                    self._dead_letter(batch[0], str(e))
+                    self._checkpoint([batch[0][0]])
+                batch = []
+                continue
+            if inserted is not None:
+                metrics.histogram('db_flush_latency').observe(time.perf_counter() - started)
+                self.flushed += len(batch)
+                self._checkpoint([seq for seq, _ in batch])
+                if self._on_flush and inserted:
+                    try:
+                        self._on_flush(self._inserted_trades(batch, inserted))
+                    except Exception as e:
+                        self._log(f"İşlem günlüğü bildirim hatası: {e}")
+                batch = []
+                backoff = 0.5
+            else:
+                self.failures += 1
+                if not self.running:
+                    # Kapanışta yazılamayan kayıtlar dosyada kalır, sonraki açılışta denenir
+                    break
+                self._log(f"İşlem günlüğü veritabanına yazılamadı, {backoff:.1f} sn sonra tekrar denenecek.")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    @staticmethod
+    def _inserted_trades(batch: List, inserted: List[int]) -> List[Dict[str, Any]]:
+        # Toplu yazımda aynı trade_id birden çok kez geçebilir; her eklenen kayıt bir kez bildirilir
+        remaining = set(inserted)
+        trades = []
+        for _, trade in batch:
+            trade_id = int(trade['id'])
+            if trade_id in remaining:
+                remaining.discard(trade_id)
+                trades.append(trade)
+        return trades
+
+    def _dead_letter(self, item: tuple, error: str) -> None:
+        seq, trade = item
+        self.dead_lettered += 1
+        self._log(f"İşlem kaydı {seq} veritabanınca reddedildi, {self.dead_letter_path} dosyasına taşındı: {error}")
+        try:
+            with open(self.dead_letter_path, 'a') as f:
+                f.write(json.dumps({'seq': seq, 'trade': trade, 'error': error, 'time': int(time.time())},
+                                   default=str) + '\n')
+        except OSError as e:
+            self._log(f"Reddedilen işlem kaydı dosyaya yazılamadı: {e}")
+
+    def _checkpoint(self, seqs: List[int]) -> None:
+        # Kontrol noktası yalnızca kesintisiz yazılmış sıralar kadar ilerler; henüz yazılmamış
+        # bir kaydın atlanıp günlükten silinmesi böylece önlenir
+        self._done_seqs.update(seqs)
+        while self._flushed_seq + 1 in self._done_seqs:
+            self._flushed_seq += 1
+            self._done_seqs.discard(self._flushed_seq)
+        with self._file_lock:
+            self._write_checkpoint(self._flushed_seq)
+            # Tüm kayıtlar yazıldıysa ve dosya büyüdüyse günlüğü sıfırla
+            if self._flushed_seq == self._last_seq and self._file.tell() > self.compact_bytes:
+                self._file.truncate(0)
+                self._file.seek(0)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Kuyruktaki kayıtları yazmayı dener ve yazıcıyı durdurur."""
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self._log("İşlem günlüğü yazıcısı zamanında durmadı; günlük dosyası yazıcı bitince kapatılacak.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.qsize(),
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "unflushed": self._last_seq - self._flushed_seq,
+        }
@@ -3,41 +3,128 @@ import time
 import pandas as pd
 from binance.client import Client
 from binance.enums import *
-from binance import BinanceSocketManager
+from binance import ThreadedWebsocketManager
 import strategy as strategy_kadir_v2
 import strategy_scalper
-import database
 import screener
-from typing import Callable, Optional
+from config import load_strategy_configs, load_screener_config, load_recorder_config
+import metrics
+import database
+from runner import MultiSymbolRunner
+from trade_journal import TradeJournal
+from account_state import AccountStore
+from rest_gateway import RestGateway
+from events import EventDispatcher, CANDLE_CLOSED, KLINE_TICK
+from kline_buffer import KlineBuffer, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME
+from kline_store import seed_buffer
+from sim_exchange import create_paper_exchange
+from recorder import SessionRecorder, RecordingSocketManager, SESSION_ENV_PREFIXES
+from symbol_filters import SymbolFilterIndex
+from brackets import Bracket, BracketBook, STOP_LOSS, bracket_orders, parse_batch_response
+from typing import Callable, Optional, Dict, Tuple, Any
 import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _position_from_rest(positions: list) -> Optional[dict]:
+    """`futures_position_information` yanıtındaki açık pozisyonu `AccountStore` biçiminde döndürür."""
+    for position in positions:
+        amount = float(position['positionAmt'])
+        if amount != 0:
+            return {'amount': amount, 'entry_price': float(position['entryPrice']),
+                    'unrealized_pnl': float(position.get('unRealizedProfit', 0))}
+    return None
+
 
 class TradingBot:
-    def __init__(self, ui_update_callback: Optional[Callable] = None) -> None:
-        self._load_config_from_env()
-        self.client = Client(self.api_key, self.api_secret, testnet=self.is_testnet)
+    runner_class = MultiSymbolRunner
 
-        self.running: bool = True
-        self.strategy_active: bool = False
-        self.position_open: bool = False
+    def __init__(self, ui_update_callback: Optional[Callable] = None, client=None, socket_manager=None) -> None:
+        """
+        `client` ve `socket_manager` verilirse Binance yerine onlar kullanılır (örn. `sim_exchange`).
+        Verilmezse TRADING_MODE=paper iken simüle borsa, aksi halde canlı Binance bağlantısı kurulur.
+        """
+        self._load_config_from_env()
         self.ui_update_callback = ui_update_callback
-
-        self.current_position = None
-        self.kline_data = None
-        self.socket_manager = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.api_secret)
+        if client is None and self.trading_mode == 'paper':
+            client, socket_manager = self._create_paper_exchange()
+        # Tüm REST çağrıları ağırlık sınırını izleyen ağ geçidinden geçer
+        self.client = RestGateway(
+            client if client is not None else Client(self.api_key, self.api_secret, testnet=self.is_testnet),
+            weight_limit=self.rest_weight_limit,
+            max_workers=self.rest_workers,
+            log=self._log
+        )
+        self._init_state()
+
+        self.dispatcher = EventDispatcher(on_error=self._log)
+        self.dispatcher.subscribe(CANDLE_CLOSED, self._on_candle_closed)
+        self.dispatcher.start()
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="account")
+
+        self.socket_manager = socket_manager if socket_manager is not None else \
+            ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.api_secret)
+        # RECORD_DIR ayarlıysa tüm websocket mesajları tekrar oynatılmak üzere kaydedilir (bkz. replay.py)
+        self.recorder = self._create_recorder()
+        if self.recorder is not None:
+            self.socket_manager = RecordingSocketManager(self.socket_manager, self.recorder)
 
         self.socket_manager.start()
+        self.runner = self._create_runner()
+        self._register_gauges()
         self._start_kline_socket(self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+        self._start_mark_price_socket(self.active_symbol)
 
         threading.Thread(target=self.start_user_data_stream, daemon=True).start()
 
         self._log("Bot objesi oluşturuldu.")
 
+    def _init_state(self) -> None:
+        """Bağlantıdan bağımsız bot durumunu ve işlem günlüğünü hazırlar (bkz. async_bot)."""
+        self.running: bool = True
+        self.strategy_active: bool = False
+        self.position_open: bool = False
+
+        self.current_position = None
+        self.kline_buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        # (sembol, strateji adı) başına, kapanan mumlarla beslenen akış sinyal motorları
+        self.signal_engines: Dict[Tuple[str, str], Any] = {}
+        self._engine_lock = threading.Lock()
+        # (sembol, strateji adı) başına son değerlendirilen kapanış zamanı
+        self._last_evaluated: Dict[Tuple[str, str], int] = {}
+        # Kullanıcı veri akışıyla güncel tutulan bakiye/pozisyon durumu
+        self.account = AccountStore()
+        # Borsada bekleyen SL/TP çiftleri; bir bacak dolunca diğeri iptal edilir
+        self.brackets = BracketBook()
+        self.account.on_order_update(self._on_order_update)
+        # Tek bir exchange info yanıtından kurulan, periyodik yenilenen sembol emir kuralları
+        self.symbol_filters = SymbolFilterIndex(self.symbol_filters_refresh)
+        self._user_socket: Optional[str] = None
+        # Arayüze canlı aktarım durumu: mark fiyatları, kline gönderim zamanları, son pozisyon özeti
+        self.mark_prices: Dict[str, float] = {}
+        self._mark_sockets: Dict[str, str] = {}
+        # (sembol, zaman dilimi) başına aktif sembolün kline akışı; sembol/strateji değişince kapatılır
+        self._kline_sockets: Dict[Tuple[str, str], str] = {}
+        self._last_kline_push: Dict[Tuple[str, str], float] = {}
+        self._last_position_payload: Optional[dict] = None
+
+        # İşlem kayıtları emir yolunu bekletmeden arka planda veritabanına yazılır
+        self.trade_journal = TradeJournal(
+            path=os.environ.get('TRADE_JOURNAL_PATH', 'trade_journal.ndjson'),
+            fsync=os.environ.get('TRADE_JOURNAL_FSYNC', 'false').lower() == 'true',
+            log=self._log,
+            on_flush=self._on_trades_persisted
+        )
+        self.trade_journal.start()
+
     def _load_config_from_env(self) -> None:
         self.api_url = os.environ.get('BINANCE_API_URL', 'https://fapi.binance.com')
         self.api_key = os.environ.get('BINANCE_API_KEY')
         self.api_secret = os.environ.get('BINANCE_API_SECRET')
+        # 'live': Binance, 'paper': yerel simüle borsa (bkz. config.load_paper_config)
+        self.trading_mode = os.environ.get('TRADING_MODE', 'live').lower()
 
-        if not self.api_key or not self.api_secret:
+        if self.trading_mode != 'paper' and (not self.api_key or not self.api_secret):
             raise ValueError("API anahtarları ortam değişkenlerinde tanımlanmamış!")
 
         self.is_testnet = 'testnet' in self.api_url
@@ -48,28 +135,92 @@ class TradingBot:
         self.risk_management_mode = os.environ.get('TRADING_RISK_MODE', 'atr')
         self.fixed_roi_tp = float(os.environ.get('TRADING_FIXED_ROI_TP', 2.0)) / 100
         self.active_strategy_name = os.environ.get('TRADING_ACTIVE_STRATEGY', 'KadirV2')
-
-        self.strategy_configs = {
-            "KadirV2": {
-                'timeframe': os.environ.get('KADIRV2_TIMEFRAME', '5m'),
-                'atr_multiplier_sl': float(os.environ.get('KADIRV2_ATR_SL', 1.5)),
-                'atr_multiplier_tp': float(os.environ.get('KADIRV2_ATR_TP', 3.0)),
-                'ema_length_fast': int(os.environ.get('KADIRV2_EMA_FAST', 9)),
-                'ema_length_slow': int(os.environ.get('KADIRV2_EMA_SLOW', 21)),
-                'rsi_length': int(os.environ.get('KADIRV2_RSI_LENGTH', 14)),
-                'rsi_overbought': int(os.environ.get('KADIRV2_RSI_OB', 70)),
-                'rsi_oversold': int(os.environ.get('KADIRV2_RSI_OS', 30)),
-                'atr_length': int(os.environ.get('KADIRV2_ATR_LEN', 14))
-            },
-            "Scalper": {
-                'timeframe': os.environ.get('SCALPER_TIMEFRAME', '1m'),
-                'atr_multiplier_sl': float(os.environ.get('SCALPER_ATR_SL', 1.0)),
-                'volume_ma_length': int(os.environ.get('SCALPER_VOL_MA_LEN', 20)),
-                'volume_threshold': float(os.environ.get('SCALPER_VOL_THRESHOLD', 2.0)),
-                'candle_body_ratio': float(os.environ.get('SCALPER_BODY_RATIO', 0.6)),
-                'atr_length': int(os.environ.get('SCALPER_ATR_LEN', 14))
-            }
-        }
+        self.kline_buffer_size = int(os.environ.get('KLINE_BUFFER_SIZE', 500))
+        # 'event': sinyal her mum kapanışında bir kez değerlendirilir, 'poll': eski 3 sn'lik döngü
+        self.eval_mode = os.environ.get('TRADING_EVAL_MODE', 'event')
+        self.publish_ticks = os.environ.get('TRADING_PUBLISH_TICKS', 'false').lower() == 'true'
+        # Çoklu sembol yuvaları, örn. "BTCUSDT:KadirV2,ETHUSDT:Scalper"
+        self.runner_slots = os.environ.get('TRADING_RUNNER_SLOTS', '')
+        self.runner_workers = int(os.environ.get('TRADING_RUNNER_WORKERS', 4))
+        self.reconcile_interval = float(os.environ.get('ACCOUNT_RECONCILE_SECONDS', 60))
+        self.symbol_filters_refresh = float(os.environ.get('SYMBOL_FILTERS_REFRESH_SECONDS', 3600))
+        # Aktif semboldeki kapanmamış mum güncellemelerinin arayüze en sık gönderilme aralığı (sn)
+        self.ui_kline_interval = float(os.environ.get('UI_KLINE_INTERVAL', 1.0))
+        self.rest_weight_limit = int(os.environ.get('REST_WEIGHT_LIMIT', 2400))
+        self.rest_workers = int(os.environ.get('REST_WORKERS', 4))
+
+        self.strategy_configs = load_strategy_configs()
+
+    def _create_paper_exchange(self) -> tuple:
+        client, socket_manager = create_paper_exchange(
+            self._paper_symbols(), self._paper_intervals(), self.kline_buffer_size, log=self._log
+        )
+        self._log(f"Kağıt üzerinde işlem modu: {', '.join(client.symbols)} simüle borsada oynatılıyor.")
+        return client, socket_manager
+
+    def _paper_symbols(self) -> list:
+        symbols = [self.active_symbol]
+        for spec in self.runner_slots.split(','):
+            symbols.append(spec.strip().partition(':')[0])
+        symbols += os.environ.get('PAPER_SYMBOLS', '').split(',')
+        return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+    def _paper_intervals(self) -> list:
+        intervals = {config['timeframe'] for config in self.strategy_configs.values()}
+        intervals.add(load_screener_config()['timeframe'])
+        return sorted(intervals)
+
+    def _create_recorder(self) -> Optional[SessionRecorder]:
+        config = load_recorder_config()
+        if not config['directory']:
+            return None
+        recorder = SessionRecorder(config['directory'], max_bytes=config['max_bytes'],
+                                   max_files=config['max_files'], log=self._log)
+        recorder.start()
+        recorder.record('session', {'env': {key: value for key, value in os.environ.items()
+                                            if key.startswith(SESSION_ENV_PREFIXES)}})
+        self._log(f"Websocket oturumu {config['directory']} dizinine kaydediliyor.")
+        return recorder
+
+    def _record(self, stream: str, payload: Any) -> None:
+        if self.recorder is not None:
+            self.recorder.record(stream, payload)
+
+    def _record_seed(self, buffer: KlineBuffer) -> None:
+        """Tamponun başlangıç içeriğini kaydeder; tekrar oynatmada REST/depo yerine bu kullanılır."""
+        if self.recorder is not None:
+            self.recorder.record(f"seed:{buffer.symbol.lower()}@kline_{buffer.interval}",
+                                 {'rows': buffer.window().tolist(), 'closed': buffer.last_closed})
+
+    def _register_gauges(self) -> None:
+        metrics.register_gauge('event_queue_depth', self.dispatcher.qsize)
+        metrics.register_counter('events_dropped', lambda: self.dispatcher.dropped)
+        metrics.register_gauge('trade_journal_queue_depth', self.trade_journal.qsize)
+        metrics.register_gauge('trade_journal_unflushed', lambda: self.trade_journal.stats()['unflushed'])
+        metrics.register_gauge('rest_used_weight', lambda: self.client.stats()['used_weight'])
+        metrics.register_gauge('position_open', lambda: int(self.position_open))
+
+    def _create_runner(self) -> Optional[MultiSymbolRunner]:
+        if not self.runner_slots:
+            return None
+        runner = self.runner_class(self, max_workers=self.runner_workers, buffer_size=self.kline_buffer_size)
+        for spec in self.runner_slots.split(','):
+            symbol, _, strategy_name = spec.strip().partition(':')
+            strategy_name = strategy_name or self.active_strategy_name
+            if strategy_name not in self.strategy_configs:
+                raise ValueError(f"Geçersiz strateji adı: {strategy_name}")
+            if symbol.strip().upper() == self.active_symbol:
+                # Aktif sembolün pozisyonu botundur; yuva aynı net pozisyona emir verirdi
+                raise ValueError(f"{self.active_symbol} aktif sembol olduğu için yuvaya atanamaz.")
+            runner.add_slot(symbol, strategy_name, self.strategy_configs[strategy_name])
+        return runner
+
+    def _can_activate(self, symbol: str) -> bool:
+        """Çoklu sembol yuvasına ait bir sembol aktif sembol yapılamaz (sembol başına tek sahip)."""
+        if self.runner and symbol in self.runner.symbols:
+            self._log(f"{symbol} çoklu sembol çalıştırıcısında işlem görüyor; aktif sembol yapılamaz.")
+            return False
+        return True
 
     def _log(self, message: str) -> None:
         log_prefix = time.strftime("[%Y-%m-%d %H:%M:%S]")
@@ -78,27 +229,272 @@ class TradingBot:
             self.ui_update_callback("log", full_message)
         print(full_message)
 
+    def _emit(self, message_type: str, data: Any) -> None:
+        if self.ui_update_callback:
+            self.ui_update_callback(message_type, data)
+
     def _start_kline_socket(self, symbol: str, interval: str):
+        key = (symbol, interval)
+        if key in self.kline_buffers:
+            return
+        buffer = KlineBuffer(symbol, interval, capacity=self.kline_buffer_size)
+        self.kline_buffers[key] = buffer
+
+        # Geçmiş mumlarla tamponu başlangıçta bir kez doldur
+        try:
+            seed_buffer(buffer, self.client)
+        except Exception as e:
+            self._log(f"{symbol} {interval} geçmiş mum verisi alınamadı: {e}")
+        self._record_seed(buffer)
+        self._kline_sockets[key] = self.socket_manager.start_kline_socket(
+            callback=self._make_kline_handler(buffer), symbol=symbol, interval=interval
+        )
+
+    def _make_kline_handler(self, buffer: KlineBuffer) -> Callable[[dict], None]:
+        """Tamponu güncelleyen, kapanışta sinyal motorlarını besleyip olay yayınlayan kline işleyicisi."""
+        symbol, interval = buffer.symbol, buffer.interval
+
         def handle_message(msg):
-            if msg['e'] == 'kline':
+            if msg.get('e') == 'kline':
+                started = time.perf_counter()
                 k = msg['k']
-                df = pd.DataFrame([{
-                    'open_time': k['t'],
-                    'open': float(k['o']),
-                    'high': float(k['h']),
-                    'low': float(k['l']),
-                    'close': float(k['c']),
-                    'volume': float(k['v']),
-                    'close_time': k['T'],
-                }])
-                self.kline_data = df
-
-        self.socket_manager.start_kline_socket(callback=handle_message, symbol=symbol, interval=interval)
+                with self._engine_lock:
+                    closed = buffer.update_from_message(k)
+                    if closed:
+                        self._feed_closed_candle(symbol, interval, buffer.window(1)[0])
+                        # Borsanın olay zamanından sinyalin hesaplanmasına kadar geçen süre (saat farkı dahil)
+                        if 'E' in msg:
+                            metrics.histogram('tick_to_signal').observe(max(0.0, time.time() - msg['E'] / 1000))
+                event = {'symbol': symbol, 'interval': interval, 'open_time': k['t'],
+                         'close_time': k['T'], 'received_at': time.time()}
+                if closed:
+                    self.dispatcher.publish(CANDLE_CLOSED, event)
+                elif self.publish_ticks:
+                    self.dispatcher.publish(KLINE_TICK, event)
+                self._push_kline(buffer, closed)
+                metrics.histogram('kline_handler').observe(time.perf_counter() - started)
+
+        return handle_message
+
+    def _push_kline(self, buffer: KlineBuffer, closed: bool) -> None:
+        """Aktif sembol ve zaman dilimindeki mumu arayüze gönderir; kapanmamış mumlar seyreltilir."""
+        if not self.ui_update_callback or buffer.symbol != self.active_symbol or \
+                buffer.interval != self.strategy_configs[self.active_strategy_name]['timeframe']:
+            return
+        key = (buffer.symbol, buffer.interval)
+        now = time.monotonic()
+        if not closed and now - self._last_kline_push.get(key, 0.0) < self.ui_kline_interval:
+            return
+        self._last_kline_push[key] = now
+        row = buffer.window(1)[0]
+        self._emit('kline_update', {
+            'symbol': buffer.symbol, 'interval': buffer.interval, 'open_time': int(row[OPEN_TIME]),
+            'open': row[OPEN], 'high': row[HIGH], 'low': row[LOW], 'close': row[CLOSE],
+            'volume': row[VOLUME], 'closed': closed,
+        })
+
+    def _start_mark_price_socket(self, symbol: str) -> None:
+        if symbol in self._mark_sockets:
+            return
+        self._mark_sockets[symbol] = self.socket_manager.start_symbol_mark_price_socket(
+            callback=self._handle_mark_price, symbol=symbol
+        )
+
+    def _close_stream(self, handle: str) -> None:
+        self.socket_manager.stop_socket(handle)
+
+    def _release_streams(self) -> None:
+        """
+        Aktif sembol ya da strateji değiştiğinde artık kullanılmayan kline ve mark fiyatı akışlarını
+        kapatır; yoksa eski semboller her mesajda sinyal motorlarını çalıştırmaya devam eder. Açık
+        pozisyonun ve çoklu sembol yuvalarının sembollerinin mark fiyatı akışları korunur.
+        """
+        active_key = (self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+        for key in [key for key in self.kline_buffers if key != active_key]:
+            handle = self._kline_sockets.pop(key, None)
+            if handle is not None:
+                self._close_stream(handle)
+            with self._engine_lock:
+                del self.kline_buffers[key]
+                for engine_key in [(symbol, name) for symbol, name in self.signal_engines
+                                   if (symbol, self.strategy_configs[name]['timeframe']) == key]:
+                    del self.signal_engines[engine_key]
+            self._last_kline_push.pop(key, None)
+
+        keep = {self.active_symbol}
+        if self.position_open and self.current_position:
+            keep.add(self.current_position.get('symbol'))
+        if self.runner:
+            keep.update(self.runner.symbols)
+        for symbol in [symbol for symbol in self._mark_sockets if symbol not in keep]:
+            self._close_stream(self._mark_sockets.pop(symbol))
+            self.mark_prices.pop(symbol, None)
+
+    def _handle_mark_price(self, msg: dict) -> None:
+        if msg.get('e') != 'markPriceUpdate':
+            return
+        self.mark_prices[msg['s']] = float(msg['p'])
+        self._push_position(msg['s'])
+
+    def _push_position(self, symbol: str) -> None:
+        """Aktif sembolün pozisyon ve PNL özetini yerel mark fiyatıyla hesaplayıp arayüze gönderir."""
+        if not self.ui_update_callback or symbol != self.active_symbol:
+            return
+        pos = self.account.get_position(symbol) if self.account.synced else None
+        if pos is None:
+            payload = {'symbol': symbol, 'quantity': 0}
+        else:
+            mark_price = self.mark_prices.get(symbol, pos['entry_price'])
+            pnl = pos['amount'] * (mark_price - pos['entry_price'])
+            margin = abs(pos['amount']) * pos['entry_price'] / self.leverage
+            payload = {
+                'symbol': symbol, 'quantity': pos['amount'], 'entry_price': pos['entry_price'],
+                'mark_price': mark_price, 'pnl_usdt': round(pnl, 4),
+                'roi_percent': round(pnl / margin * 100, 2) if margin else 0.0,
+            }
+        if payload != self._last_position_payload:
+            self._last_position_payload = payload
+            self._emit('position_update', payload)
+
+    def _on_trades_persisted(self, trades: list) -> None:
+        """Veritabanına yeni eklenen işlemleri ve güncel özet istatistikleri arayüze artımlı olarak gönderir."""
+        if not self.ui_update_callback or not trades:
+            return
+        self._emit('history_append', [
+            {'trade_id': int(t['id']), 'symbol': t['symbol'], 'side': t['side'], 'pnl': float(t['realizedPnl']),
+             'timestamp': int(t['time']), 'strategy': t.get('strategy')}
+            for t in trades
+        ])
+        stats = database.calculate_stats()
+        self._emit('stats_update', {key: stats[key] for key in
+                                    ('total_pnl', 'win_rate', 'total_trades', 'wins', 'losses')})
+
+    def _feed_closed_candle(self, symbol: str, interval: str, row) -> None:
+        started = time.perf_counter()
+        for (engine_symbol, strategy_name), engine in self.signal_engines.items():
+            if engine_symbol == symbol and self.strategy_configs[strategy_name]['timeframe'] == interval:
+                engine.update(row[OPEN], row[HIGH], row[LOW], row[CLOSE], row[VOLUME])
+        metrics.histogram('indicator_update').observe(time.perf_counter() - started)
+
+    def _get_signal_engine(self, symbol: str, strategy_name: str):
+        """Sinyal motorunu döndürür; yoksa tampondaki kapanmış mumlarla ısıtarak oluşturur."""
+        engine = self.signal_engines.get((symbol, strategy_name))
+        if engine is not None:
+            return engine
+        timeframe = self.strategy_configs[strategy_name]['timeframe']
+        buffer = self.kline_buffers.get((symbol, timeframe))
+        if buffer is None:
+            self._start_kline_socket(symbol, timeframe)
+            return None
+        if len(buffer) < 3:
+            return None
+
+        module = strategy_scalper if strategy_name == 'Scalper' else strategy_kadir_v2
+        with self._engine_lock:
+            if (symbol, strategy_name) in self.signal_engines:
+                return self.signal_engines[(symbol, strategy_name)]
+            engine = module.StreamingSignal(self.strategy_configs[strategy_name])
+            # Son satır kapanmadıysa güncel mumdur; yalnızca kapanmış mumlar işlenir
+            for row in buffer.closed_window():
+                engine.update(row[OPEN], row[HIGH], row[LOW], row[CLOSE], row[VOLUME])
+            self.signal_engines[(symbol, strategy_name)] = engine
+        return engine
 
     def start_user_data_stream(self):
-        pass
+        """
+        Futures kullanıcı veri akışını açar ve hesap durumunu periyodik olarak REST ile uzlaştırır.
+        listenKey oluşturma ve süresini uzatma (keepalive) işlemlerini soket yöneticisi üstlenir.
+        """
+        self.refresh_symbol_filters()
+        # Önce akışa abone olunur; görüntü ile abonelik arasındaki olaylar kaybolmaz, görüntüden
+        # eski olanlar güncelleme zamanı denetimiyle elenir
+        self._open_user_socket()
+        self.reconcile_account()
+        while self.running:
+            time.sleep(self.reconcile_interval)
+            if self.running:
+                if self.symbol_filters.stale:
+                    self.refresh_symbol_filters()
+                self.reconcile_account()
+
+    def _open_user_socket(self) -> None:
+        if self._user_socket:
+            self.socket_manager.stop_socket(self._user_socket)
+        self._user_socket = self.socket_manager.start_futures_user_socket(callback=self._handle_user_message)
+
+    def _handle_user_message(self, msg: dict) -> None:
+        event_type = msg.get('e')
+        if event_type == 'listenKeyExpired':
+            self._log("Kullanıcı veri akışı anahtarının süresi doldu, akış yeniden açılıyor.")
+            self._in_background(self._reopen_user_stream)
+        elif event_type == 'error':
+            self._log(f"Kullanıcı veri akışı hatası: {msg.get('m')}")
+        else:
+            self.account.handle_event(msg)
+            if event_type == 'ACCOUNT_UPDATE':
+                self._push_position(self.active_symbol)
+
+    def _reopen_user_stream(self) -> None:
+        self._open_user_socket()
+        self.reconcile_account()
+
+    def _in_background(self, func: Callable, *args) -> None:
+        """
+        Kullanıcı akışı işleyicisinden gelen REST işlerini (yeniden uzlaştırma, kardeş emir iptali)
+        akışı bekletmeden tek bir arka plan iş parçacığında, geliş sırasıyla çalıştırır.
+        """
+        self._background.submit(func, *args).add_done_callback(self._background_done)
+
+    def _background_done(self, future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self._log(f"Arka plan işi başarısız: {future.exception()}")
+
+    def wait_background_idle(self) -> None:
+        """Kuyruktaki arka plan işleri bitene kadar bekler (tekrar oynatmada sıralı çalışma için)."""
+        self._background.submit(lambda: None).result()
+
+    def reconcile_account(self) -> bool:
+        """Bakiye, pozisyon ve açık emirleri REST üzerinden okuyup yerel durumu düzeltir."""
+        try:
+            account_info = self.client.futures_account()
+            open_orders = self.client.futures_get_open_orders()
+            positions = self.client.futures_position_information()
+            self._record('rest:reconcile', {'account': account_info, 'open_orders': open_orders,
+                                            'positions': positions})
+            self.account.apply_account_snapshot(account_info)
+            self.account.apply_open_orders_snapshot(open_orders)
+            self.account.apply_position_snapshot(positions)
+            return True
+        except Exception as e:
+            self._log(f"Hesap durumu uzlaştırılırken hata: {e}")
+            return False
+
+    def refresh_symbol_filters(self) -> bool:
+        """Tüm sembollerin LOT_SIZE/PRICE_FILTER/MIN_NOTIONAL kurallarını tek çağrıyla yeniler."""
+        try:
+            info = self.client.futures_exchange_info()
+            self._record('rest:exchange_info', info)
+            count = self.symbol_filters.load(info)
+            self._log(f"{count} sembolün emir kuralları yüklendi.")
+            return True
+        except Exception as e:
+            self._log(f"Sembol emir kuralları alınırken hata: {e}")
+            return False
+
+    def _last_price(self, symbol: str) -> Optional[float]:
+        if symbol in self.mark_prices:
+            return self.mark_prices[symbol]
+        buffers = list(self.kline_buffers.items())
+        if self.runner:
+            buffers += list(self.runner.buffers.items())
+        for (buffer_symbol, _), buffer in buffers:
+            if buffer_symbol == symbol and len(buffer):
+                return float(buffer.window(1)[0][CLOSE])
+        return None
 
     def get_usdt_balance(self) -> float:
+        if self.account.synced:
+            return self.account.get_balance('USDT') or 0.0
         try:
             account_info = self.client.futures_account()
             for asset in account_info['assets']:
@@ -109,14 +505,43 @@ class TradingBot:
             self._log(f"Bakiye alınırken hata: {e}")
         return 0.0
 
-    def calculate_quantity(self, balance: float) -> Optional[float]:
+    def calculate_quantity(self, balance: float, symbol: Optional[str] = None) -> Optional[float]:
+        """
+        `quantity_usd` teminatı ve kaldıraçla açılacak kontrat miktarını, sembolün son fiyatı
+        ve adım büyüklüğüne göre hesaplar. Emir borsanın kurallarına uymuyorsa (yetersiz
+        bakiye, en düşük miktar ya da emir değeri altı vb.) REST çağrısı yapılmadan None döner.
+        """
+        symbol = symbol or self.active_symbol
         if balance <= 0:
             return None
-        quantity = self.quantity_usd / balance * balance
+        if self.quantity_usd > balance:
+            self._log(f"[{symbol}] Yetersiz bakiye: {self.quantity_usd} USDT gerekli, {balance:.2f} USDT mevcut.")
+            return None
+        filters = self.symbol_filters.get(symbol)
+        if filters is None:
+            self._log(f"[{symbol}] Sembol emir kuralları yüklenmemiş, emir gönderilmedi.")
+            return None
+        price = self._last_price(symbol)
+        if not price:
+            self._log(f"[{symbol}] Son fiyat bilinmiyor, miktar hesaplanamadı.")
+            return None
+        quantity = filters.round_quantity(self.quantity_usd * self.leverage / price)
+        error = filters.validate(quantity, price)
+        if error is not None:
+            self._log(f"[{symbol}] Emir ön kontrolden geçmedi ({error[0]}): {error[1]} "
+                      f"Miktar: {quantity}, fiyat: {price}")
+            return None
         return quantity
 
     def _get_market_data(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
-        return self.kline_data
+        buffer = self.kline_buffers.get((symbol, timeframe))
+        if buffer is None:
+            self._start_kline_socket(symbol, timeframe)
+            return None
+        # Stratejiler son kapanan mumu (iloc[-2]) ve bir öncekini okur
+        if len(buffer) < 3:
+            return None
+        return buffer.to_frame()
 
     def open_position(self, signal: str, atr: float, quantity: float, manual: bool = False) -> None:
         try:
@@ -130,49 +555,159 @@ class TradingBot:
             self.position_open = True
             self.current_position = order
             self._log(f"{signal} pozisyonu açıldı. Miktar: {quantity}")
-            database.add_trade({
+            self.trade_journal.submit({
                 'symbol': self.active_symbol,
                 'id': order['orderId'],
                 'side': signal,
                 'realizedPnl': 0,
-                'time': int(time.time() * 1000)
+                'time': int(time.time() * 1000),
+                'strategy': None if manual else self.active_strategy_name
             })
         except Exception as e:
             self._log(f"Pozisyon açılırken hata: {e}")
+            return
+        self.place_bracket(self.active_symbol, signal, order, quantity, atr,
+                           self.strategy_configs[self.active_strategy_name],
+                           on_close=self._make_bracket_close(self.active_symbol))
+
+    # --- Koruma emirleri (SL/TP) ---
+
+    def _make_bracket_close(self, symbol: str) -> Callable[[], None]:
+        def closed():
+            if self.active_symbol == symbol:
+                self.position_open = False
+                self.current_position = None
+        return closed
+
+    def _prepare_bracket(self, symbol: str, signal: str, entry_order: dict, quantity: float, atr: float,
+                         config: Dict[str, Any]) -> list:
+        filters = self.symbol_filters.get(symbol)
+        entry_price = float(entry_order.get('avgPrice') or 0) or self._last_price(symbol)
+        if filters is None or not entry_price:
+            self._log(f"[{symbol}] Koruma emirleri verilmedi: emir kuralları ya da giriş fiyatı bilinmiyor.")
+            return []
+        # Piyasa emri yanıtı dolan miktarı içermiyorsa gönderilen miktar kullanılır
+        quantity = float(entry_order.get('executedQty') or 0) or quantity
+        orders, reason = bracket_orders(symbol, signal, quantity, entry_price, atr, config, filters,
+                                        self.risk_management_mode, self.fixed_roi_tp, self.leverage)
+        if reason:
+            self._log(f"[{symbol}] Koruma emirleri verilmedi: {reason}")
+        return orders
+
+    def _register_bracket(self, symbol: str, orders: list, response: list,
+                          on_close: Optional[Callable[[], None]]) -> None:
+        order_ids, errors = parse_batch_response(response)
+        for error in errors:
+            self._log(f"[{symbol}] Koruma emri reddedildi: {error}")
+        bracket = Bracket(symbol, order_ids[0], order_ids[1] if len(order_ids) > 1 else None, on_close)
+        if not bracket.order_ids:
+            return
+        legs = [f"{label} {order['stopPrice']}" for label, order, order_id in zip(('SL', 'TP'), orders, order_ids)
+                if order_id is not None]
+        self._log(f"[{symbol}] Borsada {' / '.join(legs)} emri bekliyor.")
+        filled = self.brackets.add(bracket)
+        if filled is not None:
+            self._bracket_filled(*filled)
+
+    def place_bracket(self, symbol: str, signal: str, entry_order: dict, quantity: float, atr: float,
+                      config: Dict[str, Any], on_close: Optional[Callable[[], None]] = None) -> None:
+        """
+        Giriş emrinin ardından reduce-only STOP_MARKET ve TAKE_PROFIT_MARKET emirlerini tek toplu
+        emir çağrısıyla borsaya iletir. Çıkışlar borsada tetiklenir; bacaklardan biri dolunca
+        `on_close` çağrılır ve diğeri `_on_order_update` tarafından iptal edilir.
+        """
+        orders = self._prepare_bracket(symbol, signal, entry_order, quantity, atr, config)
+        if not orders:
+            return
+        try:
+            response = self.client.futures_place_batch_order(batchOrders=orders)
+        except Exception as e:
+            self._log(f"[{symbol}] Koruma emirleri gönderilirken hata: {e}")
+            return
+        self._register_bracket(symbol, orders, response, on_close)
+
+    def _on_order_update(self, order: dict) -> None:
+        result = self.brackets.on_order(order)
+        if result is not None:
+            kind = "Zarar durdur" if order['type'] == STOP_LOSS else "Kâr al"
+            self._log(f"[{order['symbol']}] {kind} emri {order['avgPrice']} fiyatından doldu.")
+            self._bracket_filled(*result)
+
+    def _bracket_filled(self, bracket: Bracket, sibling: Optional[int]) -> None:
+        self._log(f"[{bracket.symbol}] Pozisyon borsadaki koruma emriyle kapandı.")
+        if bracket.on_close:
+            bracket.on_close()
+        if sibling is not None:
+            self._in_background(self._cancel_orders, bracket.symbol, [sibling])
+
+    def _cancel_orders(self, symbol: str, order_ids: list) -> None:
+        for order_id in order_ids:
+            try:
+                self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            except Exception as e:
+                # Emir bu arada dolmuş ya da süresi dolmuş olabilir (-2011)
+                self._log(f"[{symbol}] {order_id} numaralı koruma emri iptal edilemedi: {e}")
+
+    def cancel_brackets(self, symbol: str) -> None:
+        """Sembolün bekleyen tüm SL/TP emirlerini iptal eder (pozisyon elle kapatılırken)."""
+        for bracket in self.brackets.pop_symbol(symbol):
+            self._cancel_orders(symbol, bracket.order_ids)
 
     def check_and_update_pnl(self, symbol: str):
-        try:
-            positions = self.client.futures_position_information(symbol=symbol)
-            for pos in positions:
-                if float(pos['positionAmt']) != 0:
-                    pnl = float(pos['unrealizedProfit'])
-                    self._log(f"Açık pozisyon PNL: {pnl}")
-                    return
+        if self.account.synced:
+            pos = self.account.get_position(symbol)
+        else:
+            # İlk uzlaştırmadan önce pozisyon REST'ten okunur
+            try:
+                pos = _position_from_rest(self.client.futures_position_information(symbol=symbol))
+            except Exception as e:
+                self._log(f"Pozisyon bilgisi alınırken hata: {e}")
+                return
+        self._report_pnl(symbol, pos)
+
+    def _report_pnl(self, symbol: str, pos: Optional[dict]) -> None:
+        if pos is None:
             self.position_open = False
             self.current_position = None
-        except Exception as e:
-            self._log(f"PNL kontrolünde hata: {e}")
+            return
+        last_price = self._last_price(symbol)
+        if last_price is not None:
+            pnl = pos['amount'] * (last_price - pos['entry_price'])
+        else:
+            pnl = pos['unrealized_pnl']
+        self._log(f"Açık pozisyon PNL: {pnl}")
 
     def close_current_position(self, from_emergency_button=False) -> None:
+        self._record('control', {'method': 'close_current_position', 'args': [from_emergency_button]})
         if not self.position_open:
             self._log("Kapatılacak açık pozisyon yok.")
             return
         try:
-            side = SIDE_SELL if self.current_position['side'] == SIDE_BUY else SIDE_BUY
-            quantity = float(self.current_position['origQty'])
+            pos = self.account.get_position(self.active_symbol) if self.account.synced else None
+            if pos is not None:
+                # Kısmi dolum ve dışarıdan yapılan değişiklikler dahil, borsadaki gerçek miktarı kapat
+                side = SIDE_SELL if pos['amount'] > 0 else SIDE_BUY
+                quantity = abs(pos['amount'])
+            else:
+                side = SIDE_SELL if self.current_position['side'] == SIDE_BUY else SIDE_BUY
+                quantity = float(self.current_position['origQty'])
             self.client.futures_create_order(
                 symbol=self.active_symbol,
                 side=side,
                 type=ORDER_TYPE_MARKET,
-                quantity=quantity
+                quantity=quantity,
+                reduceOnly=True
             )
             self.position_open = False
             self.current_position = None
             self._log("Pozisyon piyasa emriyle kapatıldı.")
         except Exception as e:
             self._log(f"Pozisyon kapatılırken hata: {e}")
+            return
+        self.cancel_brackets(self.active_symbol)
 
     def set_leverage(self, leverage: int, symbol: str):
+        self._record('control', {'method': 'set_leverage', 'args': [leverage, symbol]})
         try:
             self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
             self.leverage = leverage
@@ -181,31 +716,42 @@ class TradingBot:
             self._log(f"Kaldıraç ayarlanırken hata: {e}")
 
     def set_quantity(self, quantity_usd: float):
+        self._record('control', {'method': 'set_quantity', 'args': [quantity_usd]})
         self.quantity_usd = quantity_usd
         self._log(f"İşlem miktarı {quantity_usd} USDT olarak ayarlandı.")
 
     def manual_trade(self, side: str):
-        strategy_config = self.strategy_configs[self.active_strategy_name]
-        timeframe = strategy_config['timeframe']
-        df = self._get_market_data(self.active_symbol, timeframe)
-        if df is None:
+        self._record('control', {'method': 'manual_trade', 'args': [side]})
+        engine = self._get_signal_engine(self.active_symbol, self.active_strategy_name)
+        if engine is None:
             self._log("Manuel işlem için piyasa verisi alınamadı.")
             return
 
-        _, atr_value = self.get_active_strategy_signal(df)
+        atr_value = engine.atr.value or 0
         balance = self.get_usdt_balance()
-        quantity = self.calculate_quantity(balance)
+        quantity = self.calculate_quantity(balance, self.active_symbol)
         if quantity:
             self.open_position(side, atr_value, quantity, manual=True)
 
     def update_symbol(self, mode: str, manual_symbol: str = ""):
+        self._record('control', {'method': 'update_symbol', 'args': [mode, manual_symbol]})
         if mode == "manual" and manual_symbol:
+            if not self._can_activate(manual_symbol.upper()):
+                return
             self.active_symbol = manual_symbol.upper()
+            self._start_kline_socket(self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+            self._start_mark_price_socket(self.active_symbol)
+            self._release_streams()
             self._log(f"Manuel sembol olarak {self.active_symbol} ayarlandı.")
         elif mode == "screener":
-            screened_symbol = screener.get_best_symbol()
+            screened_symbol = screener.get_best_symbol(self.client)
+            if screened_symbol and not self._can_activate(screened_symbol):
+                return
             if screened_symbol:
                 self.active_symbol = screened_symbol
+                self._start_kline_socket(self.active_symbol, self.strategy_configs[self.active_strategy_name]['timeframe'])
+                self._start_mark_price_socket(self.active_symbol)
+                self._release_streams()
                 self._log(f"Screener tarafından {self.active_symbol} seçildi.")
             else:
                 self._log("Screener sembol seçemedi.")
@@ -213,48 +759,97 @@ class TradingBot:
             self._log("Sembol güncelleme modu bilinmiyor.")
 
     def set_risk_mode(self, mode: str, roi_percent: float = 2.0):
+        self._record('control', {'method': 'set_risk_mode', 'args': [mode, roi_percent]})
         self.risk_management_mode = mode
         self.fixed_roi_tp = roi_percent / 100
         self._log(f"Risk yönetim modu {mode} olarak ayarlandı, ROI: {roi_percent}%")
 
     def set_strategy(self, strategy_name: str):
+        self._record('control', {'method': 'set_strategy', 'args': [strategy_name]})
         if strategy_name in ['KadirV2', 'Scalper']:
             self.active_strategy_name = strategy_name
+            self._start_kline_socket(self.active_symbol, self.strategy_configs[strategy_name]['timeframe'])
+            self._release_streams()
             self._log(f"✅ Aktif strateji: {strategy_name}")
         else:
             self._log(f"❌ Geçersiz strateji adı: {strategy_name}")
 
-    def get_active_strategy_signal(self, df: pd.DataFrame) -> tuple:
-        config = self.strategy_configs[self.active_strategy_name]
-        if self.active_strategy_name == 'Scalper':
-            return strategy_scalper.get_signal(df, config)
-        else:
-            return strategy_kadir_v2.get_signal(df, config)
+    def get_active_strategy_signal(self) -> Optional[tuple]:
+        """Aktif sembol ve strateji için son kapanan muma ait (sinyal, atr) ikilisini döndürür."""
+        engine = self._get_signal_engine(self.active_symbol, self.active_strategy_name)
+        if engine is None:
+            return None
+        return engine.last
 
-    def run_strategy(self):
-        self._log("Strateji döngüsü başladı.")
-        while self.strategy_active and self.running:
-            try:
-                config = self.strategy_configs[self.active_strategy_name]
-                timeframe = config['timeframe']
+    def _evaluate_strategy(self) -> bool:
+        """Aktif strateji sinyalini bir kez değerlendirir; piyasa verisi hazır değilse False döner."""
+        result = self.get_active_strategy_signal()
+        if result is None:
+            return False
 
-                df = self._get_market_data(self.active_symbol, timeframe)
-                if df is None:
-                    self._log("Piyasa verisi alınamadı, bekleniyor...")
-                    time.sleep(3)
-                    continue
+        signal, atr = result
 
-                signal, atr = self.get_active_strategy_signal(df)
+        if signal != 'WAIT':
+            balance = self.get_usdt_balance()
+            quantity = self.calculate_quantity(balance, self.active_symbol)
+            if quantity and not self.position_open:
+                self.open_position(signal, atr, quantity)
 
-                if signal:
-                    balance = self.get_usdt_balance()
-                    quantity = self.calculate_quantity(balance)
-                    if quantity and not self.position_open:
-                        self.open_position(signal, atr, quantity)
+        if self.position_open:
+            self.check_and_update_pnl(self.active_symbol)
+        return True
 
-                if self.position_open:
-                    self.check_and_update_pnl(self.active_symbol)
+    def _on_candle_closed(self, event: dict) -> None:
+        """Aktif sembol ve zaman dilimindeki her kapanan mum için stratejiyi tam bir kez çalıştırır."""
+        if not self.strategy_active or self.eval_mode != 'event':
+            return
+        if event['symbol'] != self.active_symbol or \
+                event['interval'] != self.strategy_configs[self.active_strategy_name]['timeframe']:
+            return
+        key = (self.active_symbol, self.active_strategy_name)
+        if self._last_evaluated.get(key) == event['close_time']:
+            return
+        self._last_evaluated[key] = event['close_time']
+
+        had_position = self.position_open
+        self._evaluate_strategy()
+        if self.position_open and not had_position:
+            now = time.time()
+            metrics.histogram('decision_latency').observe(now - event['received_at'])
+            metrics.histogram('kline_close_to_order').observe(now - event['close_time'] / 1000)
+
+    def get_settings(self) -> dict:
+        """Arayüzün ilk yüklemede gösterdiği ayarlar."""
+        return {
+            "leverage": self.leverage,
+            "quantity_usd": self.quantity_usd,
+            "active_symbol": self.active_symbol,
+            "risk_mode": self.risk_management_mode,
+            "fixed_roi_tp": self.fixed_roi_tp * 100,
+            "strategy": self.active_strategy_name
+        }
+
+    def get_metrics(self) -> dict:
+        return {
+            "runner_slots": self.runner.status() if self.runner else [],
+            "latency": metrics.snapshot_all(),
+            "event_queue_depth": self.dispatcher.qsize(),
+            "events_dropped": self.dispatcher.dropped,
+            "trade_journal": self.trade_journal.stats(),
+            "rest": self.client.stats(),
+            "paper": self.socket_manager.stats() if hasattr(self.socket_manager, 'stats') else None,
+            "recorder": self.recorder.stats() if self.recorder else None,
+            "brackets": self.brackets.stats(),
+            "account": {"synced": self.account.synced, "last_reconcile": self.account.last_reconcile,
+                        "last_event_time": self.account.last_event_time},
+        }
 
+    def run_strategy(self):
+        self._log("Strateji döngüsü başladı.")
+        while self.strategy_active and self.running:
+            try:
+                if not self._evaluate_strategy():
+                    self._log("Piyasa verisi alınamadı, bekleniyor...")
                 time.sleep(3)
 
             except Exception as e:
@@ -264,13 +859,39 @@ class TradingBot:
         self._log("Strateji döngüsü durduruldu.")
 
     def start_strategy_loop(self):
+        self._record('control', {'method': 'start_strategy_loop', 'args': []})
         if not self.strategy_active:
             self.strategy_active = True
-            threading.Thread(target=self.run_strategy, daemon=True).start()
+            if self.eval_mode == 'poll':
+                threading.Thread(target=self.run_strategy, daemon=True).start()
+            else:
+                # Olay tabanlı modda piyasa verisini hazırla; sinyal ilk mum kapanışında değerlendirilir
+                self._get_signal_engine(self.active_symbol, self.active_strategy_name)
+                self._log("Strateji mum kapanışı olaylarıyla çalışıyor.")
+            if self.runner:
+                self.runner.start()
 
     def stop_strategy_loop(self):
+        self._record('control', {'method': 'stop_strategy_loop', 'args': []})
         self.strategy_active = False
+        if self.runner:
+            self.runner.stop()
 
     def stop_all(self):
         self.running = False
         self.strategy_active = False
+        self.dispatcher.stop()
+        if self._user_socket:
+            self.socket_manager.stop_socket(self._user_socket)
+            self._user_socket = None
+        for socket_name in self._mark_sockets.values():
+            self.socket_manager.stop_socket(socket_name)
+        self._mark_sockets = {}
+        if self.runner:
+            self.runner.shutdown()
+        self.socket_manager.stop()
+        if self.recorder:
+            self.recorder.stop()
+        self._background.shutdown(wait=False)
+        self.trade_journal.stop()
+        self.client.shutdown()